@@ -0,0 +1,94 @@
+"""Compares .glitch in the image pool against the corrupter binary.
+
+Run from the repository root with: python -m benchmarks.glitch
+
+Both sides get the same random RGBA PNG and -boffset, and are timed
+from PNG bytes in to image bytes out. corrupter
+(https://github.com/r00tman/corrupter) is skipped if it's not on PATH."""
+
+import argparse
+import asyncio
+import io
+import shutil
+import statistics
+import time
+from typing import Awaitable, Callable, List, Optional
+
+import numpy as np
+from PIL import Image
+
+# util can only be imported after core, like the bot itself does
+from caligo import core  # noqa: F401  # isort: skip
+from caligo.util import glitch, image  # isort: skip
+
+SIZES = ((512, 512), (1280, 960))
+
+
+def random_png(width: int, height: int) -> bytes:
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (height, width, 4), np.uint8)
+    with io.BytesIO() as out:
+        Image.fromarray(pixels, "RGBA").save(out, "png")
+        return out.getvalue()
+
+
+async def run_corrupter(data: bytes, boffset: int) -> bytes:
+    proc = await asyncio.create_subprocess_exec(
+        "corrupter",
+        "-boffset",
+        str(boffset),
+        "-",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL)
+    stdout, _ = await proc.communicate(data)
+    if proc.returncode != 0:
+        raise RuntimeError(f"corrupter exited with {proc.returncode}")
+
+    return stdout
+
+
+async def run_pool(data: bytes, boffset: int) -> bytes:
+    return await image.run_in_pool(glitch.glitch, data, boffset)
+
+
+async def median_ms(func: Callable[[bytes, int], Awaitable[bytes]],
+                    data: bytes, boffset: int, runs: int) -> float:
+    # The first run starts the pool or loads the binary, leave it out
+    await func(data, boffset)
+
+    times: List[float] = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        await func(data, boffset)
+        times.append((time.perf_counter() - start) * 1000)
+
+    return statistics.median(times)
+
+
+async def main(runs: int, boffset: int) -> None:
+    corrupter: Optional[str] = shutil.which("corrupter")
+    if corrupter is None:
+        print("corrupter not found on PATH, timing the pool only")
+
+    try:
+        for width, height in SIZES:
+            data = random_png(width, height)
+            pool = await median_ms(run_pool, data, boffset, runs)
+            line = f"{width}x{height}: pool {pool:.0f} ms"
+            if corrupter is not None:
+                binary = await median_ms(run_corrupter, data, boffset, runs)
+                line += f", corrupter {binary:.0f} ms"
+
+            print(line)
+    finally:
+        image.shutdown_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--boffset", type=int, default=8)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.runs, args.boffset))
@@ -0,0 +1,74 @@
+"""Compares Message.view against rebuilding command messages.
+
+Run from the repository root with: python -m benchmarks.message_view
+
+rebuild() is the old Message._parse, which constructed a new message for
+the command and each message in its reply chain. Both are timed per
+message on a prebuilt reply chain of the given depth."""
+
+import argparse
+import time
+from typing import Callable, Dict
+
+from pyrogram import types
+
+# raw.Message is imported through core, like the bot itself does
+from caligo import core  # noqa: F401  # isort: skip
+from caligo.core.raw import Message  # isort: skip
+
+DEPTHS = (0, 1, 10, 50)
+
+
+def build_chain(depth: int) -> types.Message:
+    chat = types.Chat(id=-1001, type="supergroup", title="bench")
+    user = types.User(id=1, is_self=True, first_name="bench")
+
+    msg = None
+    for idx in range(depth + 1):
+        msg = types.Message(message_id=idx + 1,
+                            chat=chat,
+                            from_user=user,
+                            date=0,
+                            text=f".cmd message {idx}",
+                            reply_to_message=msg)
+
+    return msg
+
+
+def rebuild(msg: types.Message) -> types.Message:
+    mvars: Dict[str, object] = dict(vars(msg))
+    client = mvars.pop("_client", None)
+    mvars.pop("segments", None)
+
+    if mvars["reply_to_message"]:
+        mvars["reply_to_message"] = rebuild(mvars["reply_to_message"])
+    return types.Message(client=client, **mvars)
+
+
+def view(msg: types.Message) -> types.Message:
+    return Message.view(msg)
+
+
+def per_call_us(func: Callable[[types.Message], types.Message],
+                msg: types.Message, runs: int) -> float:
+    start = time.perf_counter()
+    for _ in range(runs):
+        func(msg)
+
+    return (time.perf_counter() - start) / runs * 1e6
+
+
+def main(runs: int) -> None:
+    for depth in DEPTHS:
+        msg = build_chain(depth)
+        old = per_call_us(rebuild, msg, runs)
+        new = per_call_us(view, msg, runs)
+        print(f"depth {depth:2d}: rebuild {old:6.1f} us, view {new:4.1f} us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n", 1)[0])
+    parser.add_argument("--runs", type=int, default=10000)
+    args = parser.parse_args()
+
+    main(args.runs)
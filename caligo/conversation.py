@@ -1,58 +1,162 @@
 import asyncio
+import functools
 import inspect
-from typing import TYPE_CHECKING, Optional, Union
+from collections import OrderedDict
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    ClassVar,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 
 import pyrogram
 from async_property import async_cached_property
 from pyrogram.types import Chat, Message
 
-from . import util
-
 if TYPE_CHECKING:
     from .core import Bot
 
+Filter = Callable[[pyrogram.Client, Message], Any]
+
 
 class Error(Exception):
     pass
 
 
-class ConversationExist(Error):
-
-    def __init__(self, msg: Optional[str] = None):
-        self.msg = msg
-        super().__init__(self.msg)
-
-
 class ConversationTimeout(Error):
     pass
 
 
+class ConversationChannel:
+    """Routes the incoming messages of one chat to the conversations in it.
+
+    Each waiting response has its own filters and timeout, and a message goes
+    to the first waiter (oldest first) that accepts it. Messages nobody is
+    waiting for yet are kept in a short backlog for the next waiter, so one
+    conversation's filter never throws away another one's reply."""
+
+    BACKLOG_SIZE: ClassVar[int] = 32
+
+    client: pyrogram.Client
+    conversations: Set["Conversation"]
+    waiters: List[Tuple["Conversation", Sequence[Filter], asyncio.Future]]
+    # Sequence number -> message, oldest first
+    backlog: "OrderedDict[int, Message]"
+    seq: int
+
+    def __init__(self, client: pyrogram.Client) -> None:
+        self.client = client
+        self.conversations = set()
+        self.waiters = []
+        self.backlog = OrderedDict()
+        self.seq = 0
+
+    def open(self, conv: "Conversation") -> None:
+        # Only messages received from now on belong to the conversation
+        conv.start_seq = self.seq
+        self.conversations.add(conv)
+
+    def close(self, conv: "Conversation") -> None:
+        self.conversations.discard(conv)
+        for owner, _, fut in self.waiters:
+            if owner is conv:
+                fut.cancel()
+
+        if not self.conversations:
+            self.backlog.clear()
+
+    async def _accepts(self, filters: Sequence[Filter], msg: Message) -> bool:
+        for fltr in filters:
+            ready = fltr(self.client, msg)
+            if inspect.isawaitable(ready):
+                ready = await ready
+            if not ready:
+                return False
+
+        return True
+
+    async def deliver(self, msg: Message) -> bool:
+        """Hands a message to the first waiter that accepts it, returning
+        whether one did. Otherwise it's kept in the backlog."""
+
+        self.seq += 1
+        seq = self.seq
+        for _, filters, fut in list(self.waiters):
+            # The waiter may time out while filters are running
+            if not fut.done() and await self._accepts(filters, msg) and \
+                    not fut.done():
+                fut.set_result(msg)
+                return True
+
+        self.backlog[seq] = msg
+        if len(self.backlog) > self.BACKLOG_SIZE:
+            self.backlog.popitem(last=False)
+
+        return False
+
+    async def wait(self, conv: "Conversation", filters: Sequence[Filter],
+                   timeout: Optional[float]) -> Message:
+        for seq, msg in list(self.backlog.items()):
+            if seq > conv.start_seq and await self._accepts(filters, msg):
+                # Another waiter may have claimed it in the meantime
+                if self.backlog.pop(seq, None) is not None:
+                    return msg
+
+        fut = asyncio.get_event_loop().create_future()
+        waiter = (conv, filters, fut)
+        self.waiters.append(waiter)
+        try:
+            return await asyncio.wait_for(fut, timeout)
+        except asyncio.TimeoutError:
+            raise ConversationTimeout from None
+        finally:
+            self.waiters.remove(waiter)
+
+
 class Conversation:
 
-    def __init__(self, bot: "Bot", input_chat: Union[str, int], timeout: int,
-                 max_messages: int) -> None:
-        self.Exist = ConversationExist
+    channel: ConversationChannel
+    start_seq: int
+
+    def __init__(self,
+                 bot: "Bot",
+                 input_chat: Union[str, int],
+                 timeout: int,
+                 max_messages: int,
+                 filters: Optional[Filter] = None) -> None:
         self.Timeout = ConversationTimeout
 
         self.bot = bot
         self.client = self.bot.client
 
         self._counter = 0
+        self._filters = filters
         self._input_chat = input_chat
         self._max_incoming = max_messages
         self._timeout = timeout
+        self.start_seq = 0
 
     @async_cached_property
     async def chat(self) -> Chat:
-        return await self.client.get_chat(self._input_chat)
+        return await self.bot.get_chat(self._input_chat)
 
     async def send_message(self, text, **kwargs) -> Message:
-        sent = await self.client.send_message(self.chat.id, text, **kwargs)
+        call = functools.partial(self.client.send_message, self.chat.id, text,
+                                 **kwargs)
+        sent = await self.client.scheduler.send(self.chat.id, call)
 
         return sent
 
     async def send_file(self, document, **kwargs) -> Message:
-        doc = await self.client.send_document(self.chat.id, document, **kwargs)
+        call = functools.partial(self.client.send_document, self.chat.id,
+                                 document, **kwargs)
+        doc = await self.client.scheduler.send(self.chat.id, call)
 
         return doc
 
@@ -74,24 +178,10 @@ class Conversation:
         if self._counter >= self._max_incoming:
             raise ValueError("Received max messages")
 
-        fut = self.bot.CONVERSATION[self.chat.id]
         timeout = kwargs.get("timeout") or self._timeout
-        before = util.time.usec()
-        while True:
-            after = before - util.time.usec()
-            try:
-                result = await asyncio.wait_for(fut.get(), timeout - after)
-            except asyncio.TimeoutError:
-                raise self.Timeout
-
-            if filters is not None and callable(filters):
-                ready = filters(self.bot.client, result)
-                if inspect.iscoroutine(ready):
-                    ready = await ready
-                if not ready:
-                    continue
-
-            break
+        result = await self.channel.wait(
+            self, [f for f in (self._filters, filters) if f is not None],
+            timeout)
 
         self._counter += 1
 
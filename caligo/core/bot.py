@@ -6,21 +6,30 @@ import aiohttp
 import pyrogram
 import ujson
 
+from .. import util
 from .command_dispatcher import CommandDispatcher
 from .conversation_dispatcher import ConversationDispatcher
 from .database import DataBase
+from .entity_cache import EntityCache
 from .event_dispatcher import EventDispatcher
+from .message_cache import MessageCache
 from .module_extender import ModuleExtender
 from .telegram_bot import TelegramBot
+from .transfer_manager import TransferManager
+from .update_router import UpdateRouter
 
 
 class Bot(
         TelegramBot,
         CommandDispatcher,
         DataBase,
+        EntityCache,
         EventDispatcher,
+        MessageCache,
         ConversationDispatcher,
         ModuleExtender,
+        TransferManager,
+        UpdateRouter,
 ):
     client: pyrogram.Client
     lock: asyncio.Lock
@@ -61,22 +70,40 @@ class Bot(
 
         self.log.info("Stopping")
         if self.loaded:
-            await self.dispatch_event("stop")
+            await self.dispatch_module_event("stop", reverse=True)
         await self.http.close()
-        await self.close_db()
 
-        self.log.info("Running post-stop hooks")
+        # Clients save their sessions to the database as they stop, so they
+        # have to go first
         if self.loaded:
-            if self.client.is_initialized:
+            clients = [self.client]
+            if self.has_bot:
+                clients.append(self.client.bot)
+            for client in clients:
+                if not client.is_initialized:
+                    continue
+
                 if self.stop_manual:
-                    await self.client.stop(block=False)
+                    # terminate() joins the handler workers and we're running
+                    # in one, so skip it and close the sessions and storage
+                    # ourselves while the database is still open
+                    for media_session in client.media_sessions.values():
+                        await media_session.stop()
+                    await client.session.stop()
+                    await client.storage.save()
+                    await client.storage.close()
                 else:
-                    await self.client.stop()
+                    await client.stop()
+        await self.close_db()
+        util.image.shutdown_pool()
+
+        self.log.info("Running post-stop hooks")
+        if self.loaded:
             for task in asyncio.all_tasks():
                 if task is not asyncio.current_task():
                     task.cancel()
             await self.loop.shutdown_asyncgens()
-            await self.dispatch_event("stopped")
+            await self.dispatch_module_event("stopped", reverse=True)
         self.loop.stop()
 
     def __new_aiosession(self) -> aiohttp.ClientSession:
@@ -1,8 +1,7 @@
 import re
-from typing import TYPE_CHECKING, Any, MutableMapping, Tuple
+from typing import TYPE_CHECKING, Any, List, MutableMapping, Optional, Tuple
 
 import pyrogram
-from pyrogram.filters import Filter, create
 
 from .. import command, module, util
 from .base import Base
@@ -70,46 +69,35 @@ class CommandDispatcher(Base):
         for cmd in to_unreg:
             self.unregister_command(cmd)
 
-    def command_predicate(self: "Bot") -> Filter:
+    def parse_command(self: "Bot", msg: pyrogram.types.Message,
+                      prefix: str) -> Optional[List[str]]:
+        """Returns the command segments if the message invokes a known command."""
 
-        async def func(_, __, msg: pyrogram.types.Message):
-            if msg.text is not None and msg.text.startswith(self.prefix):
-                parts = msg.text.split()
-                parts[0] = parts[0][len(self.prefix):]
-                msg.segments = parts
-                return True
+        text = msg.text
+        if text is None or not text.startswith(prefix):
+            return None
 
-            return False
+        # Only look at the first word until we know it's a command
+        invoker = text[len(prefix):].split(maxsplit=1)
+        if not invoker or invoker[0] not in self.commands:
+            return None
 
-        return create(func)
-
-    def sudo_command_predicate(self: "Bot") -> Filter:
-
-        async def func(_, __, msg: pyrogram.types.Message):
-            if (msg.text is not None and msg.text.startswith(self.sudoprefix)
-                    and msg.from_user.id == self.uid):
-                parts = msg.text.split()
-                parts[0] = parts[0][len(self.sudoprefix):]
-                msg.segments = parts
-                return True
-
-            return False
-
-        return create(func)
+        parts = text.split()
+        parts[0] = parts[0][len(prefix):]
+        return parts
 
     @staticmethod
-    def outgoing_flt() -> Filter:
-        return create(
-            lambda _, __, msg: msg.via_bot is None and not msg.scheduled and
-            not (msg.forward_from or msg.forward_sender_name) and not (
-                msg.from_user and msg.from_user.is_bot) and
-            (msg.outgoing or (msg.from_user and msg.from_user.is_self)) and
-            not (msg.chat and msg.chat.type == "channel" and msg.edit_date))
+    def is_outgoing(msg: pyrogram.types.Message) -> bool:
+        return (msg.via_bot is None and not msg.scheduled and
+                not (msg.forward_from or msg.forward_sender_name) and
+                not (msg.from_user and msg.from_user.is_bot) and
+                (msg.outgoing or (msg.from_user and msg.from_user.is_self)) and
+                not (msg.chat and msg.chat.type == "channel" and msg.edit_date))
 
     async def on_command(self: "Bot", client: pyrogram.Client,
                          msg: pyrogram.types.Message) -> None:
         cmd = None
-        msg = Message._parse(msg)
+        msg = Message.view(msg)
 
         try:
             try:
@@ -117,6 +105,12 @@ class CommandDispatcher(Base):
             except KeyError:
                 return
 
+            if isinstance(cmd.module, module.LazyModule):
+                await self.materialize(cmd.module)
+                cmd = self.commands.get(msg.segments[0])
+                if cmd is None:
+                    return
+
             if (cmd.module.name == "GoogleDrive"
                     and not cmd.module.disabled) and cmd.name not in [
                         "gdreset", "gdclear"
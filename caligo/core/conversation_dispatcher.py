@@ -1,11 +1,9 @@
-import asyncio
 from contextlib import asynccontextmanager
 from typing import TYPE_CHECKING, Any, Dict, Optional, Union
 
 import pyrogram
-from pyrogram.filters import Filter, create
 
-from ..conversation import Conversation
+from ..conversation import Conversation, ConversationChannel, Filter
 from .base import Base
 
 if TYPE_CHECKING:
@@ -13,21 +11,17 @@ if TYPE_CHECKING:
 
 
 class ConversationDispatcher(Base):
-    CONVERSATION: Dict[int, asyncio.Queue]
+    # Chat ID -> messages router shared by the conversations open in it
+    CONVERSATION: Dict[int, ConversationChannel]
 
     def __init__(self: "Bot", **kwargs: Any) -> None:
         self.CONVERSATION = {}
 
         super().__init__(**kwargs)
 
-    def conversation_predicate(self: "Bot") -> Filter:
-
-        async def func(_, __, conv: pyrogram.types.Message):
-            return bool(self.CONVERSATION and conv.chat
-                        and conv.chat.id in self.CONVERSATION
-                        and not conv.outgoing)
-
-        return create(func)
+    def in_conversation(self: "Bot", msg: pyrogram.types.Message) -> bool:
+        return bool(self.CONVERSATION and msg.chat and
+                    msg.chat.id in self.CONVERSATION and not msg.outgoing)
 
     @asynccontextmanager
     async def conversation(
@@ -36,23 +30,26 @@ class ConversationDispatcher(Base):
         *,
         timeout: Optional[int] = 7,
         max_messages: Optional[int] = 7,
+        filters: Optional[Filter] = None,
     ) -> None:
-        conv = Conversation(self, chat_id, timeout, max_messages)
+        conv = Conversation(self, chat_id, timeout, max_messages, filters)
         await conv.chat
 
-        chat_name = conv.chat.title if conv.chat.title else conv.chat.first_name
-        if conv.chat.id in self.CONVERSATION:
-            raise conv.Exist(f"Conversation with '{chat_name}' exist")
-        self.CONVERSATION[conv.chat.id] = asyncio.Queue(max_messages)
+        channel = self.CONVERSATION.get(conv.chat.id)
+        if channel is None:
+            channel = ConversationChannel(self.client)
+            self.CONVERSATION[conv.chat.id] = channel
+        conv.channel = channel
+        channel.open(conv)
 
         try:
             yield conv
         finally:
-            self.CONVERSATION[conv.chat.id].put_nowait(None)
-            del self.CONVERSATION[conv.chat.id]
+            channel.close(conv)
+            if not channel.conversations and \
+                    self.CONVERSATION.get(conv.chat.id) is channel:
+                del self.CONVERSATION[conv.chat.id]
 
     async def on_conversation(self: "Bot", _: pyrogram.Client,
                               msg: pyrogram.types.Message) -> None:
-        cache = self.CONVERSATION[msg.chat.id]
-        cache.put_nowait(msg)
-        msg.continue_propagation()
+        await self.CONVERSATION[msg.chat.id].deliver(msg)
@@ -0,0 +1,206 @@
+import pickle
+from collections import Counter, OrderedDict
+from datetime import datetime
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Union,
+)
+
+import pyrogram
+from pyrogram.handlers import ChatMemberUpdatedHandler, MessageHandler
+
+from .. import util
+from ..custom_filter import chat_action
+from .base import Base
+
+if TYPE_CHECKING:
+    from .bot import Bot
+
+EntityRef = Union[int, str]
+# (kind, chat or user ID, member user ID or 0)
+EntityKey = Tuple[str, int, int]
+
+# Runs before the update router so member changes are seen first
+ENTITY_HANDLER_GROUP = -1
+
+
+def _doc_id(key: EntityKey) -> str:
+    return ":".join(map(str, key))
+
+
+class EntityCache(Base):
+    """Caches users, chats and chat members fetched from Telegram.
+
+    Entries are kept in memory up to entity_cache_size, dropping the least
+    recently used first, and mirrored to the database so a restart doesn't
+    start cold. Both expire after entity_cache_ttl seconds, and members are
+    dropped early when they join, leave or get their status changed."""
+
+    # Key -> (time fetched, entity), least recently used first
+    entities: "OrderedDict[EntityKey, Tuple[int, Any]]"
+    # Lowercased username -> ID
+    entity_names: Dict[str, int]
+    # "hits", "restored" (from the database) and "misses"
+    entity_stats: Counter
+
+    def __init__(self: "Bot", **kwargs: Any) -> None:
+        self.entities = OrderedDict()
+        self.entity_names = {}
+        self.entity_stats = Counter()
+
+        super().__init__(**kwargs)
+
+    def add_entity_handlers(self: "Bot") -> None:
+        self.client.add_handler(
+            MessageHandler(self.on_entity_action, chat_action()),
+            ENTITY_HANDLER_GROUP)
+        self.client.add_handler(
+            ChatMemberUpdatedHandler(self.on_member_update),
+            ENTITY_HANDLER_GROUP)
+
+    async def init_entity_db(self: "Bot") -> None:
+        # Let the database drop expired entries by itself
+        await self.get_db("entities").create_index("expires",
+                                                   expireAfterSeconds=0)
+
+    def _resolve_ref(self: "Bot", ref: EntityRef) -> Optional[int]:
+        if isinstance(ref, int):
+            return ref
+
+        ref = ref.lstrip("@").lower()
+        if ref in ("me", "self"):
+            return self.uid
+        if ref.lstrip("-").isdigit():
+            return int(ref)
+
+        return self.entity_names.get(ref)
+
+    def _entity_key(self: "Bot",
+                    kind: str,
+                    ref: EntityRef,
+                    user: EntityRef = 0) -> Optional[EntityKey]:
+        ref_id = self._resolve_ref(ref)
+        user_id = self._resolve_ref(user)
+        if ref_id is None or user_id is None:
+            return None
+
+        return kind, ref_id, user_id
+
+    def _remember(self: "Bot", key: EntityKey, fetched: int,
+                  entity: Any) -> None:
+        self.entities[key] = (fetched, entity)
+        self.entities.move_to_end(key)
+        while len(self.entities) > self.getConfig.entity_cache_size:
+            self.entities.popitem(last=False)
+
+        username = getattr(entity, "username", None)
+        if username and key[0] != "member":
+            self.entity_names[username.lower()] = key[1]
+
+    async def _cached_entity(self: "Bot", kind: str,
+                             fetch: Callable[[], Awaitable[Any]],
+                             ref: EntityRef, user: EntityRef = 0) -> Any:
+        now = util.time.sec()
+        ttl = self.getConfig.entity_cache_ttl
+        db = self.get_db("entities")
+
+        key = self._entity_key(kind, ref, user)
+        if key is not None:
+            entry = self.entities.get(key)
+            if entry is not None and now - entry[0] < ttl:
+                self.entities.move_to_end(key)
+                self.entity_stats["hits"] += 1
+                return entry[1]
+
+            doc = await db.find_one({
+                "_id": _doc_id(key),
+                "expires": {
+                    "$gt": datetime.utcfromtimestamp(now)
+                },
+            })
+            if doc is not None:
+                try:
+                    entity = pickle.loads(doc["data"])
+                except Exception as e:  # skipcq: PYL-W0703
+                    # Saved by an incompatible pyrogram, so fetch it afresh
+                    self.log.warning(
+                        f"Dropping unreadable cached entity {doc['_id']}: {e}")
+                    await db.delete_one({"_id": doc["_id"]})
+                else:
+                    util.tg.bind_client(entity, self.client)
+                    self._remember(key, doc["fetched"], entity)
+                    self.entity_stats["restored"] += 1
+                    return entity
+
+        self.entity_stats["misses"] += 1
+        entity = await fetch()
+
+        if kind == "member":
+            # The chat has to be known already, members don't carry it
+            if key is None:
+                return entity
+        elif isinstance(entity, (pyrogram.types.User, pyrogram.types.Chat)):
+            key = (kind, entity.id, 0)
+        else:
+            return entity
+
+        self._remember(key, now, entity)
+        doc = {
+            "fetched": now,
+            "expires": datetime.utcfromtimestamp(now + ttl),
+            "data": pickle.dumps(entity),
+        }
+        await db.replace_one({"_id": _doc_id(key)}, doc, upsert=True)
+
+        return entity
+
+    async def get_chat(self: "Bot", chat_id: EntityRef) -> pyrogram.types.Chat:
+        return await self._cached_entity(
+            "chat", lambda: self.client.get_chat(chat_id), chat_id)
+
+    async def get_user(self: "Bot", user_id: EntityRef) -> pyrogram.types.User:
+        return await self._cached_entity(
+            "user", lambda: self.client.get_users(user_id), user_id)
+
+    async def get_chat_member(self: "Bot", chat_id: EntityRef,
+                              user_id: EntityRef) -> pyrogram.types.ChatMember:
+        return await self._cached_entity(
+            "member", lambda: self.client.get_chat_member(chat_id, user_id),
+            chat_id, user_id)
+
+    async def invalidate_entity(self: "Bot", chat_id: int,
+                                *user_ids: int) -> None:
+        """Forgets a chat and the given members of it."""
+
+        keys: List[EntityKey] = [("chat", chat_id, 0)]
+        keys.extend(("member", chat_id, user_id) for user_id in user_ids)
+        for key in keys:
+            self.entities.pop(key, None)
+
+        await self.get_db("entities").delete_many(
+            {"_id": {
+                "$in": [_doc_id(key) for key in keys]
+            }})
+
+    async def on_entity_action(self: "Bot", _: pyrogram.Client,
+                               msg: pyrogram.types.Message) -> None:
+        users = list(msg.new_chat_members or [])
+        if msg.left_chat_member:
+            users.append(msg.left_chat_member)
+
+        await self.invalidate_entity(msg.chat.id, *(user.id for user in users))
+
+    async def on_member_update(
+            self: "Bot", _: pyrogram.Client,
+            update: pyrogram.types.ChatMemberUpdated) -> None:
+        member = update.new_chat_member or update.old_chat_member
+        users = (member.user.id,) if member and member.user else ()
+
+        await self.invalidate_entity(update.chat.id, *users)
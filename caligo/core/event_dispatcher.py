@@ -1,23 +1,54 @@
 import asyncio
 import bisect
-from typing import TYPE_CHECKING, Any, MutableMapping, MutableSequence, Optional
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    List,
+    Match,
+    MutableMapping,
+    MutableSequence,
+    Optional,
+    Pattern,
+    Sequence,
+    Tuple,
+)
 
 from pyrogram.filters import Filter
 from pyrogram.types import CallbackQuery, InlineQuery, Message
 
 from .. import module, util
-from ..listener import Listener, ListenerFunc
+from ..listener import Listener, ListenerFunc, PatternIndex, match_value
 from .base import Base
 
 if TYPE_CHECKING:
     from .bot import Bot
 
+# Lifecycle events always run directly, they may dispatch other events and
+# must never wait behind (or be dropped by) the worker pool
+LIFECYCLE_EVENTS = {"load", "start", "started", "stop", "stopped"}
+
+EventJob = Tuple[Sequence[Listener], Tuple[Any, ...], Dict[str, Any],
+                 Optional[asyncio.Future]]
+
 
 class EventDispatcher(Base):
     listeners: MutableMapping[str, MutableSequence[Listener]]
+    listener_patterns: Dict[str, PatternIndex]
+
+    event_queues: Dict[str, asyncio.Queue]
+    event_workers: Dict[str, Sequence[asyncio.Task]]
+    events_dropped: int
+    events_delayed: int
 
     def __init__(self: "Bot", **kwargs: Any) -> None:
         self.listeners = {}
+        self.listener_patterns = {}
+
+        self.event_queues = {}
+        self.event_workers = {}
+        self.events_dropped = 0
+        self.events_delayed = 0
 
         super().__init__(**kwargs)
 
@@ -29,14 +60,19 @@ class EventDispatcher(Base):
         *,
         priority: Optional[int] = 100,
         regex: Filter = None,
+        pattern: Optional[Pattern[str]] = None,
+        timeout: Optional[float] = None,
     ) -> None:
-        listener = Listener(event, func, mod, priority, regex)
+        listener = Listener(event, func, mod, priority, regex, pattern,
+                            timeout)
 
         if event in self.listeners:
             bisect.insort(self.listeners[event], listener)
         else:
             self.listeners[event] = [listener]
 
+        if pattern is not None:
+            self.index_patterns(event)
         self.update_module_events()
 
     def unregister_listener(self: "Bot", listener: Listener) -> None:
@@ -44,8 +80,22 @@ class EventDispatcher(Base):
         if not self.listeners[listener.event]:
             del self.listeners[listener.event]
 
+        if listener.pattern is not None:
+            self.index_patterns(listener.event)
         self.update_module_events()
 
+    def index_patterns(self: "Bot", event: str) -> None:
+        """Rebuilds the combined pattern matcher of an event."""
+
+        listeners = [
+            lst for lst in self.listeners.get(event, [])
+            if lst.pattern is not None
+        ]
+        if listeners:
+            self.listener_patterns[event] = PatternIndex(listeners)
+        else:
+            self.listener_patterns.pop(event, None)
+
     def register_listeners(self: "Bot", mod: module.Module) -> None:
         for event, func in util.misc.find_prefixed_funcs(mod, "on_"):
             done = True
@@ -56,6 +106,8 @@ class EventDispatcher(Base):
                     func,
                     priority=getattr(func, "_listener_priority", 100),
                     regex=getattr(func, "_listener_regex", None),
+                    pattern=getattr(func, "_listener_pattern", None),
+                    timeout=getattr(func, "_listener_timeout", None),
                 )
                 done = True
             finally:
@@ -73,24 +125,27 @@ class EventDispatcher(Base):
         for listener in to_unreg:
             self.unregister_listener(listener)
 
-    async def dispatch_event(self: "Bot",
-                             event: str,
-                             *args: Any,
-                             wait: bool = True,
-                             **kwargs: Any) -> None:
-        tasks = set()
-
+    async def match_listeners(self: "Bot", event: str,
+                              *args: Any) -> Sequence[Listener]:
         try:
             listeners = self.listeners[event]
         except KeyError:
-            return None
-
-        if not listeners:
-            return
+            return []
 
+        matched = []
         matches = None
+        hits = None
         for lst in listeners:
-            if lst.regex is not None:
+            if lst.pattern is not None:
+                if hits is None:
+                    hit_index, hits = self._match_patterns(event, args)
+
+                if lst not in hits:
+                    continue
+
+                matches = hits[lst]
+                index = hit_index
+            elif lst.regex is not None:
                 for idx, arg in enumerate(args):
                     if isinstance(arg, (CallbackQuery, InlineQuery, Message)):
                         match = await lst.regex(self.client, arg)
@@ -107,17 +162,115 @@ class EventDispatcher(Base):
                 else:
                     continue
 
-            task = self.loop.create_task(lst.func(*args, **kwargs))
-            tasks.add(task)
-
-        if not tasks:
-            return
+            matched.append(lst)
 
         if matches:
             args[index].matches = matches
+
+        return matched
+
+    def _match_patterns(
+            self: "Bot", event: str,
+            args: Tuple[Any, ...]) -> Tuple[int, Dict[Listener, List[Match]]]:
+        for idx, arg in enumerate(args):
+            if isinstance(arg, (CallbackQuery, InlineQuery, Message)):
+                return idx, self.listener_patterns[event].match(
+                    match_value(arg))
+
+        self.log.error(f"'{event}' can't be used with pattern")
+        return -1, {}
+
+    async def dispatch_event(self: "Bot",
+                             event: str,
+                             *args: Any,
+                             wait: bool = True,
+                             **kwargs: Any) -> None:
+        listeners = await self.match_listeners(event, *args)
+        if not listeners:
+            return
+
         self.log.debug("Dispatching event '%s' with data %s", event, args)
+        if self.getConfig.event_workers > 0 and event not in LIFECYCLE_EVENTS:
+            await self._queue_event(event, listeners, args, kwargs, wait)
+            return
+
+        tasks = set()
+        for lst in listeners:
+            task = self.loop.create_task(lst.func(*args, **kwargs))
+            tasks.add(task)
+
         if wait:
             await asyncio.wait(tasks)
 
-    async def log_stat(self: "Bot", stat: str) -> None:
-        await self.dispatch_event("stat_event", stat, wait=False)
+    async def _queue_event(
+        self: "Bot",
+        event: str,
+        listeners: Sequence[Listener],
+        args: Tuple[Any, ...],
+        kwargs: Dict[str, Any],
+        wait: bool,
+    ) -> None:
+        try:
+            queue = self.event_queues[event]
+        except KeyError:
+            queue = asyncio.Queue(self.getConfig.event_queue_size)
+            self.event_queues[event] = queue
+            self.event_workers[event] = [
+                self.loop.create_task(self._event_worker(event, queue))
+                for _ in range(self.getConfig.event_workers)
+            ]
+
+        done = self.loop.create_future() if wait else None
+        job = (listeners, args, kwargs, done)
+        try:
+            queue.put_nowait(job)
+        except asyncio.QueueFull:
+            if not wait:
+                self.events_dropped += 1
+                self.log.warning(f"Event queue for '{event}' is full, dropped")
+                return
+
+            # The caller wants the result anyway, so hold it back until
+            # there's room in the queue
+            self.events_delayed += 1
+            await queue.put(job)
+
+        if done is not None:
+            await done
+
+    async def _event_worker(self: "Bot", event: str,
+                            queue: asyncio.Queue) -> None:
+        while True:
+            job: EventJob = await queue.get()
+            listeners, args, kwargs, done = job
+            try:
+                # Same as the direct path, every matched listener runs at once
+                await asyncio.gather(*(
+                    self._run_listener(event, lst, args, kwargs)
+                    for lst in listeners))
+            finally:
+                if done is not None and not done.done():
+                    done.set_result(None)
+                queue.task_done()
+
+    async def _run_listener(self: "Bot", event: str, lst: Listener,
+                            args: Tuple[Any, ...],
+                            kwargs: Dict[str, Any]) -> None:
+        # Only listeners that ask for it (or all of them with
+        # LISTENER_TIMEOUT) get cancelled, long handlers run to the end
+        timeout = lst.timeout or self.getConfig.listener_timeout or None
+        try:
+            await asyncio.wait_for(lst.func(*args, **kwargs), timeout)
+        except asyncio.TimeoutError:
+            lst.module.log.warning(
+                f"Listener for '{event}' timed out after {timeout}s")
+        except Exception as e:  # skipcq: PYL-W0703
+            lst.module.log.error(f"Error in listener for '{event}'",
+                                 exc_info=e)
+
+    @property
+    def event_queue_depth(self: "Bot") -> int:
+        return sum(queue.qsize() for queue in self.event_queues.values())
+
+    async def log_stat(self: "Bot", stat: str, value: int = 1) -> None:
+        await self.dispatch_event("stat_event", stat, value, wait=False)
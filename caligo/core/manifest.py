@@ -0,0 +1,118 @@
+import inspect
+import json
+import logging
+from pathlib import Path
+from types import ModuleType
+from typing import Any, Dict, List, Optional, Pattern, Tuple, Type, Union
+
+from .. import module, util
+
+log = logging.getLogger("Manifest")
+
+MANIFEST_PATH = Path.home() / ".cache" / "caligo" / "modules.json"
+# Listeners for these run on nearly every update, so a lazy stub would
+# import its module right after startup anyway
+EAGER_EVENTS = {"message", "message_edit", "chat_action"}
+
+
+def _describe_pattern(
+        value: Optional[Union[str, Pattern[str]]]) -> Optional[List[Any]]:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        return [value, 0]
+
+    return [value.pattern, value.flags]
+
+
+def describe_module(cls: Type[module.Module], symbol: str) -> Dict[str, Any]:
+    """Collects what's needed to register a module without importing it."""
+
+    commands = []
+    for name, func in util.misc.find_prefixed_funcs(cls, "cmd_"):
+        commands.append({
+            "name": name,
+            "func": "cmd_" + name,
+            "desc": getattr(func, "_cmd_description", None),
+            "usage": getattr(func, "_cmd_usage", None),
+            "usage_optional": getattr(func, "_cmd_usage_optional", False),
+            "usage_reply": getattr(func, "_cmd_usage_reply", False),
+            "aliases": list(getattr(func, "_cmd_aliases", [])),
+            "pattern": _describe_pattern(getattr(func, "_cmd_pattern", None)),
+        })
+
+    listeners = []
+    for event, func in util.misc.find_prefixed_funcs(cls, "on_"):
+        listeners.append({
+            "event": event,
+            "func": "on_" + event,
+            "priority": getattr(func, "_listener_priority", 100),
+            "pattern": _describe_pattern(
+                getattr(func, "_listener_pattern", None)),
+            "timeout": getattr(func, "_listener_timeout", None),
+        })
+
+    return {
+        "name": cls.name,
+        "symbol": symbol,
+        "lazy": cls.lazy,
+        "dependencies": list(cls.dependencies),
+        "commands": commands,
+        "listeners": listeners,
+    }
+
+
+def is_lazy(info: Dict[str, Any]) -> bool:
+    """Whether a described module is worth deferring until first use."""
+
+    return info["lazy"] and not any(
+        lst["event"] in EAGER_EVENTS for lst in info["listeners"])
+
+
+def find_module_classes(
+        submodule: ModuleType) -> List[Tuple[str, Type[module.Module]]]:
+    """Returns the enabled module classes defined in a submodule."""
+
+    results = []
+    for sym in dir(submodule):
+        cls = getattr(submodule, sym)
+        if (inspect.isclass(cls) and issubclass(cls, module.Module)
+                and not cls.disabled):
+            results.append((sym, cls))
+
+    return results
+
+
+def describe_submodule(submodule: ModuleType) -> Dict[str, Any]:
+    return {
+        "stamp": file_stamp(submodule.__file__),
+        "modules": [
+            describe_module(cls, sym)
+            for sym, cls in find_module_classes(submodule)
+        ],
+    }
+
+
+def file_stamp(path: Union[str, Path]) -> List[int]:
+    stat = Path(path).stat()
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def read() -> Dict[str, Any]:
+    try:
+        with MANIFEST_PATH.open("r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        log.warning(f"Ignoring unreadable module manifest: {e}")
+        return {}
+
+
+def write(manifest: Dict[str, Any]) -> None:
+    MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+
+    tmp = MANIFEST_PATH.with_suffix(".tmp")
+    with tmp.open("w") as f:
+        json.dump(manifest, f)
+    tmp.replace(MANIFEST_PATH)
@@ -0,0 +1,160 @@
+import pickle
+import zlib
+from collections import Counter, OrderedDict
+from typing import TYPE_CHECKING, Any, Iterable, List, Optional, Union
+
+import pyrogram
+from pyrogram.handlers import DeletedMessagesHandler, MessageHandler
+
+from .. import util
+from .base import Base
+
+if TYPE_CHECKING:
+    from .bot import Bot
+
+# Runs before every other handler so deleted messages can be filled in
+MESSAGE_HANDLER_GROUP = -2
+# Channel and supergroup IDs are all below this
+CHANNEL_ID_LIMIT = -1000000000000
+
+
+class MessageCache(Base):
+    """Keeps the latest messages of every chat to save refetching them.
+
+    Each chat holds up to message_cache_chat_size messages in arrival
+    order, pickled and compressed so they're compact and easy to account
+    for. All chats together stay under message_cache_size MiB by dropping
+    messages from the least recently active chat first. Deleted messages
+    are handed to message_delete listeners with their cached content."""
+
+    # Chat ID -> message ID -> pickled message, least recently active first
+    message_cache: "OrderedDict[int, OrderedDict[int, bytes]]"
+    message_cache_bytes: int
+    # "hits" and "misses" of get_messages()
+    message_cache_stats: Counter
+
+    def __init__(self: "Bot", **kwargs: Any) -> None:
+        self.message_cache = OrderedDict()
+        self.message_cache_bytes = 0
+        self.message_cache_stats = Counter()
+
+        super().__init__(**kwargs)
+
+    def add_message_handlers(self: "Bot") -> None:
+        if self.getConfig.message_cache_size <= 0:
+            return
+
+        self.client.add_handler(MessageHandler(self.on_cache_message),
+                                MESSAGE_HANDLER_GROUP)
+        self.client.add_handler(DeletedMessagesHandler(self.on_cache_delete),
+                                MESSAGE_HANDLER_GROUP)
+
+    def cache_message(self: "Bot", msg: pyrogram.types.Message) -> None:
+        if msg.empty or msg.chat is None:
+            return
+
+        try:
+            # Attribute names repeat a lot, which halves the size for ~20 us
+            data = zlib.compress(pickle.dumps(msg, pickle.HIGHEST_PROTOCOL), 1)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return
+
+        chat = self.message_cache.get(msg.chat.id)
+        if chat is None:
+            chat = self.message_cache[msg.chat.id] = OrderedDict()
+        else:
+            self.message_cache.move_to_end(msg.chat.id)
+
+        old = chat.pop(msg.message_id, None)
+        if old is not None:
+            self.message_cache_bytes -= len(old)
+        chat[msg.message_id] = data
+        self.message_cache_bytes += len(data)
+
+        if len(chat) > self.getConfig.message_cache_chat_size:
+            _, dropped = chat.popitem(last=False)
+            self.message_cache_bytes -= len(dropped)
+
+        limit = self.getConfig.message_cache_size * 1024 * 1024
+        while self.message_cache_bytes > limit and self.message_cache:
+            chat_id, oldest = next(iter(self.message_cache.items()))
+            _, dropped = oldest.popitem(last=False)
+            self.message_cache_bytes -= len(dropped)
+            if not oldest:
+                del self.message_cache[chat_id]
+
+    def _load_message(self: "Bot", data: bytes) -> pyrogram.types.Message:
+        msg = pickle.loads(zlib.decompress(data))
+        util.tg.bind_client(msg, self.client)
+        return msg
+
+    def cached_message(self: "Bot", chat_id: int,
+                       message_id: int) -> Optional[pyrogram.types.Message]:
+        chat = self.message_cache.get(chat_id)
+        data = chat.get(message_id) if chat is not None else None
+        return self._load_message(data) if data is not None else None
+
+    def pop_cached_message(self: "Bot", chat_id: Optional[int],
+                           message_id: int) -> Optional[pyrogram.types.Message]:
+        """Removes a message from the cache and returns it.
+
+        Telegram leaves out the chat when messages outside of channels are
+        deleted, but their IDs are unique across those chats."""
+
+        if chat_id is None:
+            chat_id = next((cid for cid, chat in self.message_cache.items()
+                            if cid > CHANNEL_ID_LIMIT and message_id in chat),
+                           None)
+        chat = self.message_cache.get(chat_id)
+        if chat is None or message_id not in chat:
+            return None
+
+        data = chat.pop(message_id)
+        self.message_cache_bytes -= len(data)
+        if not chat:
+            del self.message_cache[chat_id]
+
+        return self._load_message(data)
+
+    async def get_messages(
+        self: "Bot", chat_id: Union[int, str],
+        message_ids: Union[int, Iterable[int]]
+    ) -> Union[Optional[pyrogram.types.Message], List[pyrogram.types.Message]]:
+        """Like Client.get_messages(), but only fetches what isn't cached."""
+
+        single = isinstance(message_ids, int)
+        ids = [message_ids] if single else list(message_ids)
+
+        found = {}
+        if isinstance(chat_id, int):
+            for message_id in ids:
+                msg = self.cached_message(chat_id, message_id)
+                if msg is not None:
+                    found[message_id] = msg
+
+        missing = [message_id for message_id in ids if message_id not in found]
+        self.message_cache_stats["hits"] += len(found)
+        self.message_cache_stats["misses"] += len(missing)
+        if missing:
+            for msg in await self.client.get_messages(chat_id, missing):
+                found[msg.message_id] = msg
+                self.cache_message(msg)
+
+        results = [found[msg_id] for msg_id in ids if msg_id in found]
+        if single:
+            return results[0] if results else None
+
+        return results
+
+    async def on_cache_message(self: "Bot", _: pyrogram.Client,
+                               msg: pyrogram.types.Message) -> None:
+        self.cache_message(msg)
+
+    async def on_cache_delete(self: "Bot", _: pyrogram.Client,
+                              messages: List[pyrogram.types.Message]) -> None:
+        # Later handlers get the same list, so swap in what we know
+        for idx, msg in enumerate(messages):
+            chat_id = msg.chat.id if msg.chat else None
+            cached = self.pop_cached_message(chat_id, msg.message_id)
+            if cached is not None:
+                messages[idx] = cached
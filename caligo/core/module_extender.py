@@ -1,10 +1,26 @@
+import asyncio
 import importlib
-import inspect
+import re
+import sys
 from types import ModuleType
-from typing import TYPE_CHECKING, Any, Iterable, MutableMapping, Optional, Type
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    List,
+    MutableMapping,
+    Optional,
+    Tuple,
+    Type,
+)
 
-from .. import module, modules, util
+from pyrogram import filters
+
+from .. import listener, module, modules, util
+from . import manifest
 from .base import Base
+from .event_dispatcher import LIFECYCLE_EVENTS
 
 if TYPE_CHECKING:
     from .bot import Bot
@@ -13,12 +29,82 @@ if TYPE_CHECKING:
 class ModuleExtender(Base):
     # Initialized during instantiation
     modules: MutableMapping[str, module.Module]
+    # Module name -> phase -> (offset from init, duration), in microseconds
+    module_timings: Dict[str, Dict[str, Tuple[int, int]]]
 
     def __init__(self: "Bot", **kwargs: Any) -> None:
         self.modules = {}
+        self.module_timings = {}
 
         super().__init__(**kwargs)
 
+    def record_timing(self: "Bot", name: str, phase: str, start: int) -> None:
+        self.module_timings.setdefault(name, {})[phase] = (
+            start - self.init_time_us,
+            util.time.usec() - start,
+        )
+
+    def module_levels(self: "Bot") -> List[List[module.Module]]:
+        """Groups loaded modules so each group only depends on earlier ones."""
+
+        pending = {
+            name: {
+                dep for dep in mod.dependencies
+                if dep in self.modules and dep != name
+            } for name, mod in self.modules.items()
+        }
+
+        levels = []
+        while pending:
+            ready = [name for name, deps in pending.items() if not deps]
+            if not ready:
+                self.log.warning("Circular module dependencies between: " +
+                                 ", ".join(pending))
+                ready = list(pending)
+
+            levels.append([self.modules[name] for name in ready])
+            for name in ready:
+                del pending[name]
+            for deps in pending.values():
+                deps.difference_update(ready)
+
+        return levels
+
+    async def dispatch_module_event(self: "Bot",
+                                    event: str,
+                                    *args: Any,
+                                    reverse: bool = False) -> None:
+        """Dispatches a lifecycle event in dependency order.
+
+        Modules without dependencies between them run concurrently, and the
+        time each listener takes is recorded for the startup timeline. With
+        reverse, dependents run before their dependencies, as for shutdown."""
+
+        listeners = {
+            lst.module: lst for lst in self.listeners.get(event, [])
+        }
+
+        async def run(lst: listener.Listener) -> None:
+            start = util.time.usec()
+            try:
+                await lst.func(*args)
+            except Exception as e:  # skipcq: PYL-W0703
+                lst.module.log.error(f"Error in '{event}' listener",
+                                     exc_info=e)
+            finally:
+                self.record_timing(lst.module.name, event, start)
+
+        levels = self.module_levels()
+        if reverse:
+            levels.reverse()
+
+        for level in levels:
+            # Earlier levels may have unloaded some modules
+            await asyncio.gather(*(run(listeners[mod])
+                                   for mod in level
+                                   if mod in listeners and
+                                   self.modules.get(mod.name) is mod))
+
     def load_module(self: "Bot",
                     cls: Type[module.Module],
                     *,
@@ -29,35 +115,278 @@ class ModuleExtender(Base):
             old = type(self.modules[cls.name])
             raise module.ExistingModuleError(old, cls)
 
+        start = util.time.usec()
         mod = cls(self)
         mod.comment = comment
         self.register_listeners(mod)
         self.register_commands(mod)
         self.modules[cls.name] = mod
+        self.record_timing(cls.name, "construct", start)
+
+    def load_lazy_module(self: "Bot", submodule: str,
+                         info: Dict[str, Any]) -> None:
+        stub = module.LazyModule(self, submodule, info)
+        self.log.info(f"Deferring {stub!r}")
+
+        if stub.name in self.modules:
+            raise module.ModuleLoadError(
+                f"Module '{stub.name}' already exists")
+
+        for cmd in info["commands"]:
+            func = self._lazy_func(stub, cmd["func"])
+            setattr(func, "_cmd_description", cmd["desc"])
+            setattr(func, "_cmd_usage", cmd["usage"])
+            setattr(func, "_cmd_usage_optional", cmd["usage_optional"])
+            setattr(func, "_cmd_usage_reply", cmd["usage_reply"])
+            setattr(func, "_cmd_aliases", tuple(cmd["aliases"]))
+            if cmd["pattern"] is not None:
+                setattr(func, "_cmd_pattern", re.compile(*cmd["pattern"]))
+
+            self.register_command(stub, cmd["name"], func)
+
+        for lst in info["listeners"]:
+            # Lifecycle events are replayed when the module is imported
+            if lst["event"] in LIFECYCLE_EVENTS:
+                continue
+
+            pattern = None
+            if lst["pattern"] is not None:
+                pattern = re.compile(*lst["pattern"])
+
+            self.register_listener(
+                stub,
+                lst["event"],
+                self._lazy_func(stub, lst["func"]),
+                priority=lst["priority"],
+                regex=filters.regex(pattern) if pattern else None,
+                pattern=pattern,
+                timeout=lst.get("timeout"),
+            )
+
+        self.modules[stub.name] = stub
+
+    def _lazy_func(self: "Bot", stub: module.LazyModule,
+                   sym: str) -> listener.ListenerFunc:
+
+        async def func(*args: Any, **kwargs: Any) -> Any:
+            mod = await self.materialize(stub)
+            if mod is None:
+                return None
+
+            return await getattr(mod, sym)(*args, **kwargs)
+
+        return func
+
+    async def materialize(
+            self: "Bot", stub: module.LazyModule) -> Optional[module.Module]:
+        """Imports and loads the real module behind a lazy one."""
+
+        if stub.task is None:
+            stub.task = self.loop.create_task(self._materialize(stub))
+
+        return await asyncio.shield(stub.task)
+
+    async def _materialize(
+            self: "Bot", stub: module.LazyModule) -> Optional[module.Module]:
+        before = util.time.usec()
+
+        for dep in stub.dependencies:
+            await self.get_module(dep)
+
+        self.unload_module(stub)
+        try:
+            submodule = self._import_submodule(stub.submodule)
+            cls = getattr(submodule, stub.symbol)
+            self.load_module(cls, comment=stub.comment)
+        except Exception as e:  # skipcq: PYL-W0703
+            self.log.error(f"Failed to load {stub!r}", exc_info=e)
+            return None
+
+        # Catch up on the lifecycle events the rest of the bot already had
+        mod = self.modules[cls.name]
+        events = ["load"]
+        if hasattr(self, "start_time_us"):
+            events += ["start", "started"]
+        await self._replay_events(mod, events)
+
+        after = util.time.usec()
+        self.log.info(f"Loaded {cls.format_desc(stub.comment)} on first use "
+                      f"in {util.time.format_duration_us(after - before)}")
+
+        return self.modules.get(mod.name)
+
+    async def get_module(self: "Bot", name: str) -> Optional[module.Module]:
+        """Returns a loaded module by name, importing it first if it's lazy."""
+
+        mod = self.modules.get(name)
+        if isinstance(mod, module.LazyModule):
+            mod = await self.materialize(mod)
+
+        return mod
 
     def unload_module(self: "Bot", mod: module.Module) -> None:
-        cls = type(mod)
-        self.log.info(f"Unloading {mod.format_desc(mod.comment)}")
+        if isinstance(mod, module.LazyModule):
+            self.log.info(f"Unloading {mod!r}")
+        else:
+            self.log.info(f"Unloading {mod.format_desc(mod.comment)}")
 
         self.unregister_listeners(mod)
         self.unregister_commands(mod)
-        del self.modules[cls.name]
+        del self.modules[mod.name]
+
+    async def reload_module(self: "Bot", name: str) -> List[module.Module]:
+        """Reimports the file a single module lives in and swaps it in place.
+
+        Every loaded module from that file is replaced. State listed in
+        reload_state is handed over to the new instance; modules without
+        any are stopped and go through their lifecycle again. The old
+        instance is kept if the file fails to import or load."""
+
+        mod = self.modules[name]
+        if isinstance(mod, module.LazyModule):
+            # Not imported yet, so the file will be read fresh anyway
+            mod = await self.materialize(mod)
+            return [mod] if mod is not None else []
+
+        # On the loop thread like _import_submodule(), so nothing is
+        # dispatched to the old classes while the file's top level runs
+        start = util.time.usec()
+        submodule = importlib.reload(sys.modules[type(mod).__module__])
+        classes = [cls for _, cls in manifest.find_module_classes(submodule)]
+        for cls in classes:
+            self.record_timing(cls.name, "import", start)
+
+        reloaded = []
+        for cls in classes:
+            old = self.modules.get(cls.name)
+            if old is None or isinstance(old, module.LazyModule):
+                continue
+
+            reloaded.append(await self._swap_module(old, cls))
+
+        self._update_manifest([submodule], manifest.read())
+        return reloaded
+
+    async def _swap_module(self: "Bot", old: module.Module,
+                           cls: Type[module.Module]) -> module.Module:
+        state = await old.save_state()
+        if not state and hasattr(old, "on_stop"):
+            await old.on_stop()
+
+        self.unload_module(old)
+        try:
+            self.load_module(cls, comment=old.comment)
+        except Exception:
+            # Put the old instance back exactly as it was
+            self.register_listeners(old)
+            self.register_commands(old)
+            self.modules[old.name] = old
+            if state:
+                await old.restore_state(state)
+            else:
+                await self._replay_events(old, ["start", "started"])
+            raise
+
+        mod = self.modules[cls.name]
+        if state:
+            start = util.time.usec()
+            await mod.restore_state(state)
+            self.record_timing(mod.name, "restore", start)
+        else:
+            await self._replay_events(mod, ["load", "start", "started"])
+
+        return mod
+
+    async def _replay_events(self: "Bot", mod: module.Module,
+                             events: Iterable[str]) -> None:
+        """Runs lifecycle listeners of a single module that missed them."""
+
+        for event in events:
+            func = getattr(mod, "on_" + event, None)
+            # The module may unload itself, e.g. when it's not configured
+            if func is None or self.modules.get(mod.name) is not mod:
+                continue
+
+            args = (util.time.usec(),) if event == "start" else ()
+            start = util.time.usec()
+            await func(*args)
+            self.record_timing(mod.name, event, start)
+
+    def _import_submodule(self: "Bot", name: str) -> ModuleType:
+        start = util.time.usec()
+        submodule = modules.import_submodule(name)
+        for _, cls in manifest.find_module_classes(submodule):
+            self.record_timing(cls.name, "import", start)
+
+        return submodule
 
     def _load_all_from_metamod(self: "Bot",
                                submodules: Iterable[ModuleType],
                                *,
                                comment: str = None) -> None:
         for module_mod in submodules:
-            for sym in dir(module_mod):
-                cls = getattr(module_mod, sym)
-                if (inspect.isclass(cls) and issubclass(cls, module.Module)
-                        and not cls.disabled):
-                    self.load_module(cls, comment=comment)
+            for _, cls in manifest.find_module_classes(module_mod):
+                self.load_module(cls, comment=comment)
+
+    def _load_all_lazy(self: "Bot") -> None:
+        cached = manifest.read()
+
+        to_import = []
+        for name in modules.names:
+            entry = cached.get(name)
+            path = modules.submodule_path(name)
+            if entry is None or entry["stamp"] != manifest.file_stamp(path):
+                to_import.append(name)
+                continue
+
+            if not all(manifest.is_lazy(info) for info in entry["modules"]):
+                to_import.append(name)
+                continue
+
+            for info in entry["modules"]:
+                self.load_lazy_module(name, info)
+
+        submodules = [self._import_submodule(name) for name in to_import]
+        self._load_all_from_metamod(submodules)
+        self._update_manifest(submodules, cached)
+
+    def _update_manifest(self: "Bot",
+                         submodules: Iterable[ModuleType],
+                         cached: Optional[Dict[str, Any]] = None) -> None:
+        updated = dict(cached) if cached is not None else {}
+        for submodule in submodules:
+            name = submodule.__name__.rsplit(".", 1)[-1]
+            entry = updated.get(name)
+            # Unchanged files keep their description, starts needn't pay for it
+            if entry is not None and entry["stamp"] == manifest.file_stamp(
+                    submodule.__file__):
+                continue
+
+            updated[name] = manifest.describe_submodule(submodule)
+
+        if updated != cached:
+            try:
+                manifest.write(updated)
+            except OSError as e:
+                self.log.warning(f"Unable to write module manifest: {e}")
 
     def load_all_modules(self: "Bot") -> None:
         self.log.info("Loading modules")
-        self._load_all_from_metamod(modules.submodules)
-        self.log.info("All modules loaded.")
+        before = util.time.usec()
+
+        if self.getConfig.lazy_modules:
+            self._load_all_lazy()
+        else:
+            submodules = [
+                self._import_submodule(name) for name in modules.names
+            ]
+            self._load_all_from_metamod(submodules)
+            # Keep the manifest warm for the next start in lazy mode
+            self._update_manifest(submodules, manifest.read())
+
+        after = util.time.usec()
+        self.log.info("All modules loaded in "
+                      f"{util.time.format_duration_us(after - before)}.")
 
     def unload_all_modules(self: "Bot") -> None:
         self.log.info("Unloading modules...")
@@ -0,0 +1,262 @@
+import asyncio
+import base64
+import logging
+import struct
+import time
+from typing import Any, Dict, Optional, Sequence, Set, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReplaceOne
+from pyrogram.storage import Storage
+from pyrogram.storage.sqlite_storage import get_input_peer
+
+log = logging.getLogger("Storage")
+
+# Seconds between writes of buffered changes to the database
+FLUSH_INTERVAL = 10
+
+SESSION_FIELDS = ("dc_id", "test_mode", "auth_key", "date", "user_id",
+                  "is_bot")
+
+# ID, access hash, type, username, phone number, last update
+Peer = Tuple[int, int, str, Optional[str], Optional[str], int]
+
+
+class MongoStorage(Storage):
+    """Pyrogram session storage kept in the bot's database.
+
+    Everything is read into memory when the client starts, so resolving a
+    peer never waits on the database. Changes are buffered and written in
+    one batch every FLUSH_INTERVAL seconds and when the client stops."""
+
+    USERNAME_TTL = 8 * 60 * 60
+
+    db: AsyncIOMotorDatabase
+    session_string: Optional[str]
+
+    session: Dict[str, Any]
+    peers: Dict[int, Peer]
+    usernames: Dict[str, int]
+    phone_numbers: Dict[str, int]
+
+    dirty_session: bool
+    dirty_peers: Set[int]
+    lock: asyncio.Lock
+    task: Optional[asyncio.Task]
+
+    def __init__(self,
+                 name: str,
+                 db: AsyncIOMotorDatabase,
+                 session_string: Optional[str] = None) -> None:
+        super().__init__(name)
+
+        self.db = db
+        self.session_string = session_string
+
+        self.session = {}
+        self.peers = {}
+        self.usernames = {}
+        self.phone_numbers = {}
+
+        self.dirty_session = False
+        self.dirty_peers = set()
+        self.lock = asyncio.Lock()
+        self.task = None
+
+    def _peer_id(self, peer_id: int) -> str:
+        return f"{self.name}:{peer_id}"
+
+    async def open(self) -> None:
+        sessions = self.db.get_collection("sessions")
+        peers = self.db.get_collection("peers")
+
+        doc = await sessions.find_one({"_id": self.name})
+        if doc is None:
+            doc = {"dc_id": 2, "date": 0}
+            self.dirty_session = True
+        self.session = {field: doc.get(field) for field in SESSION_FIELDS}
+
+        if self.session_string is not None:
+            await self._import_session_string(self.session_string)
+
+        await peers.create_index("session")
+        async for peer in peers.find({"session": self.name}):
+            self._add_peer(peer["id"], peer["access_hash"], peer["type"],
+                           peer["username"], peer["phone_number"],
+                           peer["last_update_on"])
+
+        log.info(f"Loaded session '{self.name}' with {len(self.peers)} peers")
+        self.task = asyncio.get_event_loop().create_task(self._flush_loop())
+
+    async def _import_session_string(self, session_string: str) -> None:
+        """Takes over an exported session unless it's the one stored."""
+
+        dc_id, test_mode, auth_key, user_id, is_bot = struct.unpack(
+            self.SESSION_STRING_FORMAT,
+            base64.urlsafe_b64decode(session_string +
+                                     "=" * (-len(session_string) % 4)))
+        if auth_key == self.session["auth_key"]:
+            return
+
+        if user_id != self.session["user_id"]:
+            # Peers and their access hashes belong to the old account
+            await self.db.get_collection("peers").delete_many(
+                {"session": self.name})
+
+        self.session.update(dc_id=dc_id,
+                            test_mode=test_mode,
+                            auth_key=auth_key,
+                            date=0,
+                            user_id=user_id,
+                            is_bot=is_bot)
+        self.dirty_session = True
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except Exception as e:  # skipcq: PYL-W0703
+                log.error(f"Error saving session '{self.name}'", exc_info=e)
+
+    async def flush(self) -> None:
+        """Writes buffered session and peer changes to the database."""
+
+        async with self.lock:
+            if self.dirty_session:
+                self.dirty_session = False
+                try:
+                    await self.db.get_collection("sessions").replace_one(
+                        {"_id": self.name}, self.session, upsert=True)
+                except Exception:
+                    self.dirty_session = True
+                    raise
+
+            if not self.dirty_peers:
+                return
+
+            requests = []
+            for peer_id in self.dirty_peers:
+                (peer_id, access_hash, peer_type, username, phone_number,
+                 last_update_on) = self.peers[peer_id]
+                doc = {
+                    "session": self.name,
+                    "id": peer_id,
+                    "access_hash": access_hash,
+                    "type": peer_type,
+                    "username": username,
+                    "phone_number": phone_number,
+                    "last_update_on": last_update_on,
+                }
+                requests.append(
+                    ReplaceOne({"_id": self._peer_id(peer_id)},
+                               doc,
+                               upsert=True))
+
+            pending, self.dirty_peers = self.dirty_peers, set()
+            try:
+                await self.db.get_collection("peers").bulk_write(
+                    requests, ordered=False)
+            except Exception:
+                # Try again on the next flush
+                self.dirty_peers |= pending
+                raise
+
+    async def save(self) -> None:
+        await self.date(int(time.time()))
+        await self.flush()
+
+    async def close(self) -> None:
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+        await self.flush()
+
+    async def delete(self) -> None:
+        self.session = {}
+        self.peers.clear()
+        self.usernames.clear()
+        self.phone_numbers.clear()
+        self.dirty_session = False
+        self.dirty_peers.clear()
+
+        await self.db.get_collection("sessions").delete_one({"_id": self.name})
+        await self.db.get_collection("peers").delete_many(
+            {"session": self.name})
+
+    def _add_peer(self, peer_id: int, access_hash: int, peer_type: str,
+                  username: Optional[str], phone_number: Optional[str],
+                  last_update_on: int) -> None:
+        old = self.peers.get(peer_id)
+        if old is not None:
+            if old[3] is not None and old[3] != username:
+                self.usernames.pop(old[3], None)
+            if old[4] is not None and old[4] != phone_number:
+                self.phone_numbers.pop(old[4], None)
+
+        self.peers[peer_id] = (peer_id, access_hash, peer_type, username,
+                               phone_number, last_update_on)
+        if username is not None:
+            self.usernames[username] = peer_id
+        if phone_number is not None:
+            self.phone_numbers[phone_number] = peer_id
+
+    async def update_peers(
+            self, peers: Sequence[Tuple[int, int, str, str, str]]) -> None:
+        now = int(time.time())
+        for peer in peers:
+            self._add_peer(*peer, now)
+            self.dirty_peers.add(peer[0])
+
+    async def get_peer_by_id(self, peer_id: int) -> Any:
+        peer = self.peers.get(peer_id)
+        if peer is None:
+            raise KeyError(f"ID not found: {peer_id}")
+
+        return get_input_peer(*peer[:3])
+
+    async def get_peer_by_username(self, username: str) -> Any:
+        peer = self.peers.get(self.usernames.get(username))
+        if peer is None:
+            raise KeyError(f"Username not found: {username}")
+
+        if abs(time.time() - peer[5]) > self.USERNAME_TTL:
+            raise KeyError(f"Username expired: {username}")
+
+        return get_input_peer(*peer[:3])
+
+    async def get_peer_by_phone_number(self, phone_number: str) -> Any:
+        peer = self.peers.get(self.phone_numbers.get(phone_number))
+        if peer is None:
+            raise KeyError(f"Phone number not found: {phone_number}")
+
+        return get_input_peer(*peer[:3])
+
+    def _accessor(self, field: str, value: Any) -> Any:
+        if value is object:
+            return self.session.get(field)
+
+        if self.session.get(field) != value:
+            self.session[field] = value
+            self.dirty_session = True
+
+        return None
+
+    async def dc_id(self, value: int = object) -> Optional[int]:
+        return self._accessor("dc_id", value)
+
+    async def test_mode(self, value: bool = object) -> Optional[bool]:
+        return self._accessor("test_mode", value)
+
+    async def auth_key(self, value: bytes = object) -> Optional[bytes]:
+        return self._accessor("auth_key", value)
+
+    async def date(self, value: int = object) -> Optional[int]:
+        return self._accessor("date", value)
+
+    async def user_id(self, value: int = object) -> Optional[int]:
+        return self._accessor("user_id", value)
+
+    async def is_bot(self, value: bool = object) -> Optional[bool]:
+        return self._accessor("is_bot", value)
@@ -1,6 +1,7 @@
-from typing import Dict, List, Optional, Set, Union
+import functools
+from typing import List, Optional, Union
 
-from pyrogram import Client, types
+from pyrogram import types
 from pyrogram.errors import (
     MessageAuthorRequired,
     MessageDeleteForbidden,
@@ -8,45 +9,42 @@ from pyrogram.errors import (
     MessageNotModified,
 )
 
-_CANCEL_SET: Set[int] = set()
+from ..scheduler import edit_content
 
 # Inspired from Userge
 
 
 class Message(types.Message):
+    """Command view over a received message.
 
-    def __init__(self, client: Client, segments: List[Optional[str]],
-                 mvars: Dict[str, object], **kwargs):
-        self._process_canceled = False
-        self._kwargs = kwargs
-        self._client = client
-        self.segments = segments
-        super().__init__(client=client, **mvars)
+    Instead of rebuilding the message, the view takes a shallow copy of
+    the original object's attribute dict, so creating one costs the same
+    no matter how deep its reply chain is, and setting segments or
+    message_id on it leaves the cached original alone. Replies are
+    wrapped lazily when accessed."""
+
+    segments: Optional[List[str]]
+
+    def __init__(self, *args, **kwargs):  # skipcq: PYL-W0231
+        raise TypeError("Use Message.view() to wrap an existing message")
 
     @classmethod
-    def _parse(cls, msg: types.Message, **kwargs):
-        mvars = vars(msg)
-        segments = mvars.get("segments")
-        client = msg._client
-        for _key in ["segments", "_client", "_process_canceled", "_kwargs"]:
-            mvars.pop(_key, None)
-
-        if mvars["reply_to_message"]:
-            mvars["reply_to_message"] = cls._parse(mvars["reply_to_message"],
-                                                   **kwargs)
-        return cls(client=client, segments=segments, mvars=mvars, **kwargs)
+    def view(cls, msg: types.Message) -> "Message":
+        if msg is None or isinstance(msg, cls):
+            return msg
+
+        self = object.__new__(cls)
+        self.__dict__ = msg.__dict__.copy()
+        self.__dict__.setdefault("segments", None)
+        return self
 
     @property
-    def process_is_canceled(self) -> bool:
-        """Returns True if process canceled"""
-        if self.message_id in _CANCEL_SET:
-            _CANCEL_SET.remove(self.message_id)
-            self._process_canceled = True
-        return self._process_canceled
+    def reply_to_message(self) -> Optional["Message"]:
+        return self.view(self.__dict__.get("reply_to_message"))
 
-    def cancel_the_process(self) -> None:
-        """Set True to the self.process_is_canceled"""
-        _CANCEL_SET.add(self.message_id)
+    @reply_to_message.setter
+    def reply_to_message(self, value: Optional[types.Message]) -> None:
+        self.__dict__["reply_to_message"] = value
 
     async def edit(
         self,
@@ -57,16 +55,26 @@ class Message(types.Message):
         reply_markup: "types.InlineKeyboardMarkup" = None,
         sudo: bool = True,
     ) -> "Message":
+        call = functools.partial(
+            self._client.edit_message_text,
+            chat_id=self.chat.id,
+            message_id=self.message_id,
+            text=text,
+            parse_mode=parse_mode,
+            entities=entities,
+            disable_web_page_preview=disable_web_page_preview,
+            reply_markup=reply_markup,
+        )
         try:
-            return await self._client.edit_message_text(
-                chat_id=self.chat.id,
-                message_id=self.message_id,
-                text=text,
-                parse_mode=parse_mode,
-                entities=entities,
-                disable_web_page_preview=disable_web_page_preview,
-                reply_markup=reply_markup,
-            )
+            scheduler = getattr(self._client, "scheduler", None)
+            if scheduler is None:
+                return await call()
+
+            result = await scheduler.edit(self.chat.id,
+                                          (self.chat.id, self.message_id),
+                                          edit_content(text, reply_markup),
+                                          call)
+            return self if result is None else result
         except MessageNotModified:
             return self
         except (MessageAuthorRequired, MessageIdInvalid):
@@ -97,7 +105,9 @@ class Message(types.Message):
             quote = self.chat.type != "private"
         if reply_to_message_id is None and quote:
             reply_to_message_id = self.message_id
-        return await self._client.send_message(
+
+        call = functools.partial(
+            self._client.send_message,
             chat_id=self.chat.id,
             text=text,
             parse_mode=parse_mode,
@@ -106,6 +116,11 @@ class Message(types.Message):
             reply_to_message_id=reply_to_message_id,
             reply_markup=reply_markup,
         )
+        scheduler = getattr(self._client, "scheduler", None)
+        if scheduler is None:
+            return await call()
+
+        return await scheduler.send(self.chat.id, call)
 
     reply_text = reply
 
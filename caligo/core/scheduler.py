@@ -0,0 +1,217 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Optional,
+    TypeVar,
+)
+
+from pyrogram.errors import FloodWait
+
+log = logging.getLogger("Scheduler")
+
+Result = TypeVar("Result")
+
+# Requests per second and burst size for a single chat and the whole account
+CHAT_RATE = 1.0
+CHAT_BURST = 3
+GLOBAL_RATE = 20.0
+GLOBAL_BURST = 30
+# Messages whose last sent text is remembered to skip identical edits
+SENT_TEXT_SIZE = 1024
+# Idle buckets are dropped once there are this many
+BUCKET_PRUNE_SIZE = 1024
+
+
+def edit_content(text: str, reply_markup: Any = None) -> Hashable:
+    """Returns the key Scheduler.edit compares to skip identical edits."""
+
+    return text, str(reply_markup) if reply_markup is not None else None
+
+
+class TokenBucket:
+    """Spaces out requests to a steady rate while allowing short bursts.
+
+    Tokens may go negative: each take() reserves the next free slot and
+    returns how long to wait for it, so waiters are served in order."""
+
+    rate: float
+    burst: int
+    tokens: float
+    updated: float
+
+    def __init__(self, rate: float, burst: int) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = asyncio.get_event_loop().time()
+
+    def _refill(self) -> None:
+        now = asyncio.get_event_loop().time()
+        self.tokens = min(self.burst,
+                          self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    @property
+    def full(self) -> bool:
+        self._refill()
+        return self.tokens >= self.burst
+
+    def take(self) -> float:
+        self._refill()
+        self.tokens -= 1
+        return max(0, -self.tokens / self.rate)
+
+
+class PendingEdit:
+    content: Hashable
+    call: Callable[[], Awaitable[Any]]
+    future: asyncio.Future
+
+    def __init__(self, content: Hashable,
+                 call: Callable[[], Awaitable[Any]]) -> None:
+        self.content = content
+        self.call = call
+        self.future = asyncio.get_event_loop().create_future()
+
+
+class Scheduler:
+    """Paces every message a client sends or edits.
+
+    Each chat and the account as a whole have their own token bucket. An
+    edit queued behind another edit of the same message replaces it, and
+    edits that wouldn't change anything are skipped. A FloodWait pauses
+    everything until it's over instead of only the request that hit it."""
+
+    chat_buckets: Dict[Hashable, TokenBucket]
+    global_bucket: TokenBucket
+    flood_until: float
+
+    # Message key -> edit waiting for its turn
+    pending_edits: Dict[Hashable, PendingEdit]
+    # Message key -> content of the last edit sent, least recent first
+    sent: "OrderedDict[Hashable, Hashable]"
+
+    queued: int
+    edits_saved: int
+
+    def __init__(self) -> None:
+        self.chat_buckets = {}
+        self.global_bucket = TokenBucket(GLOBAL_RATE, GLOBAL_BURST)
+        self.flood_until = 0
+
+        self.pending_edits = {}
+        self.sent = OrderedDict()
+
+        self.queued = 0
+        self.edits_saved = 0
+
+    def _chat_bucket(self, chat: Hashable) -> TokenBucket:
+        bucket = self.chat_buckets.get(chat)
+        if bucket is None:
+            if len(self.chat_buckets) >= BUCKET_PRUNE_SIZE:
+                self.chat_buckets = {
+                    key: value
+                    for key, value in self.chat_buckets.items()
+                    if not value.full
+                }
+
+            bucket = self.chat_buckets[chat] = TokenBucket(
+                CHAT_RATE, CHAT_BURST)
+
+        return bucket
+
+    async def _wait_turn(self, chat: Hashable) -> None:
+        await asyncio.sleep(self._chat_bucket(chat).take())
+        await asyncio.sleep(self.global_bucket.take())
+
+        loop = asyncio.get_event_loop()
+        while loop.time() < self.flood_until:
+            await asyncio.sleep(self.flood_until - loop.time())
+
+    async def _call(self, call: Callable[[], Awaitable[Result]]) -> Result:
+        loop = asyncio.get_event_loop()
+        while True:
+            try:
+                return await call()
+            except FloodWait as e:
+                log.warning(f"Flood wait of {e.x} seconds, pausing requests")
+                self.flood_until = max(self.flood_until, loop.time() + e.x)
+                await asyncio.sleep(self.flood_until - loop.time())
+
+    async def send(self, chat: Hashable,
+                   call: Callable[[], Awaitable[Result]]) -> Result:
+        """Runs a request that sends something to a chat once it's due."""
+
+        self.queued += 1
+        try:
+            await self._wait_turn(chat)
+        finally:
+            self.queued -= 1
+
+        return await self._call(call)
+
+    async def edit(self, chat: Hashable, key: Hashable, content: Hashable,
+                   call: Callable[[], Awaitable[Result]]) -> Optional[Result]:
+        """Runs an edit of the message identified by key once it's due.
+
+        Returns None without sending anything if content matches what the
+        message already shows. An edit replaced by a newer one before it
+        was sent returns the result of the newer one, or sends it again if
+        the newer one's caller is cancelled before it goes out."""
+
+        pending = self.pending_edits.get(key)
+        if pending is not None:
+            pending.content = content
+            pending.call = call
+            self.edits_saved += 1
+            try:
+                return await asyncio.shield(pending.future)
+            except asyncio.CancelledError:
+                if not pending.future.cancelled():
+                    raise
+
+                # The edit this was folded into was given up, send it anew
+                return await self.edit(chat, key, content, call)
+
+        if self.sent.get(key) == content:
+            self.edits_saved += 1
+            return None
+
+        pending = self.pending_edits[key] = PendingEdit(content, call)
+        try:
+            self.queued += 1
+            try:
+                await self._wait_turn(chat)
+            finally:
+                self.queued -= 1
+                del self.pending_edits[key]
+
+            if self.sent.get(key) == pending.content:
+                self.edits_saved += 1
+                result = None
+            else:
+                result = await self._call(pending.call)
+                self.sent[key] = pending.content
+                self.sent.move_to_end(key)
+                if len(self.sent) > SENT_TEXT_SIZE:
+                    self.sent.popitem(last=False)
+        except Exception as e:
+            pending.future.set_exception(e)
+            # Only waiters that were coalesced into this edit see it
+            pending.future.exception()
+            raise
+        else:
+            pending.future.set_result(result)
+        finally:
+            # Cancelled in between, coalesced waiters will send it themselves
+            if not pending.future.done():
+                pending.future.cancel()
+
+        return result
+
@@ -1,4 +1,5 @@
 import asyncio
+import functools
 import signal
 from typing import TYPE_CHECKING, Any, Optional
 
@@ -11,10 +12,14 @@ from pyrogram.handlers import (
     MessageHandler,
 )
 from pyrogram.handlers.handler import Handler
+from pyrogram.storage import Storage
 
 from ..custom_filter import chat_action
-from ..util import BotConfig, tg, time
+from ..util import BotConfig, tg, ticker, time
 from .base import Base
+from .mongo_storage import MongoStorage
+from .raw import Message
+from .scheduler import Scheduler
 
 if TYPE_CHECKING:
     from .bot import Bot
@@ -29,6 +34,7 @@ class TelegramBot(Base):
     user: pyrogram.types.User
     uid: int
     start_time_us: int
+    init_time_us: int
 
     bot_user: pyrogram.types.User
     bot_uid: int
@@ -36,6 +42,7 @@ class TelegramBot(Base):
     def __init__(self: "Bot", **kwargs: Any) -> None:
         self.loaded = False
         self.getConfig = BotConfig()
+        self.init_time_us = time.usec()
 
         self._mevent_handlers = {}
 
@@ -52,25 +59,33 @@ class TelegramBot(Base):
 
         string_session = self.getConfig.string_session
 
-        if isinstance(string_session, str):
+        if string_session and len(string_session) < Storage.SESSION_STRING_SIZE:
+            # Name of a session file rather than an exported session
             mode = string_session
         else:
-            mode = ":memory:"
+            mode = MongoStorage("user", self.db, string_session or None)
         self.client = Client(api_id=api_id,
                              api_hash=api_hash,
                              session_name=mode)
+        # Sends and edits are paced by the account they go through
+        self.client.scheduler = Scheduler()
+        self.client.ticker = ticker.ProgressTicker(
+            self.getConfig.progress_interval, self.getConfig.progress_ttl)
 
         token = self.getConfig.token
         if token is not None:
             if not isinstance(token, str):
                 raise TypeError("BOT TOKEN must be a string")
 
+            # Keyed by bot ID so a token for another bot starts afresh
+            bot_id = token.split(":", 1)[0]
             self.client.bot = Client(
                 api_id=api_id,
                 api_hash=api_hash,
                 bot_token=token,
-                session_name=":memory:",
+                session_name=MongoStorage(f"bot_{bot_id}", self.db),
             )
+            self.client.bot.scheduler = Scheduler()
 
     async def start(self: "Bot") -> None:
         self.log.info("Starting")
@@ -94,32 +109,17 @@ class TelegramBot(Base):
                     upsert=True,
                 )
 
-        self.client.add_handler(
-            MessageHandler(
-                self.on_command,
-                filters=(self.command_predicate() & self.outgoing_flt()),
-            ),
-            0,
-        )
-
-        self.client.bot.add_handler(
-            MessageHandler(
-                self.on_command,
-                filters=(self.sudo_command_predicate()),
-                # & self.outgoing_flt()
-            ),
-            0,
-        )
-
-        self.client.add_handler(
-            MessageHandler(self.on_conversation,
-                           filters=self.conversation_predicate()),
-            0,
-        )
+        await self.init_entity_db()
+
+        self.client.add_handler(MessageHandler(self.on_update), 0)
+        self.add_entity_handlers()
+        self.add_message_handlers()
+        if self.has_bot:
+            self.client.bot.add_handler(MessageHandler(self.on_bot_update), 0)
 
         # Load modules
         self.load_all_modules()
-        await self.dispatch_event("load")
+        await self.dispatch_module_event("load")
         self.loaded = True
 
         await self.client.start()
@@ -142,10 +142,12 @@ class TelegramBot(Base):
             self.bot_uid = bot.id
 
         self.start_time_us = time.usec()
-        await self.dispatch_event("start", self.start_time_us)
+        await self.dispatch_module_event("start", self.start_time_us)
 
-        self.log.info("Bot is ready")
-        await self.dispatch_event("started")
+        ready_time = time.format_duration_us(time.usec() - self.init_time_us)
+        mode = "lazy" if self.getConfig.lazy_modules else "eager"
+        self.log.info(f"Bot is ready in {ready_time} ({mode} module loading)")
+        await self.dispatch_module_event("started")
 
     async def idle(self: "Bot") -> None:
 
@@ -272,6 +274,9 @@ class TelegramBot(Base):
         response: Optional[pyrogram.types.Message] = None,
         **kwargs: Any,
     ) -> pyrogram.types.Message:
+        # Go through the scheduler even for plain pyrogram messages
+        msg = Message.view(msg)
+        response = Message.view(response)
 
         if text is not None:
 
@@ -318,7 +323,8 @@ class TelegramBot(Base):
             # Repost since we haven't done so yet
             if kwargs.get("document"):
                 del kwargs["disable_web_page_preview"]
-                response = await msg.reply_document(**kwargs)
+                send = functools.partial(msg.reply_document, **kwargs)
+                response = await msg._client.scheduler.send(msg.chat.id, send)
             else:
                 response = await msg.reply(text,
                                            reply_to_message_id=msg.message_id,
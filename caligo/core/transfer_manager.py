@@ -0,0 +1,311 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import Counter
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    TypeVar,
+)
+
+import pyrogram
+
+from .. import util
+from .base import Base
+
+if TYPE_CHECKING:
+    from .bot import Bot
+
+Result = TypeVar("Result")
+
+
+class TransferJob:
+    """An upload, download, mirror or ytdl job known to the bot.
+
+    Jobs can be looked up by their ID, the (chat ID, message ID) of the
+    command that started them and their aria2 GID, whichever they have."""
+
+    id: int
+    kind: str
+    name: str
+    priority: int
+    # Weight of the job when splitting transfer_bandwidth
+    share: float
+    refs: Tuple[Hashable, ...]
+    progress: Optional[util.ticker.Transfer]
+
+    # "queued", "running", "cancelled" or "done"
+    state: str
+    ready: asyncio.Future
+    task: Optional[asyncio.Task]
+    on_cancel: Optional[Callable[[], Awaitable[Any]]]
+    on_limit: Optional[Callable[[float], Awaitable[Any]]]
+
+    # Bytes per second the job may use, 0 if unlimited
+    limit: float
+    current: int
+    mark_bytes: int
+    mark_time: float
+
+    created: float
+    started: Optional[float]
+
+    def __init__(self, job_id: int, kind: str, name: str, priority: int,
+                 share: float, refs: Tuple[Hashable, ...]) -> None:
+        self.id = job_id
+        self.kind = kind
+        self.name = name
+        self.priority = priority
+        self.share = share
+        self.refs = refs
+        self.progress = None
+
+        self.state = "queued"
+        self.ready = asyncio.get_event_loop().create_future()
+        self.task = None
+        self.on_cancel = None
+        self.on_limit = None
+
+        self.limit = 0
+        self.current = self.mark_bytes = 0
+        self.mark_time = time.monotonic()
+
+        self.created = time.monotonic()
+        self.started = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self.state == "cancelled"
+
+    def set_limit(self, limit: float) -> None:
+        if limit == self.limit:
+            return
+
+        self.limit = limit
+        self.mark_bytes, self.mark_time = self.current, time.monotonic()
+        if self.on_limit is not None:
+            asyncio.get_event_loop().create_task(self.on_limit(limit))
+
+    async def callback(self, current: int, total: int) -> None:
+        """Progress callback for pyrogram that keeps to the job's limit."""
+
+        self.current = current
+        if self.progress is not None:
+            self.progress.update(current, total)
+
+        if self.limit:
+            # Pyrogram waits for this before the next chunk
+            ahead = ((current - self.mark_bytes) / self.limit -
+                     (time.monotonic() - self.mark_time))
+            if ahead > 0:
+                await asyncio.sleep(ahead)
+
+
+class TransferManager(Base):
+    """Runs uploads and downloads under shared limits.
+
+    At most transfer_limit jobs run at once, and transfer_kind_limit of
+    each kind, where 0 (the default) means no limit. Queued jobs start in
+    order of priority, then age. Running jobs split transfer_bandwidth
+    KiB/s by their share. Cancelling a job frees its slot right away, even
+    before its task has unwound."""
+
+    # Job ID -> job
+    transfer_jobs: Dict[int, TransferJob]
+    # Job ID, message key or GID -> job
+    transfer_refs: Dict[Hashable, TransferJob]
+    # (-priority, job ID, job), cancelled jobs are skipped when popped
+    transfer_queue: List[Tuple[int, int, TransferJob]]
+    # Kind -> running jobs
+    transfers_running: Counter
+    transfer_ids: Iterator[int]
+
+    def __init__(self: "Bot", **kwargs: Any) -> None:
+        self.transfer_jobs = {}
+        self.transfer_refs = {}
+        self.transfer_queue = []
+        self.transfers_running = Counter()
+        self.transfer_ids = itertools.count(1)
+
+        super().__init__(**kwargs)
+
+    def _new_transfer(self: "Bot", kind: str, name: str,
+                      msg: Optional[pyrogram.types.Message], gid: Optional[str],
+                      priority: int, share: float) -> TransferJob:
+        if share <= 0:
+            # Bandwidth is split by share, so every job needs some
+            raise ValueError(f"Transfer share must be positive, not {share}")
+
+        job_id = next(self.transfer_ids)
+        refs: List[Hashable] = [job_id]
+        if msg is not None:
+            refs.append((msg.chat.id, msg.message_id))
+        if gid is not None:
+            refs.append(gid)
+
+        job = TransferJob(job_id, kind, name, priority, share, tuple(refs))
+        self.transfer_jobs[job_id] = job
+        for ref in job.refs:
+            self.transfer_refs[ref] = job
+
+        return job
+
+    def _start_transfer(self: "Bot", job: TransferJob) -> None:
+        job.state = "running"
+        job.started = time.monotonic()
+        self.transfers_running[job.kind] += 1
+
+    def _release_transfer(self: "Bot",
+                          job: TransferJob,
+                          state: str = "done") -> None:
+        if job.state == "running":
+            self.transfers_running[job.kind] -= 1
+        if job.state in ("queued", "running"):
+            job.state = state
+
+        self.transfer_jobs.pop(job.id, None)
+        for ref in job.refs:
+            if self.transfer_refs.get(ref) is job:
+                del self.transfer_refs[ref]
+
+        self._dispatch_transfers()
+
+    def _dispatch_transfers(self: "Bot") -> None:
+        limit = self.getConfig.transfer_limit
+        kind_limit = self.getConfig.transfer_kind_limit
+        running = sum(self.transfers_running.values())
+
+        held = []
+        while self.transfer_queue and (limit <= 0 or running < limit):
+            entry = heapq.heappop(self.transfer_queue)
+            job = entry[2]
+            if job.state != "queued":
+                continue
+            if 0 < kind_limit <= self.transfers_running[job.kind]:
+                held.append(entry)
+                continue
+
+            self._start_transfer(job)
+            job.ready.set_result(None)
+            running += 1
+
+        for entry in held:
+            heapq.heappush(self.transfer_queue, entry)
+
+        self._balance_transfers()
+
+    def _balance_transfers(self: "Bot") -> None:
+        bandwidth = self.getConfig.transfer_bandwidth * 1024
+        running = [
+            job for job in self.transfer_jobs.values()
+            if job.state == "running"
+        ]
+        shares = sum(job.share for job in running)
+        for job in running:
+            job.set_limit(bandwidth * job.share / shares if bandwidth else 0)
+
+    async def run_transfer(self: "Bot",
+                           kind: str,
+                           func: Callable[[TransferJob], Awaitable[Result]],
+                           *,
+                           name: str,
+                           msg: Optional[pyrogram.types.Message] = None,
+                           gid: Optional[str] = None,
+                           priority: int = 0,
+                           share: float = 1,
+                           progress: Optional[util.ticker.Transfer] = None
+                          ) -> Result:
+        """Waits for a free slot, then runs func(job) as the given job.
+
+        Raises TransferCancelled if the job is cancelled, queued or not.
+        Cancelling the calling task still raises CancelledError."""
+
+        job = self._new_transfer(kind, name, msg, gid, priority, share)
+        job.progress = progress
+        heapq.heappush(self.transfer_queue, (-priority, job.id, job))
+        self._dispatch_transfers()
+
+        try:
+            try:
+                await job.ready
+                if not job.cancelled:
+                    job.task = self.loop.create_task(func(job))
+                    return await job.task
+            except asyncio.CancelledError:
+                if not job.cancelled:
+                    raise
+
+            # CancelledError would get past every except Exception on its way
+            # up and take down whatever pyrogram worker is running the command
+            raise util.error.TransferCancelled(f"Job {job.id} cancelled")
+        finally:
+            self._release_transfer(job)
+
+    def attach_transfer(
+        self: "Bot",
+        kind: str,
+        *,
+        name: str,
+        gid: Optional[str] = None,
+        msg: Optional[pyrogram.types.Message] = None,
+        share: float = 1,
+        on_cancel: Optional[Callable[[], Awaitable[Any]]] = None,
+        on_limit: Optional[Callable[[float], Awaitable[Any]]] = None
+    ) -> TransferJob:
+        """Registers a job scheduled elsewhere, like aria2 downloads.
+
+        It counts against the limits until detach_transfer() but is never
+        held back, and on_cancel is awaited to cancel it."""
+
+        job = self._new_transfer(kind, name, msg, gid, 0, share)
+        job.on_cancel = on_cancel
+        job.on_limit = on_limit
+        self._start_transfer(job)
+        job.ready.set_result(None)
+        self._balance_transfers()
+
+        return job
+
+    def detach_transfer(self: "Bot", ref: Hashable) -> None:
+        job = self.transfer_refs.get(ref)
+        if job is not None:
+            self._release_transfer(job)
+
+    def get_transfer(self: "Bot", ref: Hashable) -> Optional[TransferJob]:
+        return self.transfer_refs.get(ref)
+
+    async def cancel_transfer(self: "Bot",
+                              ref: Hashable) -> Optional[TransferJob]:
+        """Cancels the job with the given ID, message key or GID."""
+
+        job = self.transfer_refs.get(ref)
+        if job is None:
+            return None
+
+        self._release_transfer(job, "cancelled")
+        if job.task is not None:
+            job.task.cancel()
+        else:
+            job.ready.cancel()
+
+        if job.on_cancel is not None:
+            await job.on_cancel()
+
+        return job
+
+    def list_transfers(self: "Bot") -> List[TransferJob]:
+        """Returns running jobs by start, then queued jobs by turn."""
+
+        return sorted(self.transfer_jobs.values(),
+                      key=lambda job: (job.state != "running",
+                                       job.started or 0, -job.priority,
+                                       job.id))
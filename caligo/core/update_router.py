@@ -0,0 +1,59 @@
+from collections import Counter
+from typing import TYPE_CHECKING, Any
+
+import pyrogram
+
+from .base import Base
+from .raw import Message
+
+if TYPE_CHECKING:
+    from .bot import Bot
+
+
+class UpdateRouter(Base):
+    """Classifies every incoming message once and sends it down one path.
+
+    Replaces separate command, sudo command and conversation handlers that
+    each ran their own filters on every message."""
+
+    route_counts: Counter
+
+    def __init__(self: "Bot", **kwargs: Any) -> None:
+        self.route_counts = Counter()
+
+        super().__init__(**kwargs)
+
+    async def on_update(self: "Bot", client: pyrogram.Client,
+                        msg: pyrogram.types.Message) -> None:
+        if self.is_outgoing(msg):
+            segments = self.parse_command(msg, self.prefix)
+            if segments is not None:
+                self.route_counts["command"] += 1
+                # Segments go on the view, the update itself stays untouched
+                cmd_msg = Message.view(msg)
+                cmd_msg.segments = segments
+                await self.on_command(client, cmd_msg)
+                return
+
+        if self.in_conversation(msg):
+            self.route_counts["conversation"] += 1
+            await self.on_conversation(client, msg)
+        else:
+            self.route_counts["event"] += 1
+
+        # Let the module event handlers in the same group see it
+        msg.continue_propagation()
+
+    async def on_bot_update(self: "Bot", client: pyrogram.Client,
+                            msg: pyrogram.types.Message) -> None:
+        if msg.from_user and msg.from_user.id == self.uid:
+            segments = self.parse_command(msg, self.sudoprefix)
+            if segments is not None:
+                self.route_counts["sudo_command"] += 1
+                # Segments go on the view, the update itself stays untouched
+                cmd_msg = Message.view(msg)
+                cmd_msg.segments = segments
+                await self.on_command(client, cmd_msg)
+                return
+
+        self.route_counts["ignored"] += 1
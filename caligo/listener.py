@@ -1,11 +1,30 @@
-from typing import Any, Callable, Pattern
+import re
+from collections import defaultdict
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    Match,
+    Optional,
+    Pattern,
+    Sequence,
+    Tuple,
+    Union,
+)
 
 from pyrogram import filters
 from pyrogram.filters import Filter
+from pyrogram.types import CallbackQuery, InlineQuery, Message
 
 ListenerFunc = Any
 Decorator = Callable[[ListenerFunc], ListenerFunc]
 
+# Global inline flags are only allowed at the very start of a pattern, so
+# they're stripped and passed to the combined pattern instead
+GLOBAL_FLAGS: Pattern = re.compile(r"^\(\?[aiLmsux]+\)")
+BACKREFERENCE: Pattern = re.compile(r"\\[1-9]|\(\?P=")
+
 
 def priority(_prio: int) -> Decorator:
     """Sets priority on the given listener function."""
@@ -17,30 +36,122 @@ def priority(_prio: int) -> Decorator:
     return prio_decorator
 
 
-def pattern(_pattern: Pattern[str]) -> Decorator:
+def pattern(_pattern: Union[str, Pattern[str]]) -> Decorator:
     """Sets regex filters on the given listener function."""
 
     def regex_decorator(func: ListenerFunc) -> ListenerFunc:
         setattr(func, "_listener_regex", filters.regex(_pattern))
+        setattr(func, "_listener_pattern", re.compile(_pattern))
         return func
 
     return regex_decorator
 
 
+def timeout(_timeout: float) -> Decorator:
+    """Cancels the given listener if it runs longer than the timeout."""
+
+    def timeout_decorator(func: ListenerFunc) -> ListenerFunc:
+        setattr(func, "_listener_timeout", _timeout)
+        return func
+
+    return timeout_decorator
+
+
 class Listener:
     event: str
     func: ListenerFunc
     module: Any
     priority: int
     regex: Filter
+    pattern: Optional[Pattern[str]]
+    timeout: Optional[float]
 
-    def __init__(self, event: str, func: ListenerFunc, mod: Any, prio: int,
-                 regex: Filter) -> None:
+    def __init__(self,
+                 event: str,
+                 func: ListenerFunc,
+                 mod: Any,
+                 prio: int,
+                 regex: Filter,
+                 pattern: Optional[Pattern[str]] = None,
+                 timeout: Optional[float] = None) -> None:
         self.event = event
         self.func = func
         self.module = mod
         self.priority = prio
         self.regex = regex
+        self.pattern = pattern
+        self.timeout = timeout
 
     def __lt__(self, other: "Listener") -> bool:
         return self.priority < other.priority
+
+
+def match_value(update: Any) -> Optional[str]:
+    """Returns the text of an update that listener patterns apply to."""
+
+    if isinstance(update, Message):
+        return update.text or update.caption
+    if isinstance(update, CallbackQuery):
+        return update.data
+    if isinstance(update, InlineQuery):
+        return update.query
+
+    return None
+
+
+class PatternIndex:
+    """All listener patterns of one event compiled into combined matchers.
+
+    Each pattern is wrapped in an optional lookahead with its own named
+    group, so a single match at the start of the value tells which of the
+    listeners apply. Only those then run their own pattern to collect
+    matches."""
+
+    combined: List[Tuple[Pattern[str], Dict[str, Listener]]]
+    separate: List[Listener]
+
+    def __init__(self, listeners: Sequence[Listener]) -> None:
+        self.combined = []
+        self.separate = []
+
+        by_flags: Dict[int, List[Listener]] = defaultdict(list)
+        for lst in listeners:
+            if lst.pattern is None:
+                continue
+
+            if BACKREFERENCE.search(lst.pattern.pattern):
+                # Group numbers shift once wrapped, keep these on their own
+                self.separate.append(lst)
+            else:
+                by_flags[lst.pattern.flags].append(lst)
+
+        for flags, group in by_flags.items():
+            names = {f"_l{idx}": lst for idx, lst in enumerate(group)}
+            source = "^" + "".join(
+                rf"(?=[\s\S]*?(?P<{name}>{GLOBAL_FLAGS.sub('', lst.pattern.pattern)}))?"
+                for name, lst in names.items())
+            try:
+                self.combined.append((re.compile(source, flags), names))
+            except re.error:
+                # Conflicting group names and the like
+                self.separate.extend(group)
+
+    def match(self, value: str) -> Dict[Listener, List[Match]]:
+        """Returns the listeners whose pattern matches along with their matches."""
+
+        found: Dict[Listener, List[Match]] = {}
+        if not isinstance(value, str) or not value:
+            return found
+
+        for combined, names in self.combined:
+            hit = combined.match(value)
+            for name, lst in names.items():
+                if hit.start(name) != -1:
+                    found[lst] = list(lst.pattern.finditer(value))
+
+        for lst in self.separate:
+            matches = list(lst.pattern.finditer(value))
+            if matches:
+                found[lst] = matches
+
+        return found
@@ -1,7 +1,8 @@
+import asyncio
 import inspect
 import logging
 import os.path
-from typing import TYPE_CHECKING, ClassVar, Optional, Type
+from typing import TYPE_CHECKING, Any, ClassVar, Dict, Optional, Sequence, Type
 
 if TYPE_CHECKING:
     from .command import Command
@@ -11,6 +12,13 @@ if TYPE_CHECKING:
 class Module:
     name: ClassVar[str] = "Unnamed"
     disabled: ClassVar[bool] = False
+    # Whether the module may be deferred until first use in lazy mode
+    lazy: ClassVar[bool] = True
+    # Names of modules whose lifecycle events must run before this one's
+    dependencies: ClassVar[Sequence[str]] = ()
+    # Attributes handed over to the new instance when the module is reloaded
+    # on its own; modules without any go through their lifecycle again
+    reload_state: ClassVar[Sequence[str]] = ()
 
     bot: "Bot"
     log: logging.Logger
@@ -21,6 +29,21 @@ class Module:
         self.log = logging.getLogger(type(self).name)
         self.comment = None
 
+    async def save_state(self) -> Dict[str, Any]:
+        """Collects the state to hand over to a reloaded instance."""
+
+        return {
+            attr: getattr(self, attr)
+            for attr in self.reload_state
+            if hasattr(self, attr)
+        }
+
+    async def restore_state(self, state: Dict[str, Any]) -> None:
+        """Takes over state collected by save_state() from the old instance."""
+
+        for attr, value in state.items():
+            setattr(self, attr, value)
+
     @classmethod
     def format_desc(cls, comment: Optional[str] = None):
         _comment = comment + " " if comment else ""
@@ -30,6 +53,33 @@ class Module:
         return "<" + self.format_desc(self.comment) + ">"
 
 
+class LazyModule(Module):
+    """Stand-in for a module that hasn't been imported yet.
+
+    Built from the cached module manifest; its commands and listeners import
+    and load the real module on first use."""
+
+    submodule: str
+    symbol: str
+    manifest: Dict[str, Any]
+    task: Optional[asyncio.Task]
+
+    def __init__(self, bot: "Bot", submodule: str,
+                 manifest: Dict[str, Any]) -> None:
+        super().__init__(bot)
+
+        self.name = manifest["name"]
+        self.dependencies = manifest.get("dependencies", ())
+        self.log = logging.getLogger(self.name)
+        self.submodule = submodule
+        self.symbol = manifest["symbol"]
+        self.manifest = manifest
+        self.task = None
+
+    def __repr__(self):
+        return f"<lazy module '{self.name}' from '{self.submodule}'>"
+
+
 class ModuleLoadError(Exception):
     pass
 
@@ -1,20 +1,44 @@
 import importlib
 import pkgutil
+import sys
 from pathlib import Path
+from types import ModuleType
+from typing import Any, List
 
 current_dir = str(Path(__file__).parent)
-submodules = [
-    importlib.import_module("." + info.name, __name__)
-    for info in pkgutil.iter_modules([current_dir])
-]
+names = [info.name for info in pkgutil.iter_modules([current_dir])]
+
+
+def submodule_path(name: str) -> Path:
+    return Path(current_dir) / f"{name}.py"
+
+
+def import_submodule(name: str) -> ModuleType:
+    return importlib.import_module("." + name, __name__)
+
+
+def import_submodules() -> List[ModuleType]:
+    return [import_submodule(name) for name in names]
+
+
+def __getattr__(name: str) -> Any:
+    # Submodules are only imported once something asks for them, which
+    # allows lazy module loading to skip the heavy ones at startup
+    if name == "submodules":
+        return import_submodules()
+
+    raise AttributeError(f"module '{__name__}' has no attribute '{name}'")
+
 
 try:
     _reload_flag: bool
 
     # noinspection PyUnboundLocalVariable
     if _reload_flag:
-        # Module has been reloaded, reload our submodules
-        for module in submodules:
-            importlib.reload(module)
+        # Module has been reloaded, reload our already imported submodules
+        for _name in names:
+            _module = sys.modules.get(f"{__name__}.{_name}")
+            if _module is not None:
+                importlib.reload(_module)
 except NameError:
     _reload_flag = True
@@ -1,9 +1,9 @@
 import ast
 import asyncio
+import functools
 import logging
-from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Any, ClassVar, Dict, Optional, Set, Tuple, Union
+from typing import Any, ClassVar, Dict, Optional, Sequence, Union
 from urllib import parse
 
 import pyrogram
@@ -20,11 +20,13 @@ from tenacity import (
 
 from .. import module, util
 
+# Every download and upload shares the progress message of the last mirror
+PROGRESS_KEY = "aria2"
+
 
 class Aria2WebSocketServer:
     log: ClassVar[logging.Logger] = logging.getLogger("Aria2WS")
 
-    cancelled: Set[str]
     downloads: Dict[str, util.aria2.Download]
     lock: asyncio.Lock
     uploads: Dict[str, Union[MediaFileUpload, Dict[str, Union[asyncio.Task,
@@ -32,6 +34,7 @@ class Aria2WebSocketServer:
 
     index_link: str
     invoker: pyrogram.types.Message
+    progress: util.ticker.TransferGroup
     stopping: bool
 
     _protocol: str
@@ -43,12 +46,12 @@ class Aria2WebSocketServer:
         self.lock = asyncio.Lock()
         self.log = Aria2WebSocketServer.log
 
-        self.cancelled = set()
         self.downloads = {}
         self.uploads = {}
 
         self.index_link = self.drive.index_link
         self.invoker = None
+        self.progress = util.ticker.TransferGroup()
         self.stopping = False
 
     @classmethod
@@ -137,8 +140,48 @@ class Aria2WebSocketServer:
         gid = data["params"][0]["gid"]
         async with self.lock:
             self.downloads[gid] = await self.getDownload(client, gid)
+        if self.bot.get_transfer(gid) is None:
+            self.bot.attach_transfer(
+                "mirror",
+                name=self.downloads[gid].name,
+                gid=gid,
+                on_cancel=functools.partial(self.cancelDownload, client, gid),
+                on_limit=functools.partial(self.limitDownload, client, gid))
         self.log.info(f"Starting download: [gid: '{gid}']")
 
+    async def limitDownload(self, client: Aria2WebsocketClient, gid: str,
+                            limit: float) -> None:
+        try:
+            await client.changeOption(gid,
+                                      {"max-download-limit": str(int(limit))})
+        except Aria2rpcException as e:
+            self.log.debug(f"[gid: '{gid}']: Can't limit speed: {e}")
+
+    async def cancelDownload(self, client: Aria2WebsocketClient,
+                             gid: str) -> None:
+        try:
+            res = await client.tellStatus(gid, ["status"])
+            if res["status"] == "active":
+                await client.forcePause(gid)
+                await client.forceRemove(gid)
+        except Aria2rpcException as e:
+            self.log.warning(f"[gid: '{gid}']: Can't stop download: {e}")
+
+        await self.dropDownload(gid)
+        self.log.info(f"Cancelled download: [gid: '{gid}']")
+
+    async def dropDownload(self, gid: str) -> None:
+        async with self.lock:
+            self.downloads.pop(gid, None)
+            upload = self.uploads.pop(gid, None)
+            if isinstance(upload, dict):
+                # The folder loop closes the generator itself, it may be
+                # running the generator right now
+                if upload.get("task") is not None:
+                    upload["task"].cancel()
+            await self.checkDelete()
+        self.bot.detach_transfer(gid)
+
     async def onDownloadComplete(self, client: Aria2WebsocketClient,
                                  data: Union[Dict[str, Any], Any]) -> None:
         gid = data["params"][0]["gid"]
@@ -148,6 +191,7 @@ class Aria2WebSocketServer:
             file = self.downloads[gid]
             if file.metadata is True:
                 del self.downloads[gid]
+                self.bot.detach_transfer(gid)
                 self.log.info(f"Complete download: [gid: '{gid}'] - Metadata")
                 return
 
@@ -165,19 +209,36 @@ class Aria2WebSocketServer:
 
             cancelled = False
             async for task in folderTasks:
+                async with self.lock:
+                    # Gone if the download was cancelled while this waited
+                    upload = self.uploads.get(gid)
+                    if upload is not None:
+                        upload["task"] = task
+                if upload is None:
+                    task.cancel()
+                    cancelled = True
+                    break
+
                 try:
                     await task
                 except asyncio.CancelledError:
                     cancelled = True
                     break
-                else:
-                    async with self.lock:
-                        self.uploads[gid]["counter"] += 1
 
-            if not cancelled:
                 async with self.lock:
-                    del self.uploads[gid]
-                    del self.downloads[gid]
+                    if gid not in self.uploads:
+                        cancelled = True
+                        break
+                    self.uploads[gid]["counter"] += 1
+
+            if cancelled:
+                await folderTasks.aclose()
+                await self.dropDownload(gid)
+            else:
+                async with self.lock:
+                    self.uploads.pop(gid, None)
+                    self.downloads.pop(gid, None)
+                self.bot.detach_transfer(gid)
 
                 folderLink = (
                     f"**GoogleDrive folderLink**: [{file.name}]"
@@ -208,6 +269,7 @@ class Aria2WebSocketServer:
         else:
             async with self.lock:
                 del self.downloads[gid]
+            self.bot.detach_transfer(gid)
             self.log.warning(f"Can't upload '{file.name}', "
                              f"due to '{file.dir}' is not accessible")
 
@@ -226,6 +288,7 @@ class Aria2WebSocketServer:
                              data: Union[Dict[str, Any], Any]) -> None:
         gid = data["params"][0]["gid"]
 
+        await self.dropDownload(gid)
         self.log.info(f"Stopped download: [gid '{gid}']")
 
     async def onDownloadError(self, client: Aria2WebsocketClient,
@@ -246,16 +309,19 @@ class Aria2WebSocketServer:
         async with self.lock:
             del self.downloads[file.gid]
             await self.checkDelete()
+        self.bot.detach_transfer(gid)
 
     @retry(
         wait=wait_random_exponential(multiplier=2, min=3, max=6),
         stop=stop_after_attempt(5),
         retry=retry_if_exception_type(KeyError),
     )
-    async def checkProgress(self) -> str:
-        progress_string = ""
-        time = util.time.format_duration_td
-        human = util.misc.human_readable_bytes
+    async def checkProgress(self) -> None:
+        progress = self.progress
+        for key in list(progress.transfers):
+            gid = key[1] if isinstance(key, tuple) else key
+            if gid not in self.downloads:
+                progress.remove(key)
 
         for file in list(self.downloads.values()):
             try:
@@ -265,6 +331,7 @@ class Aria2WebSocketServer:
 
             if (file.failed or file.paused or (file.complete and file.metadata)
                     or file.removed):
+                progress.remove(file.gid)
                 continue
 
             if file.complete and not file.metadata:
@@ -277,70 +344,37 @@ class Aria2WebSocketServer:
                         percent = 0
                     finally:
                         percent = round(percent * 100)
-                    progress_string += (
-                        f"`{file.name}`\nGID: `{file.gid}`\n"
+                    progress.set_line(
+                        file.gid, f"`{file.name}`\nGID: `{file.gid}`\n"
                         f"__ComputingFolder: [{counter}/{length}] "
                         f"{percent}%__\n\n")
                 elif file.is_file:
-                    f = self.uploads[file.gid]
-                    progress, done = await self.uploadProgress(f)
-                    if not done:
-                        progress_string += progress
+                    progress.remove(file.gid)
+                    await self.uploadProgress(self.uploads[file.gid])
 
                 continue
 
-            downloaded = file.completed_length
-            file_size = file.total_length
-            percent = file.progress
-            speed = file.download_speed
-            eta = file.eta_formatted
-            bullets = "●" * int(round(percent * 10)) + "○"
-            if len(bullets) > 10:
-                bullets = bullets.replace("○", "")
-
-            space = "    " * (10 - len(bullets))
-            progress_string += (
-                f"`{file.name}`\nGID: `{file.gid}`\n"
-                f"Status: **{file.status.capitalize()}**\n"
-                f"Progress: [{bullets + space}] {round(percent * 100)}%\n"
-                f"__{human(downloaded)} of {human(file_size)} @ "
-                f"{human(speed, postfix='/s')}\neta - {time(eta)}__\n\n")
-
-        return progress_string
+            transfer = progress.add(file.gid, file.name, "", gid=file.gid)
+            transfer.status = file.status.capitalize()
+            transfer.update(file.completed_length,
+                            file.total_length,
+                            speed=file.download_speed,
+                            eta=file.eta)
+
+    async def editProgress(self, text: str) -> None:
+        async with self.lock:
+            if self.invoker is not None:
+                await self.bot.respond(self.invoker, text)
 
     async def updateProgress(self) -> None:
-        last_update_time = None
+        ticker = self.bot.client.ticker
         while not self.stopping:
-            for gid in self.cancelled.copy():
-                async with self.lock:
-                    file = self.downloads[gid]
-                    if gid in self.downloads:
-                        del self.downloads[gid]
-                    if file.is_file and gid in self.uploads:
-                        del self.uploads[gid]
-                    elif file.is_dir and gid in self.uploads:
-                        for task in asyncio.all_tasks():
-                            if task.get_name() == gid:
-                                task.cancel()
-                        await self.uploads[gid]["generator"].aclose()
-                        del self.uploads[gid]
-                    self.cancelled.remove(gid)
-                    await self.checkDelete()
-
-            progress = await self.checkProgress()
-            now = datetime.now()
-
-            if (last_update_time is None
-                    or (now - last_update_time).total_seconds() >= 5 and
-                (progress != "")):
-                try:
-                    async with self.lock:
-                        if self.invoker is not None:
-                            await self.bot.respond(self.invoker, progress)
-                except pyrogram.errors.MessageNotModified:
-                    pass
-                finally:
-                    last_update_time = now
+            await self.checkProgress()
+            # The ticker renders and sends it, this only keeps it current
+            if self.progress.transfers:
+                ticker.track(PROGRESS_KEY, self.editProgress, self.progress)
+            else:
+                ticker.finish(PROGRESS_KEY)
 
             await asyncio.sleep(0.1)
 
@@ -374,33 +408,23 @@ class Aria2WebSocketServer:
 
         self.log.info(f"Seeding: [gid: '{file.gid}'] - Complete")
 
-    async def uploadProgress(
-            self, file: MediaFileUpload) -> Tuple[Union[str, None], bool]:
-        time = util.time.format_duration_td
+    async def uploadProgress(self, file: MediaFileUpload) -> bool:
         human = util.misc.human_readable_bytes
 
         status, response = await util.run_sync(file.next_chunk, num_retries=5)
         if status:
-            file_size = status.total_size
             end = util.time.sec() - file.start_time
             uploaded = status.resumable_progress
-            percent = uploaded / file_size
-            speed = round(uploaded / end, 2)
-            eta = timedelta(seconds=int(round((file_size - uploaded) / speed)))
-            bullets = "●" * int(round(percent * 10)) + "○"
-            if len(bullets) > 10:
-                bullets = bullets.replace("○", "")
-
-            space = "    " * (10 - len(bullets))
-            progress = (
-                f"`{file.name}`\nGID: `{file.gid}`\n"
-                f"Status: **Uploading**\n"
-                f"Progress: [{bullets + space}] {round(percent * 100)}%\n"
-                f"__{human(uploaded)} of {human(file_size)} @ "
-                f"{human(speed, postfix='/s')}\neta - {time(eta)}__\n\n")
+            transfer = self.progress.add(("upload", file.gid),
+                                         file.name,
+                                         "Uploading",
+                                         gid=file.gid)
+            transfer.update(uploaded,
+                            status.total_size,
+                            speed=uploaded / end if end > 0 else 0)
 
         if response is None:
-            return progress, False
+            return False
 
         file_size = response.get("size")
         mirrorLink = response.get("webContentLink")
@@ -418,12 +442,16 @@ class Aria2WebSocketServer:
             del self.uploads[file.gid]
             del self.downloads[file.gid]
             await self.checkDelete()
+        self.bot.detach_transfer(file.gid)
 
-        return None, True
+        return True
 
 
 class Aria2(module.Module):
     name: ClassVar[str] = "Aria2"
+    dependencies: ClassVar[Sequence[str]] = ("GoogleDrive",)
+    # Keep the daemon and its connection running across reloads
+    reload_state: ClassVar[Sequence[str]] = ("client", "_ws")
 
     client: Aria2WebsocketClient
 
@@ -436,7 +464,7 @@ class Aria2(module.Module):
         before=before_log(Aria2WebSocketServer.log, logging.DEBUG),
     )
     async def on_started(self) -> None:
-        drive = self.bot.modules.get("GoogleDrive")
+        drive = await self.bot.get_module("GoogleDrive")
         if drive is None:
             self.log.warning("Aria2 needs GoogleDrive module loaded")
             self.bot.unload_module(self)
@@ -488,25 +516,6 @@ class Aria2(module.Module):
         return await self.client.pause(gid)
 
     async def removeDownload(self, gid: str) -> str:
-        return await self.client.remove(gid)
-
-    async def cancelMirror(self, gid: str) -> Optional[str]:
-        try:
-            res = await self.client.tellStatus(gid, ["status", "followedBy"])
-        except Aria2rpcException as e:
-            res = await self._formatSE(e)
-            if gid in res:
-                res = res.replace(gid, f"'{gid}'")
-            return res
-
-        status = res["status"]
-        metadata = bool(res.get("followedBy"))
-        ret = None
-        if status == "active":
-            await self.client.forcePause(gid)
-            await self.client.forceRemove(gid)
-        elif status == "complete" and metadata is True:
-            return "__GID belongs to finished Metadata, can't be abort.__"
-
-        self._ws.cancelled.add(gid)
-        return ret
+        res = await self.client.remove(gid)
+        self.bot.detach_transfer(gid)
+        return res
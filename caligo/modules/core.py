@@ -1,7 +1,8 @@
+import functools
 import platform
 import uuid
 from collections import defaultdict
-from typing import ClassVar, Dict, List, MutableMapping
+from typing import ClassVar, Dict, List, MutableMapping, Sequence
 
 import pyrogram
 from motor.motor_asyncio import AsyncIOMotorDatabase
@@ -19,6 +20,7 @@ from .. import __version__, command, listener, module, util
 
 class CoreModule(module.Module):
     name: ClassVar[str] = "Core"
+    reload_state: ClassVar[Sequence[str]] = ("cache", "db")
 
     cache: Dict[int, pyrogram.types.Message]
     db: AsyncIOMotorDatabase
@@ -93,15 +95,15 @@ class CoreModule(module.Module):
         mod = query.matches[0].group(1)
         if mod == "Back":
             button = await util.run_sync(self.build_button)
-            await query.edit_message_text(
-                "**Caligo Menu Helper**",
-                reply_markup=InlineKeyboardMarkup(button))
+            await util.tg.edit_query(query,
+                                     "**Caligo Menu Helper**",
+                                     reply_markup=InlineKeyboardMarkup(button))
             return
         if mod == "Close":
             button = await util.run_sync(self.build_button)
             for msg_id, chat_id in list(self.cache.items()):
                 try:
-                    msg = await self.bot.client.get_messages(chat_id, msg_id)
+                    msg = await self.bot.get_messages(chat_id, msg_id)
                 except pyrogram.errors.PeerIdInvalid:
                     continue
                 else:
@@ -116,7 +118,8 @@ class CoreModule(module.Module):
                         break
             else:
                 await query.answer("😿️ Couldn't close expired message")
-                await query.edit_message_text(
+                await util.tg.edit_query(
+                    query,
                     "**Caligo Menu Helper**",
                     reply_markup=InlineKeyboardMarkup(button[:-1]),
                 )
@@ -134,7 +137,7 @@ class CoreModule(module.Module):
             if cmd.aliases:
                 aliases = f' (aliases: {", ".join(cmd.aliases)})'
 
-            mod_name = type(cmd.module).name
+            mod_name = cmd.module.name
             modules[mod_name][cmd.name] = desc + aliases
 
         response = None
@@ -146,8 +149,9 @@ class CoreModule(module.Module):
                 InlineKeyboardButton("⇠ Back",
                                      callback_data="menu(Back)".encode())
             ]]
-            await query.edit_message_text(
-                response, reply_markup=InlineKeyboardMarkup(button))
+            await util.tg.edit_query(query,
+                                     response,
+                                     reply_markup=InlineKeyboardMarkup(button))
 
             return
 
@@ -161,8 +165,10 @@ class CoreModule(module.Module):
             await ctx.msg.delete()
             response = await self.bot.client.get_inline_bot_results(
                 self.bot.bot_user.username, "help")
-            res = await self.bot.client.send_inline_bot_result(
-                ctx.msg.chat.id, response.query_id, response.results[1].id)
+            send = functools.partial(self.bot.client.send_inline_bot_result,
+                                     ctx.msg.chat.id, response.query_id,
+                                     response.results[1].id)
+            res = await self.bot.client.scheduler.send(ctx.msg.chat.id, send)
             self.cache[res.updates[0].id] = ctx.msg.chat.id
 
             return
@@ -207,7 +213,7 @@ Expected parameters: {args_desc}"""
             if cmd.aliases:
                 aliases = f' (aliases: {", ".join(cmd.aliases)})'
 
-            mod_name = type(cmd.module).name
+            mod_name = cmd.module.name
             modules[mod_name][cmd.name] = desc + aliases
 
         response = None
@@ -260,6 +266,28 @@ Expected parameters: {args_desc}"""
 
         return f"Sudo Prefix set to `{self.bot.sudoprefix}`"
 
+    @command.desc("Show how long each module took to import, construct and start")
+    @command.alias("startup")
+    async def cmd_timeline(self, ctx: command.Context) -> str:
+        fmt = util.time.format_duration_us
+        phases = ("import", "construct", "load", "start", "started")
+
+        timeline = sorted(self.bot.module_timings.items(),
+                          key=lambda item: min(t[0] for t in item[1].values()))
+        rows = {}
+        for name, timings in timeline:
+            spent = sum(timings[phase][1] for phase in phases
+                        if phase in timings)
+            first = min(t[0] for t in timings.values())
+            steps = " • ".join(f"{phase} {fmt(timings[phase][1])}"
+                               for phase in phases if phase in timings)
+            rows[name] = f"+{fmt(first)} ({fmt(spent)}): {steps}"
+
+        if not rows:
+            return "__No module timings recorded yet.__"
+
+        return util.text.join_map(rows, heading="Module startup timeline")
+
     @command.desc("Get information about this bot instance")
     @command.alias("botinfo")
     async def cmd_info(self, ctx: command.Context) -> None:
@@ -283,7 +311,7 @@ Expected parameters: {args_desc}"""
         uptime = util.time.format_duration_us(now - self.bot.start_time_us)
 
         # Get total uptime from stats module (if loaded)
-        stats_module = self.bot.modules.get("Stats", None)
+        stats_module = await self.bot.get_module("Stats")
         get_start_time = getattr(stats_module, "get_start_time", None)
         total_uptime = None
         if stats_module is not None and callable(get_start_time):
@@ -293,6 +321,14 @@ Expected parameters: {args_desc}"""
         else:
             uptime += "\n"
 
+        routes = self.bot.route_counts
+        entities = self.bot.entity_stats
+        messages = self.bot.message_cache_stats
+        cached = util.misc.human_readable_bytes(self.bot.message_cache_bytes)
+        scheduler = self.bot.client.scheduler
+        running = sum(self.bot.transfers_running.values())
+        queued = len(self.bot.transfer_jobs) - running
+
         # Get total number of chats, including PMs
         num_chats = await self.bot.client.get_dialogs_count()
 
@@ -319,6 +355,30 @@ Expected parameters: {args_desc}"""
                     sum(len(evt) for evt in self.bot.listeners.values()),
                 "Events activated":
                     f"{self.bot.events_activated}\n",
+                "Updates routed":
+                    f"{routes['command']} commands • "
+                    f"{routes['sudo_command']} sudo • "
+                    f"{routes['conversation']} conversation • "
+                    f"{routes['event']} events",
+                "Entity cache":
+                    f"{entities['hits']} hits • "
+                    f"{entities['restored']} restored • "
+                    f"{entities['misses']} misses",
+                "Message cache":
+                    f"{messages['hits']} hits • "
+                    f"{messages['misses']} misses • "
+                    f"{cached} cached",
+                "Outbound queue":
+                    f"{scheduler.queued} queued • "
+                    f"{scheduler.edits_saved} edits saved",
+                "Transfers":
+                    f"{running} running • {queued} queued",
+                **({
+                    "Event queue":
+                        f"{self.bot.event_queue_depth} pending • "
+                        f"{self.bot.events_delayed} delayed • "
+                        f"{self.bot.events_dropped} dropped\n"
+                } if self.bot.getConfig.event_workers > 0 else {}),
                 "Chats":
                     num_chats,
             },
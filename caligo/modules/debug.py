@@ -56,7 +56,7 @@ class DebugModule(module.Module):
                 entity_ref = ctx.input
 
             try:
-                entity = await self.bot.client.get_chat(entity_ref)
+                entity = await self.bot.get_chat(entity_ref)
             except (UsernameInvalid, PeerIdInvalid):
                 return f"Error getting entity `{entity_ref}`"
         elif ctx.msg.reply_to_message:
@@ -1,9 +1,9 @@
 import asyncio
 import base64
 import pickle
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
-from typing import Any, AsyncIterator, ClassVar, Dict, Optional, Set, Tuple, Union
+from typing import AsyncIterator, ClassVar, Dict, Optional, Sequence, Union
 
 import aiofile
 import pyrogram
@@ -20,16 +20,17 @@ from .. import command, module, util
 
 class GoogleDrive(module.Module):
     name: ClassVar[str] = "GoogleDrive"
+    reload_state: ClassVar[Sequence[str]] = ("db", "creds", "configs",
+                                             "service", "index_link",
+                                             "parent_id")
 
     configs: Dict[str, str]
     creds: Credentials
     db: AsyncIOMotorDatabase
     service: Resource
 
-    aria2: Any
     index_link: str
     parent_id: str
-    task: Set[Tuple[int, asyncio.Task]]
 
     async def on_load(self) -> None:
         self.db = self.bot.get_db("gdrive")
@@ -44,7 +45,6 @@ class GoogleDrive(module.Module):
 
         self.index_link = self.bot.getConfig.gdrive_index_link
         self.parent_id = self.bot.getConfig.gdrive_folder_id
-        self.task = set()
 
         if data:
             self.creds = await util.run_sync(pickle.loads, data.get("creds"))
@@ -55,8 +55,6 @@ class GoogleDrive(module.Module):
                                                credentials=self.creds,
                                                cache_discovery=False)
 
-            self.aria2 = self.bot.modules.get("Aria2")
-
     @command.desc("Check your GoogleDrive credentials")
     @command.alias("gdauth")
     async def cmd_gdcheck(self, ctx: command.Context) -> None:
@@ -187,9 +185,19 @@ class GoogleDrive(module.Module):
                 file.content, file.start_time = files, util.time.sec()
                 file.invoker = msg
 
-                yield self.bot.loop.create_task(file.progress(update=False),
+                yield self.bot.loop.create_task(self.uploadFolderFile(file),
                                                 name=gid)
 
+    async def uploadFolderFile(self, file: util.File) -> None:
+        # Queuing could wait forever behind the mirror job it belongs to
+        job = self.bot.attach_transfer("upload", name=file.name)
+        # So that cancelling the job cancels the upload too
+        job.task = asyncio.current_task()
+        try:
+            await file.progress(update=False, job=job)
+        finally:
+            self.bot.detach_transfer(job.id)
+
     async def uploadFile(
         self,
         file: Union[util.File, util.aria2.Download],
@@ -236,10 +244,6 @@ class GoogleDrive(module.Module):
                            msg: pyrogram.types.Message) -> Optional[Path]:
         downloadPath = ctx.bot.getConfig.downloadPath
 
-        before = util.time.sec()
-        last_update_time = None
-        human = util.misc.human_readable_bytes
-        time = util.time.format_duration_td
         if msg.document:
             file_name = msg.document.file_name
         elif msg.audio:
@@ -255,41 +259,21 @@ class GoogleDrive(module.Module):
             date = datetime.fromtimestamp(msg.voice.date)
             file_name = f"audio_{date.strftime('%Y-%m-%d_%H-%M-%S')}.ogg"
 
-        def prog_func(current: int, total: int) -> None:
-            nonlocal last_update_time
-
-            percent = current / total
-            after = util.time.sec() - before
-            now = datetime.now()
-
-            try:
-                speed = round(current / after, 2)
-                eta = timedelta(seconds=int(round((total - current) / speed)))
-            except ZeroDivisionError:
-                speed = 0
-                eta = timedelta(seconds=0)
-            bullets = "●" * int(round(percent * 10)) + "○"
-            if len(bullets) > 10:
-                bullets = bullets.replace("○", "")
-
-            space = "    " * (10 - len(bullets))
-            progress = (
-                f"`{file_name}`\n"
-                f"Status: **Downloading**\n"
-                f"Progress: [{bullets + space}] {round(percent * 100)}%\n"
-                f"__{human(current)} of {human(total)} @ "
-                f"{human(speed, postfix='/s')}\neta - {time(eta)}__\n\n")
-            # Only edit message once every 5 seconds to avoid ratelimits
-            if (last_update_time is None
-                    or (now - last_update_time).total_seconds() >= 5):
-                self.bot.loop.create_task(ctx.respond(progress))
-
-                last_update_time = now
-
-        file_path = downloadPath / file_name
-        file_path = await ctx.bot.client.download_media(msg,
-                                                        file_name=file_path,
-                                                        progress=prog_func)
+        ticker = self.bot.client.ticker
+        key = (ctx.msg.chat.id, ctx.msg.message_id)
+        transfer = ticker.transfer(key, ctx.respond, file_name, "Downloading")
+        try:
+            file_path = await self.bot.run_transfer(
+                "download",
+                lambda job: self.bot.client.download_media(
+                    msg,
+                    file_name=downloadPath / file_name,
+                    progress=job.callback),
+                name=file_name,
+                msg=ctx.msg,
+                progress=transfer)
+        finally:
+            ticker.finish(key)
 
         if file_path is not None:
             return Path(file_path)
@@ -308,16 +292,10 @@ class GoogleDrive(module.Module):
             reply_msg = ctx.msg.reply_to_message
 
             if reply_msg.media:
-                task = self.bot.loop.create_task(
-                    self.downloadFile(ctx, reply_msg))
-                self.task.add((ctx.msg.message_id, task))
                 try:
-                    await task
-                except asyncio.CancelledError:
+                    path = await self.downloadFile(ctx, reply_msg)
+                except util.error.TransferCancelled:
                     return "__Transmission aborted.__"
-                else:
-                    path = task.result()
-                    self.task.remove((ctx.msg.message_id, task))
 
                 if path.suffix == ".torrent":
                     async with aiofile.async_open(path, "rb") as afp:
@@ -330,14 +308,14 @@ class GoogleDrive(module.Module):
                     if self.index_link is not None:
                         file.index_link = self.index_link
 
-                    task = self.bot.loop.create_task(file.progress())
-                    self.task.add((ctx.msg.message_id, task))
                     try:
-                        await task
-                    except asyncio.CancelledError:
+                        await self.bot.run_transfer(
+                            "upload",
+                            lambda job: file.progress(job=job),
+                            name=file.name,
+                            msg=ctx.msg)
+                    except util.error.TransferCancelled:
                         return "__Transmission aborted.__"
-                    else:
-                        self.task.remove((ctx.msg.message_id, task))
 
                     return
             elif reply_msg.text:
@@ -347,9 +325,10 @@ class GoogleDrive(module.Module):
         else:
             types = ctx.input
 
-        if not self.bot.modules.get("Aria2"):
+        aria2 = await self.bot.get_module("Aria2")
+        if aria2 is None:
             return "__Mirroring torrent file/url needs Aria2 loaded.__"
 
-        ret = await self.aria2.addDownload(types, ctx.msg)
+        ret = await aria2.addDownload(types, ctx.msg)
         if ret is not None:
             return ret
@@ -7,7 +7,7 @@ class ManagerModule(module.Module):
     name: ClassVar[str] = "Manager"
 
     @command.desc("Reload all modules")
-    @command.alias("ra", "reload", "r")
+    @command.alias("ra", "r")
     async def cmd_reloadall(self, ctx: command.Context) -> str:
         before = util.time.usec()
 
@@ -23,10 +23,36 @@ class ManagerModule(module.Module):
         self.bot.load_all_modules()
 
         await ctx.respond("Dispatching events...")
-        await self.bot.dispatch_event("load")
-        await self.bot.dispatch_event("start", util.time.usec())
+        await self.bot.dispatch_module_event("load")
+        await self.bot.dispatch_module_event("start", util.time.usec())
 
         after = util.time.usec()
         delta = after - before
 
         return f"All modules reloaded in {util.time.format_duration_us(delta)}."
+
+    @command.desc("Reload a single module in place, or all modules if none "
+                  "is given")
+    @command.usage("[module name?]", optional=True)
+    async def cmd_reload(self, ctx: command.Context) -> str:
+        if not ctx.input:
+            return await self.cmd_reloadall(ctx)
+
+        name = next((name for name in self.bot.modules
+                     if name.lower() == ctx.input.lower()), None)
+        if name is None:
+            return f"__Module__ `{ctx.input}` __is not loaded.__"
+
+        before = util.time.usec()
+        try:
+            reloaded = await self.bot.reload_module(name)
+        except Exception as e:  # skipcq: PYL-W0703
+            self.log.error(f"Failed to reload module '{name}'", exc_info=e)
+            return (f"⚠️ Failed to reload `{name}`, keeping the old one:\n"
+                    f"```{util.error.format_exception(e)}```")
+
+        after = util.time.usec()
+        delta = after - before
+
+        names = ", ".join(f"`{mod.name}`" for mod in reloaded) or f"`{name}`"
+        return f"Reloaded {names} in {util.time.format_duration_us(delta)}."
@@ -1,9 +1,6 @@
-import asyncio
 import urllib.parse
-from datetime import datetime, timedelta
-from itertools import zip_longest
 from pathlib import Path
-from typing import ClassVar, Optional, Set, Tuple, Union
+from typing import ClassVar, Optional
 
 from .. import command, module, util
 
@@ -11,11 +8,6 @@ from .. import command, module, util
 class Misc(module.Module):
     name: ClassVar[str] = "Misc"
 
-    task: Set[Tuple[int, asyncio.Task]]
-
-    async def on_load(self) -> None:
-        self.task = set()
-
     @command.desc("Generate a LMGTFY link (Let Me Google That For You)")
     @command.usage("[search query]")
     async def cmd_lmgtfy(self, ctx: command.Context) -> str:
@@ -30,9 +22,7 @@ class Misc(module.Module):
         if not ctx.input:
             return "__Pass the file path.__"
 
-        before = util.time.sec()
         file_path = Path(ctx.input)
-        last_update_time = None
 
         if file_path.is_dir():
             await ctx.respond("__The path you input is a directory.__")
@@ -41,109 +31,73 @@ class Misc(module.Module):
             await ctx.respond("__The file you input doesn't exists.__")
             return
 
-        human = util.misc.human_readable_bytes
-        time = util.time.format_duration_td
-
-        def prog_func(current: int, total: int) -> None:
-            nonlocal last_update_time
-
-            percent = current / total
-            after = util.time.sec() - before
-            now = datetime.now()
-
-            try:
-                speed = round(current / after, 2)
-                eta = timedelta(seconds=int(round((total - current) / speed)))
-            except ZeroDivisionError:
-                speed = 0
-                eta = timedelta(seconds=0)
-            bullets = "●" * int(round(percent * 10)) + "○"
-            if len(bullets) > 10:
-                bullets = bullets.replace("○", "")
-
-            space = "    " * (10 - len(bullets))
-            progress = (
-                f"`{file_path.name}`\n"
-                f"Status: **Uploading**\n"
-                f"Progress: [{bullets + space}] {round(percent * 100)}%\n"
-                f"__{human(current)} of {human(total)} @ "
-                f"{human(speed, postfix='/s')}\neta - {time(eta)}__\n\n")
-            # Only edit message once every 5 seconds to avoid ratelimits
-            if (last_update_time is None
-                    or (now - last_update_time).total_seconds() >= 5):
-                self.bot.loop.create_task(ctx.respond(progress))
-
-                last_update_time = now
-
-        task = self.bot.loop.create_task(
-            self.bot.client.send_document(ctx.msg.chat.id,
-                                          file_path,
-                                          force_document=True,
-                                          progress=prog_func))
-        self.task.add((ctx.msg.message_id, task))
+        ticker = self.bot.client.ticker
+        key = (ctx.msg.chat.id, ctx.msg.message_id)
+        transfer = ticker.transfer(key, ctx.respond, file_path.name,
+                                   "Uploading", file_path.stat().st_size)
         try:
-            await task
-        except asyncio.CancelledError:
+            await self.bot.run_transfer(
+                "upload",
+                lambda job: self.bot.client.send_document(
+                    ctx.msg.chat.id,
+                    file_path,
+                    force_document=True,
+                    progress=job.callback),
+                name=file_path.name,
+                msg=ctx.msg,
+                progress=transfer)
+        except util.error.TransferCancelled:
             return "__Transmission aborted.__"
-        else:
-            self.task.remove((ctx.msg.message_id, task))
+        finally:
+            ticker.finish(key)
 
         await ctx.msg.delete()
         return
 
-    @command.desc("Abort transmission of upload or download")
-    @command.usage("[file gid]", reply=True)
+    @command.desc("Abort an upload, download or mirror")
+    @command.usage("[job ID or GID]", reply=True)
+    @command.alias("cancel")
     async def cmd_abort(self, ctx: command.Context) -> Optional[str]:
         if not ctx.input and not ctx.msg.reply_to_message:
-            return "__Pass GID or reply to message of task to abort transmission.__"
+            return "__Pass job ID, GID or reply to message of task to abort.__"
         if ctx.msg.reply_to_message and ctx.input:
-            return "__Can't pass gid while replying to message.__"
-        aria2 = self.bot.modules.get("Aria2")
-        drive = self.bot.modules.get("GoogleDrive")
+            return "__Can't pass ID while replying to message.__"
 
         if ctx.msg.reply_to_message:
             reply_msg = ctx.msg.reply_to_message
-            msg_id = reply_msg.message_id
-
-            i: Union[Tuple[int, asyncio.Task], None]
-            j: Union[Tuple[int, asyncio.Task], None]
-            for i, j in zip_longest(drive.task.copy(), self.task.copy()):
-                if i is not None:
-                    m_id = i[0]
-                    task = i[1]
-                    if m_id == msg_id:
-                        task.cancel()
-                        drive.task.remove((m_id, task))
-                        break
-
-                if j is not None:
-                    m_id = j[0]
-                    task = j[1]
-                    if m_id == msg_id:
-                        task.cancel()
-                        self.task.remove((m_id, task))
-                        break
-            else:
-                return "__The message you choose is not in task.__"
-
-            await ctx.msg.delete()
-
-            return
-
-        gid = ctx.input
-        if aria2 is None and gid:
-            return "__Aria2 is not loaded.__"
-
-        ret = await aria2.cancelMirror(gid)
-        if ret is None:
-            await ctx.msg.delete()
+            ref = (reply_msg.chat.id, reply_msg.message_id)
+        elif ctx.input.isdigit() and self.bot.get_transfer(ctx.input) is None:
+            ref = int(ctx.input)
+        else:
+            ref = ctx.input
 
-        return ret
+        job = await self.bot.cancel_transfer(ref)
+        if job is None:
+            return "__The job you choose is not running or queued.__"
 
-    @command.desc("Cancel Uploads or Downloads")
-    async def cmd_cancel(self, ctx: command.Context) -> Tuple[str, int]:
-        reply = ctx.msg.reply_to_message
-        if reply:
-            reply.cancel_the_process()
-            return "`added your request to the cancel list`", 5
-        return "`reply to the message you want to cancel`", 5
+        await ctx.msg.delete()
+        return None
+
+    @command.desc("List running and queued uploads and downloads")
+    async def cmd_jobs(self, ctx: command.Context) -> str:
+        jobs = self.bot.list_transfers()
+        if not jobs:
+            return "__No transfers running.__"
+
+        lines = []
+        for job in jobs:
+            line = f"`{job.id}` {job.kind} `{job.name}`"
+            if job.state == "running" and job.progress is not None:
+                progress = job.progress
+                if progress.total:
+                    percent = round(progress.current / progress.total * 100)
+                    line += f" {percent}%"
+            if job.limit:
+                human = util.misc.human_readable_bytes
+                line += f" @ {human(job.limit, postfix='/s')}"
+            if job.state == "queued":
+                line += f" — __queued, priority {job.priority}__"
+            lines.append(line)
+
+        running = sum(self.bot.transfers_running.values())
+        return f"**Transfers** ({running} running):\n" + "\n".join(lines)
@@ -78,39 +78,47 @@ class ModerationModule(module.Module):
             lines = [f"**Banned {len(user_ids)} users:**"]
             await ctx.respond(f"Banning {len(user_ids)} users...")
 
-        for user_id in user_ids:
-            try:
-                user = await self.bot.client.get_users(user_id)
-            except ValueError:
+        banned: List[int] = []
+        try:
+            for user_id in user_ids:
+                try:
+                    user = await self.bot.get_user(user_id)
+                except ValueError:
+                    if single_user:
+                        lines.append(f"__Unable to find user__ `{user_id}`.")
+                    else:
+                        lines.append(f"Unable to find user `{user_id}`")
+
+                    continue
+
+                if not isinstance(user, pyrogram.types.User):
+                    ent_type = type(user).__name__.lower()
+                    lines.append(f"Skipped {ent_type} object (`{user_id}`)")
+                    continue
+
+                user_spec = f"{util.tg.mention_user(user)} (`{user_id}`)"
                 if single_user:
-                    lines.append(f"__Unable to find user__ `{user_id}`.")
+                    lines.append(f"**Banned** {user_spec}")
                 else:
-                    lines.append(f"Unable to find user `{user_id}`")
-
-                continue
+                    lines.append(user_spec)
 
-            if not isinstance(user, pyrogram.types.User):
-                ent_type = type(user).__name__.lower()
-                lines.append(f"Skipped {ent_type} object (`{user_id}`)")
-                continue
+                is_administrator = bool(
+                    (await self.bot.get_chat_member(ctx.msg.chat.id, user.id)
+                    ).status == "administrator")
 
-            user_spec = f"{util.tg.mention_user(user)} (`{user_id}`)"
-            if single_user:
-                lines.append(f"**Banned** {user_spec}")
-            else:
-                lines.append(user_spec)
+                if is_administrator:
+                    return "__I'm not gonna ban admin.__"
 
-            is_administrator = bool(
-                (await self.bot.client.get_chat_member(ctx.msg.chat.id, user.id)
-                ).status == "administrator")
+                try:
+                    await ctx.msg.chat.kick_member(user.id)
+                except pyrogram.errors.UserAdminInvalid:
+                    return "__I need permission to ban users in this chat.__"
 
-            if is_administrator:
-                return "__I'm not gonna ban admin.__"
-
-            try:
-                await ctx.msg.chat.kick_member(user.id)
-            except pyrogram.errors.UserAdminInvalid:
-                return "__I need permission to ban users in this chat.__"
+                banned.append(user.id)
+        finally:
+            # Their cached membership no longer holds
+            if banned:
+                await self.bot.invalidate_entity(ctx.msg.chat.id, *banned)
 
         return util.text.join_list(lines)
 
@@ -142,29 +150,36 @@ class ModerationModule(module.Module):
         status_text = f"Pruning deleted members{_chat_name}..."
         await ctx.respond(status_text)
 
-        for member in all_members:
-            if not member.user.is_deleted:
-                continue
-
-            try:
-                await self.bot.client.kick_chat_member(chat, member.user.id)
-            except pyrogram.errors.ChatAdminRequired:
-                return "__I'm not an admin.__"
-            except pyrogram.errors.UserAdminInvalid:
-                err_count += 1
-            else:
-                pruned_count += 1
-
-            percent_done = int((idx + 1) / total_count * 100)
-            now = datetime.now()
-            delta = now - last_time
-            if delta.total_seconds() >= 5:
-                await ctx.respond(
-                    f"{status_text} {percent_done}% done ({idx + 1} of {total_count} processed; {pruned_count} banned; {err_count} failed)"
-                )
-
-            last_time = now
-            idx += 1
+        pruned: List[int] = []
+        try:
+            for member in all_members:
+                if not member.user.is_deleted:
+                    continue
+
+                try:
+                    await self.bot.client.kick_chat_member(chat, member.user.id)
+                except pyrogram.errors.ChatAdminRequired:
+                    return "__I'm not an admin.__"
+                except pyrogram.errors.UserAdminInvalid:
+                    err_count += 1
+                else:
+                    pruned_count += 1
+                    pruned.append(member.user.id)
+
+                percent_done = int((idx + 1) / total_count * 100)
+                now = datetime.now()
+                delta = now - last_time
+                if delta.total_seconds() >= 5:
+                    await ctx.respond(
+                        f"{status_text} {percent_done}% done ({idx + 1} of {total_count} processed; {pruned_count} banned; {err_count} failed)"
+                    )
+
+                last_time = now
+                idx += 1
+        finally:
+            if pruned:
+                await self.bot.invalidate_entity(getattr(chat, "id", chat),
+                                                 *pruned)
 
         percent_pruned = int(pruned_count / total_count * 100)
         return f"Pruned {pruned_count} deleted users{_chat_name2} — {percent_pruned}% of the original member count."
@@ -177,9 +192,8 @@ class ModerationModule(module.Module):
             return "__Reply to a message.__"
 
         if ctx.msg.chat.type in ["group", "supergroup"]:
-            perm = (await
-                    ctx.bot.client.get_chat_member(ctx.msg.chat.id,
-                                                   "me")).can_delete_messages
+            perm = (await ctx.bot.get_chat_member(ctx.msg.chat.id,
+                                                  "me")).can_delete_messages
             if perm is not True:
                 return "__You can't delete message in this chat.__"
 
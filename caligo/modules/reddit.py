@@ -4,6 +4,7 @@
 #
 #  Copyright (C) 2021 - Kraken
 
+import functools
 import re
 from typing import ClassVar, Dict, List, Optional, Pattern, Union
 
@@ -104,7 +105,8 @@ class Reddit(module.Module):
             )
             buttons = None
         if res["media_url"].endswith(".gif"):
-            await ctx.client.send_animation(
+            call = functools.partial(
+                ctx.client.send_animation,
                 chat_id=chat_id,
                 animation=res["media_url"],
                 caption=caption,
@@ -112,13 +114,15 @@ class Reddit(module.Module):
                 reply_markup=buttons,
             )
         else:
-            await ctx.client.send_photo(
+            call = functools.partial(
+                ctx.client.send_photo,
                 chat_id=chat_id,
                 photo=res["media_url"],
                 caption=caption,
                 reply_to_message_id=reply_id,
                 reply_markup=buttons,
             )
+        await ctx.client.scheduler.send(chat_id, call)
         return True
 
     @listener.pattern(r"(?i)^reddit(?:\s+(?:r/)?([a-z]+)\.)?$")
@@ -4,6 +4,7 @@
 #
 #  Copyright (C) 2021 - Kraken
 
+import functools
 from typing import ClassVar
 
 from pyrogram.errors import BadRequest
@@ -26,7 +27,8 @@ class Smd(module.Module):
                     query=ctx.input.strip(),
                     limit=1,
                     filter="audio"):
-                await m.copy(chat_id, caption="")
+                copy = functools.partial(m.copy, chat_id, caption="")
+                await ctx.bot.client.scheduler.send(chat_id, copy)
                 break
             else:
                 return "⚠️ __Song Not Found !__"
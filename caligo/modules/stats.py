@@ -1,5 +1,7 @@
 import asyncio
-from typing import Any, ClassVar, Dict, Optional
+from collections import Counter
+from datetime import datetime
+from typing import Any, ClassVar, Dict, Optional, Sequence
 
 import pyrogram
 from motor.motor_asyncio import AsyncIOMotorDatabase
@@ -9,6 +11,32 @@ from .. import command, module, util
 USEC_PER_HOUR = 60 * 60 * 1000000
 USEC_PER_DAY = USEC_PER_HOUR * 24
 
+STAT_KEYS = (
+    "start_time_usec",
+    "sent",
+    "sent_stickers",
+    "sent_edits",
+    "received",
+    "received_stickers",
+    "received_edits",
+    "processed",
+    "stickers_created",
+    "kangs_api",
+    "kangs_api_usec",
+    "kangs_chat",
+    "kangs_chat_usec",
+)
+
+# Stat keys that also feed the hourly/daily history, and the field they go to
+HISTORY_FIELDS = ("messages", "commands", "stickers")
+HISTORY_STATS = {
+    "sent": "messages",
+    "received": "messages",
+    "processed": "commands",
+    "sent_stickers": "stickers",
+    "received_stickers": "stickers",
+}
+
 
 def _calc_pct(num1: int, num2: int) -> str:
     if not num2:
@@ -27,11 +55,46 @@ def _calc_pd(stat: int, uptime: int) -> str:
     return "{:.1f}".format(stat / up_day).rstrip("0").rstrip(".")
 
 
+def _calc_avg(total_us: int, count: int) -> str:
+    if not count:
+        return "n/a"
+
+    return util.time.format_duration_us(total_us // count)
+
+
+def _format_bucket(values: Dict[str, int], unit: str) -> str:
+    return (f"{values['messages']} msgs/{unit} • "
+            f"{values['commands']} cmds/{unit} • "
+            f"{values['stickers']} stickers/{unit}")
+
+
 class StatsModule(module.Module):
     name: ClassVar[str] = "Stats"
+    # Keeps time since the first start, so it can't wait for first use
+    lazy: ClassVar[bool] = False
+    reload_state: ClassVar[Sequence[str]] = ("db", "history_db", "lock",
+                                             "pending", "pending_count",
+                                             "history")
+
+    # Pending increments are written out every FLUSH_INTERVAL seconds or
+    # as soon as FLUSH_THRESHOLD of them have piled up, whichever is first
+    FLUSH_INTERVAL: ClassVar[int] = 30
+    FLUSH_THRESHOLD: ClassVar[int] = 100
+
+    # Number of hourly and daily buckets kept in the history ring buffers
+    HISTORY_HOURS: ClassVar[int] = 48
+    HISTORY_DAYS: ClassVar[int] = 30
 
     db: AsyncIOMotorDatabase
+    history_db: AsyncIOMotorDatabase
     lock: asyncio.Lock
+    pending: Counter
+    pending_count: int
+
+    history: Optional[util.timeseries.TimeSeries] = None
+
+    _flush_task: Optional[asyncio.Task] = None
+    _timer_task: Optional[asyncio.Task] = None
 
     async def get(self, key: str) -> Dict[str, Any]:
         collection = await self.db.find_one({"_id": self.name})
@@ -40,6 +103,24 @@ class StatsModule(module.Module):
 
         return None
 
+    async def snapshot(self, *keys: str) -> Dict[str, Any]:
+        """Returns the stored stats merged with counts not flushed yet.
+
+        The document is fetched once, projected to the given keys (or every
+        key if none are given)."""
+
+        projection = {key: True for key in keys} if keys else None
+        doc = await self.db.find_one({"_id": self.name}, projection) or {}
+        doc.pop("_id", None)
+
+        for key, value in self.pending.items():
+            if keys and key not in keys:
+                continue
+
+            doc[key] = doc.get(key, 0) + value
+
+        return doc
+
     async def inc(self, key: str, value: int) -> None:
         async with self.lock:
             await self.db.find_one_and_update({"_id": self.name},
@@ -48,6 +129,97 @@ class StatsModule(module.Module):
                                               }},
                                               upsert=True)
 
+    def queue(self, key: str, value: int = 1) -> None:
+        """Accumulates an increment in memory until the next flush."""
+
+        self.pending[key] += value
+        self.pending_count += 1
+
+        field = HISTORY_STATS.get(key)
+        if field is not None:
+            self.history.add(util.time.usec(), field, value)
+
+        if self.pending_count >= self.FLUSH_THRESHOLD and (
+                self._flush_task is None or self._flush_task.done()):
+            self._flush_task = self.bot.loop.create_task(self.flush())
+
+    async def flush(self) -> None:
+        """Writes all pending increments with a single $inc update."""
+
+        async with self.lock:
+            if not self.pending:
+                return
+
+            pending, pending_count = self.pending, self.pending_count
+            self.pending = Counter()
+            self.pending_count = 0
+            try:
+                await self.db.find_one_and_update({"_id": self.name},
+                                                  {"$inc": dict(pending)},
+                                                  upsert=True)
+            except Exception:
+                # Put the counts back so the next flush retries them
+                self.pending.update(pending)
+                self.pending_count += pending_count
+                raise
+
+            await self.flush_history()
+
+    async def flush_history(self) -> None:
+        """Persists changed history buckets and drops ones that aged out."""
+
+        changed = [("hour", self.history.hourly.pop_dirty()),
+                   ("day", self.history.daily.pop_dirty())]
+        try:
+            for span, buckets in changed:
+                for bucket, values in buckets:
+                    await self.history_db.find_one_and_update(
+                        {"_id": f"{span}-{bucket}"},
+                        {"$set": {
+                            "span": span,
+                            "bucket": bucket,
+                            **values
+                        }},
+                        upsert=True,
+                    )
+        except Exception:
+            for (_, buckets), ring in zip(
+                    changed, (self.history.hourly, self.history.daily)):
+                ring.dirty.update(bucket for bucket, _ in buckets)
+            raise
+
+        if changed[1][1]:
+            # Something was rolled up, so old hours/days have left the rings
+            now = util.time.usec()
+            for span, ring in (("hour", self.history.hourly),
+                               ("day", self.history.daily)):
+                await self.history_db.delete_many({
+                    "span": span,
+                    "bucket": {
+                        "$lte": ring.bucket(now) - ring.size
+                    }
+                })
+
+    async def load_history(self) -> None:
+        self.history = util.timeseries.TimeSeries(HISTORY_FIELDS,
+                                                  hours=self.HISTORY_HOURS,
+                                                  days=self.HISTORY_DAYS)
+
+        now = util.time.usec()
+        # Days before hours, so hours that aged out while the bot was down
+        # roll up into their day instead of being overwritten by it
+        docs = self.history_db.find({}).sort([("span", 1), ("bucket", 1)])
+        async for doc in docs:
+            self.history.load(doc["span"], doc["bucket"], doc, now)
+
+    async def _flush_timer(self) -> None:
+        while True:
+            await asyncio.sleep(self.FLUSH_INTERVAL)
+            try:
+                await self.flush()
+            except Exception as e:  # skipcq: PYL-W0703
+                self.log.error("Failed to flush stats", exc_info=e)
+
     async def delete(self, key: str) -> None:
         async with self.lock:
             await self.db.find_one_and_update({"_id": self.name},
@@ -58,33 +230,67 @@ class StatsModule(module.Module):
     async def put(self, key: str, value: int) -> None:
         async with self.lock:
             await self.db.find_one_and_update({"_id": self.name},
-                                              {"$set": {{
+                                              {"$set": {
                                                   key: value
-                                              }}},
+                                              }},
                                               upsert=True)
 
     async def on_load(self) -> None:
         self.db = self.bot.get_db("stats")
         self.lock = asyncio.Lock()
+        self.pending = Counter()
+        self.pending_count = 0
+
+        # History survives stats resets, only load it once
+        self.history_db = self.bot.get_db("stats_history")
+        if self.history is None:
+            await self.load_history()
 
-        if await self.get("stop_time_usec") or await self.get("uptime"):
+        stats = await self.snapshot("stop_time_usec", "uptime")
+        if stats.get("stop_time_usec") or stats.get("uptime"):
             self.log.info("Migrating stats timekeeping format")
 
-        last_time = await self.get("stop_time_usec")
+        uptime = stats.get("uptime")
+        last_time = stats.get("stop_time_usec")
         if last_time is not None:
-            await self.inc("uptime", util.time.usec() - last_time)
+            uptime = (uptime or 0) + util.time.usec() - last_time
             await self.delete("stop_time_usec")
 
-        uptime = await self.get("uptime")
         if uptime is not None:
             await self.put("start_time_usec", self.bot.start_time_us - uptime)
             await self.delete("uptime")
 
+    async def save_state(self) -> Dict[str, Any]:
+        if self._timer_task is not None:
+            self._timer_task.cancel()
+            self._timer_task = None
+
+        # Wait out a running flush so it can't swap the counters we hand over
+        if self._flush_task is not None:
+            await asyncio.wait([self._flush_task])
+
+        async with self.lock:
+            return await super().save_state()
+
+    async def restore_state(self, state: Dict[str, Any]) -> None:
+        await super().restore_state(state)
+        self._timer_task = self.bot.loop.create_task(self._flush_timer())
+
     async def on_start(self, time_us: int) -> None:
         # Initialize start_time_usec for new instances
         if not await self.db.find_one({"_id": self.name}):
             await self.inc("start_time_usec", time_us)
 
+        if self._timer_task is None or self._timer_task.done():
+            self._timer_task = self.bot.loop.create_task(self._flush_timer())
+
+    async def on_stop(self) -> None:
+        if self._timer_task is not None:
+            self._timer_task.cancel()
+            self._timer_task = None
+
+        await self.flush()
+
     async def on_message(self, msg: pyrogram.types.Message) -> None:
         stat = "sent" if msg.outgoing else "received"
         await self.bot.log_stat(stat)
@@ -104,36 +310,68 @@ class StatsModule(module.Module):
     ) -> None:
         await self.bot.log_stat("processed")
 
-    async def on_stat_event(self, key: str) -> None:
-        await self.inc(key, 1)
+    async def on_stat_event(self, key: str, value: int = 1) -> None:
+        self.queue(key, value)
 
     async def get_start_time(self) -> int:
-        return await self.get("start_time_usec") or self.bot.start_time_us
-
-    @command.desc("Show chat stats (pass `reset` to reset stats)")
-    @command.usage('["reset" to reset stats?]', optional=True)
+        stats = await self.snapshot("start_time_usec")
+        return stats.get("start_time_usec") or self.bot.start_time_us
+
+    def format_history(self, hours: int = 12, days: int = 7) -> str:
+        now = util.time.usec()
+
+        hourly = {
+            datetime.utcfromtimestamp(start / 1000000).strftime("%H:00"):
+                _format_bucket(values, "h")
+            for start, values in self.history.last_hours(now, hours)
+        }
+        daily = {
+            datetime.utcfromtimestamp(start / 1000000).strftime("%Y-%m-%d"):
+                _format_bucket(values, "day")
+            for start, values in self.history.last_days(now, days)
+        }
+
+        return (util.text.join_map(hourly,
+                                   heading=f"Last {len(hourly)} hours (UTC)") +
+                "\n\n" +
+                util.text.join_map(daily, heading=f"Last {len(daily)} days"))
+
+    @command.desc(
+        "Show chat stats (pass `reset` to reset stats or `history` for hourly/daily rates)"
+    )
+    @command.usage('["reset" to reset stats or "history"?]', optional=True)
     @command.alias("stat")
     async def cmd_stats(self, ctx: command.Context) -> str:
+        if ctx.input == "history":
+            return self.format_history()
+
         if ctx.input == "reset":
+            async with self.lock:
+                self.pending.clear()
+                self.pending_count = 0
             await self.db.find_one_and_delete({"_id": self.name})
             await self.on_load()
             await self.on_start(util.time.usec())
             return "__All stats have been reset.__"
 
-        start_time: Optional[int] = await self.get("start_time_usec")
+        stats = await self.snapshot(*STAT_KEYS)
+
+        start_time: Optional[int] = stats.get("start_time_usec")
         if start_time is None:
             start_time = util.time.usec()
             await self.put("start_time_usec", start_time)
         uptime = util.time.usec() - start_time
 
-        sent: int = await self.get("sent") or 0
-        sent_stickers: int = await self.get("sent_stickers") or 0
-        sent_edits: int = await self.get("sent_edits") or 0
-        recv: int = await self.get("received") or 0
-        recv_stickers: int = await self.get("received_stickers") or 0
-        recv_edits: int = await self.get("received_edits") or 0
-        processed: int = await self.get("processed") or 0
-        stickers: int = await self.get("stickers_created") or 0
+        sent: int = stats.get("sent", 0)
+        sent_stickers: int = stats.get("sent_stickers", 0)
+        sent_edits: int = stats.get("sent_edits", 0)
+        recv: int = stats.get("received", 0)
+        recv_stickers: int = stats.get("received_stickers", 0)
+        recv_edits: int = stats.get("received_edits", 0)
+        processed: int = stats.get("processed", 0)
+        stickers: int = stats.get("stickers_created", 0)
+        kangs_api: int = stats.get("kangs_api", 0)
+        kangs_chat: int = stats.get("kangs_chat", 0)
 
         return util.text.join_map(
             {
@@ -149,6 +387,9 @@ class StatsModule(module.Module):
                     f"{processed} ({_calc_ph(processed, uptime)}/h) • {_calc_pct(processed, sent)}% of sent messages",
                 "Stickers created":
                     f"{stickers} ({_calc_pd(stickers, uptime)}/day)",
+                "Sticker kang time":
+                    f"{kangs_api} via bot API (avg {_calc_avg(stats.get('kangs_api_usec', 0), kangs_api)}) • "
+                    f"{kangs_chat} via @Stickers (avg {_calc_avg(stats.get('kangs_chat_usec', 0), kangs_chat)})",
             },
             heading="Stats since last reset",
         )
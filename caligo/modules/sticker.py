@@ -1,114 +1,548 @@
 import asyncio
+import codecs
+import functools
 import io
+import re
+from collections import Counter, deque
 from datetime import datetime
-from typing import ClassVar, Optional, Set, Tuple, Union
+from html.parser import HTMLParser
+from typing import (
+    Any,
+    Awaitable,
+    BinaryIO,
+    Callable,
+    ClassVar,
+    Dict,
+    List,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Union,
+)
 from urllib.parse import quote
 
+import aiohttp
 import pyrogram
-from aiofile import AIOFile
-from bs4 import BeautifulSoup as soup
 from cloudscraper import create_scraper
-from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
-from pyrogram.errors import StickersetInvalid
-from pyrogram.raw.functions.messages import GetStickerSet
-from pyrogram.raw.types import InputStickerSetShortName
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pyrogram.errors import PeerIdInvalid, RPCError, StickersetInvalid
+from pyrogram.file_id import FileId, FileType, FileUniqueId, FileUniqueType
+from pyrogram.raw.functions.messages import GetStickerSet, UploadMedia
+from pyrogram.raw.functions.stickers import AddStickerToSet, CreateStickerSet
+from pyrogram.raw.types import (
+    Document,
+    DocumentAttributeFilename,
+    InputDocument,
+    InputMediaUploadedDocument,
+    InputStickerSetItem,
+    InputStickerSetShortName,
+    InputUser,
+)
 
 from .. import command, module, util
-
-PNG_MAGIC = b"\x89\x50\x4e\x47\x0d\x0a\x1a\x0a"
+from ..conversation import Conversation
 
 # Sticker bot info and return error strings
 STICKER_BOT_USERNAME = "Stickers"
+# Most messages copied by a single batch kang
+BATCH_LIMIT = 50
+# Telegram's limits of static and animated stickers in one pack
+PACK_LIMIT = 120
+ANIMATED_PACK_LIMIT = 50
+# Longest short name Telegram accepts for a pack
+PACK_NAME_LIMIT = 64
+# Stickers downloaded at once while cloning a pack
+CLONE_CONCURRENCY = 4
+# Stickers added per sticker bot session while cloning a pack
+CLONE_BATCH = 30
+# Seconds before cached pack metadata is checked against Telegram again
+PACK_REFRESH_INTERVAL = 24 * 60 * 60
+# Sticker pack search
+SEARCH_URL = "https://combot.org/telegram/stickers"
+SEARCH_LIMIT = 20
+SEARCH_CACHE_TTL = 60 * 60
+
+
+def _glitch_func() -> Callable[..., bytes]:
+    """Returns util.glitch.glitch, importing NumPy only once it's needed."""
+
+    from ..util import glitch
+
+    return glitch.glitch
 
 
 class LengthMismatchError(Exception):
     pass
 
 
+class PackSearchParser(HTMLParser):
+    """Collects (title, link) pairs of packs from a combot search page.
+
+    Only pack headers with an add button are real results. Feeding can
+    stop as soon as done is set, without reading the rest of the page."""
+
+    limit: int
+    results: List[Tuple[str, str]]
+
+    def __init__(self, limit: int) -> None:
+        super().__init__()
+
+        self.limit = limit
+        self.results = []
+
+        # Div nesting inside the current pack header, 0 outside of one
+        self._depth = 0
+        self._title_depth = 0
+        self._title: List[str] = []
+        self._link: Optional[str] = None
+        self._button = False
+
+    @property
+    def done(self) -> bool:
+        return len(self.results) >= self.limit
+
+    def handle_starttag(self, tag: str,
+                        attrs: List[Tuple[str, Optional[str]]]) -> None:
+        attributes = dict(attrs)
+        classes = (attributes.get("class") or "").split()
+        if not self._depth:
+            if tag == "div" and "sticker-pack__header" in classes:
+                self._depth = 1
+                self._title = []
+                self._link = None
+                self._button = False
+
+            return
+
+        if tag == "div":
+            self._depth += 1
+            if "sticker-pack__title" in classes:
+                self._title_depth = self._depth
+        elif tag == "a" and self._link is None:
+            self._link = attributes.get("href")
+        elif tag == "button":
+            self._button = True
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag != "div" or not self._depth:
+            return
+
+        if self._depth == self._title_depth:
+            self._title_depth = 0
+        self._depth -= 1
+        if not self._depth and self._button and self._link and not self.done:
+            self.results.append(("".join(self._title).strip(), self._link))
+
+    def handle_data(self, data: str) -> None:
+        if self._title_depth:
+            self._title.append(data)
+
+
+def _next_vol(vol: str) -> str:
+    prefix, num = re.match(r"(.*?)(\d*)$", vol).groups()
+    return prefix + str(int(num or 1) + 1)
+
+
 class StickerModule(module.Module):
     name: ClassVar[str] = "Sticker"
 
     db: AsyncIOMotorDatabase
-    kang_db: AsyncIOMotorCollection
+    # Pack VOL -> pack short name
+    kang_db: Dict[str, str]
+    # Pack short name -> {"count", "animated", "checked"}
+    pack_info: Dict[str, Dict[str, Any]]
+    # The sticker bot keeps one session per user, so take turns with it
+    lock: asyncio.Lock
+    image_cache: util.image.ImageCache
+    # Lowercased query -> (time fetched, results)
+    search_cache: Dict[str, Tuple[int, List[Tuple[str, str]]]]
 
     async def on_load(self):
         self.db = self.bot.get_db("stickers")
+        self.lock = asyncio.Lock()
+        self.search_cache = {}
+        self.image_cache = util.image.ImageCache(
+            max_size=self.bot.getConfig.image_cache_size * 1024 * 1024)
+
+        check = await self.db.find_one({"_id": self.name}) or {}
+        self.kang_db = check.get("pack_name", {})
+        self.pack_info = check.get("packs", {})
+
+    def latest_vol(self) -> str:
+        return max((vol for vol in self.kang_db if vol.isdigit()),
+                   key=int,
+                   default="1")
 
-        check = await self.db.find_one({"_id": self.name})
-        self.kang_db = check.get("pack_name") if check is not None else None
+    async def get_pack_info(self, pack_name: str) -> Optional[Dict[str, Any]]:
+        """Returns cached metadata of a pack, or None if it doesn't exist.
+
+        Telegram is only asked for packs we haven't seen or haven't
+        checked in a while."""
+
+        info = self.pack_info.get(pack_name)
+        if info is not None and (util.time.sec() - info["checked"] <
+                                 PACK_REFRESH_INTERVAL):
+            return info
+
+        try:
+            result = await self.bot.client.send(
+                GetStickerSet(stickerset=InputStickerSetShortName(
+                    short_name=pack_name)))
+        except StickersetInvalid:
+            if self.pack_info.pop(pack_name, None) is not None:
+                await self.db.update_one({"_id": self.name},
+                                         {"$unset": {
+                                             f"packs.{pack_name}": ""
+                                         }})
+            return None
+
+        info = {
+            "count": result.set.count,
+            "animated": bool(result.set.animated),
+            "checked": util.time.sec(),
+        }
+        await self.save_pack(pack_name, info)
+        return info
+
+    async def save_pack(self,
+                        pack_name: str,
+                        info: Dict[str, Any],
+                        vol: Optional[str] = None) -> None:
+        self.pack_info[pack_name] = info
+        update = {f"packs.{pack_name}": info}
+        if vol is not None:
+            self.kang_db[vol] = pack_name
+            update[f"pack_name.{vol}"] = pack_name
+
+        await self.db.update_one({"_id": self.name}, {"$set": update},
+                                 upsert=True)
+
+    async def kang(
+        self,
+        stickers: Sequence[Tuple[BinaryIO, str]],
+        vol: Optional[str] = None,
+    ) -> Tuple[int, List[str], List[str]]:
+        """Adds stickers to our kang packs, moving on to the next VOL (and
+        creating it) whenever a pack fills up.
+
+        Returns how many were added, errors for the rest, and the names of
+        the packs that received stickers. Stickers are numbered from 1 in
+        errors for the ones never tried after an earlier one failed."""
+
+        vol = vol or self.latest_vol()
+        total = len(stickers)
+        added = 0
+        errors = []
+        packs = []
+        while stickers:
+            pack_name = self.kang_db.get(vol)
+            info = await self.get_pack_info(pack_name) if pack_name else None
+            if info is None:
+                # Missing or deleted pack, start it with the first sticker
+                pack_name = pack_name or self.pack_name(vol)
+                (sticker, emoji), stickers = stickers[0], stickers[1:]
+                status, result = await self.create_pack(sticker,
+                                                        pack_name,
+                                                        emoji=emoji)
+                if not status:
+                    errors.append(result)
+                    break
+
+                info = {
+                    "count": 1,
+                    "animated": False,
+                    "checked": util.time.sec()
+                }
+                await self.save_pack(pack_name, info, vol=vol)
+                added += 1
+                packs.append(pack_name)
+                continue
+
+            limit = ANIMATED_PACK_LIMIT if info["animated"] else PACK_LIMIT
+            room = limit - info["count"]
+            if room <= 0:
+                vol = _next_vol(vol)
+                continue
+
+            batch, stickers = stickers[:room], stickers[room:]
+            count, batch_errors = await self.add_stickers(batch, pack_name)
+            errors += batch_errors
+            if count:
+                added += count
+                if pack_name not in packs:
+                    packs.append(pack_name)
+                info["count"] += count
+            if count < len(batch):
+                # Our count may be off, check it on next use
+                info["checked"] = 0
+            await self.save_pack(pack_name, info)
+
+            if batch_errors:
+                # The session may have stopped before the end of the batch
+                tried = count + len(batch_errors)
+                stickers = list(batch[tried:]) + list(stickers)
+                break
+
+        errors += (f"Sticker {num}: not added after the error above"
+                   for num in range(total - len(stickers) + 1, total + 1))
+
+        return added, errors, packs
+
+    def pack_name(self, num: str) -> str:
+        return self.owned_name(f"{self.bot.user.username}_kangPack_VOL{num}")
+
+    def owned_name(self, name: str) -> str:
+        if self.bot.has_bot:
+            # Only packs named after the bot can be managed by it
+            suffix = f"_by_{self.bot.bot_user.username}"
+            return name[:PACK_NAME_LIMIT - len(suffix)] + suffix
+
+        return name[:PACK_NAME_LIMIT]
+
+    def is_bot_pack(self, pack_name: str) -> bool:
+        return self.bot.has_bot and pack_name.endswith(
+            f"_by_{self.bot.bot_user.username}")
+
+    async def _record_kang(self, path: str, count: int, start: int) -> None:
+        await self.bot.log_stat(f"kangs_{path}", count)
+        await self.bot.log_stat(f"kangs_{path}_usec", util.time.usec() - start)
 
     async def add_sticker(
         self,
-        sticker_data: Union[pyrogram.types.Sticker, bytes],
+        sticker_data: Union[pyrogram.types.Sticker, BinaryIO],
         pack_name: str,
         emoji: str = "❓",
         *,
         target: str = STICKER_BOT_USERNAME,
     ) -> Tuple[bool, str]:
-        commands = [
-            ("text", "/cancel", None),
-            ("text", "/addsticker", "Choose the sticker pack"),
-            ("text", pack_name, "send me the sticker"),
-            ("file", sticker_data, "send me an emoji"),
-            ("text", emoji, "added your sticker"),
-            ("text", "/done", "done"),
-        ]
+        added, errors = await self.add_stickers([(sticker_data, emoji)],
+                                                pack_name,
+                                                target=target)
+        if not added:
+            return False, errors[0]
 
-        success = False
-        before = datetime.now()
+        return True, f"https://t.me/addstickers/{pack_name}"
 
-        async with self.bot.conversation(target) as conv:
+    async def add_stickers(
+        self,
+        stickers: Sequence[Tuple[Union[pyrogram.types.Sticker, BinaryIO],
+                                 str]],
+        pack_name: str,
+        *,
+        target: str = STICKER_BOT_USERNAME,
+    ) -> Tuple[int, List[str]]:
+        """Adds (sticker, emoji) pairs to a pack in order.
 
-            async def reply_and_ack():
-                # Wait for a response
-                resp = await conv.get_response()
-                # Ack the response to suppress its notification
-                await conv.mark_read()
+        Returns how many were added along with an error for each one that
+        wasn't."""
 
-                return resp
+        start = util.time.usec()
+        if self.is_bot_pack(pack_name):
+            path = "api"
+            added, errors = await self._api_add_stickers(stickers, pack_name)
+        else:
+            path = "chat"
+            added, errors = await self._chat_add_stickers(stickers,
+                                                          pack_name,
+                                                          target=target)
 
+        if added:
+            await self._record_kang(path, added, start)
+
+        return added, errors
+
+    async def create_pack(
+        self,
+        sticker_data: Union[pyrogram.types.Sticker, BinaryIO],
+        pack_name: str,
+        emoji: str = "❓",
+        *,
+        target: str = STICKER_BOT_USERNAME,
+    ) -> Tuple[bool, str]:
+        start = util.time.usec()
+        if self.is_bot_pack(pack_name):
+            path = "api"
+            status, result = await self._api_create_pack(
+                sticker_data, pack_name, emoji)
+        else:
+            path = "chat"
+            status, result = await self._chat_create_pack(sticker_data,
+                                                          pack_name,
+                                                          emoji,
+                                                          target=target)
+
+        if status:
+            await self._record_kang(path, 1, start)
+
+        return status, result
+
+    async def _owner_peer(self) -> InputUser:
+        peer = await self.bot.client.bot.resolve_peer(self.bot.uid)
+        return InputUser(user_id=peer.user_id, access_hash=peer.access_hash)
+
+    async def _upload_sticker(self, sticker_data: BinaryIO) -> InputDocument:
+        client = self.bot.client.bot
+        media = await client.send(
+            UploadMedia(
+                peer=await client.resolve_peer(self.bot.uid),
+                media=InputMediaUploadedDocument(
+                    file=await client.save_file(sticker_data),
+                    mime_type="image/png",
+                    attributes=[
+                        DocumentAttributeFilename(file_name="sticker.png")
+                    ],
+                ),
+            ))
+
+        doc = media.document
+        return InputDocument(id=doc.id,
+                             access_hash=doc.access_hash,
+                             file_reference=doc.file_reference)
+
+    async def _api_add_stickers(
+            self, stickers: Sequence[Tuple[BinaryIO, str]],
+            pack_name: str) -> Tuple[int, List[str]]:
+        # Uploads don't depend on each other, only the adds must keep order
+        documents = await asyncio.gather(
+            *(self._upload_sticker(data) for data, _ in stickers),
+            return_exceptions=True)
+
+        added = 0
+        errors = []
+        for document, (_, emoji) in zip(documents, stickers):
             try:
-                for cmd_type, data, expected_resp in commands:
-                    if cmd_type == "text":
-                        await conv.send_message(data)
-                    elif cmd_type == "file":
-                        await conv.send_file(data, force_document=True)
-                    else:
-                        raise TypeError(f"Unknown command type '{cmd_type}'")
+                if isinstance(document, BaseException):
+                    raise document
+
+                await self.bot.client.bot.send(
+                    AddStickerToSet(
+                        stickerset=InputStickerSetShortName(
+                            short_name=pack_name),
+                        sticker=InputStickerSetItem(document=document,
+                                                    emoji=emoji),
+                    ))
+            except PeerIdInvalid:
+                errors.append(f"__Start @{self.bot.bot_user.username} first "
+                              "so it can upload stickers for you.__")
+            except RPCError as e:
+                errors.append(f'Sticker creation failed: "{e}"')
+            else:
+                added += 1
 
-                    # Wait for both the rate-limit and the bot's response
-                    try:
-                        done: Set[asyncio.Future]
-                        resp_task = self.bot.loop.create_task(reply_and_ack())
-                        done, _ = await asyncio.wait(
-                            (resp_task, asyncio.sleep(0.25)))
-                        # Raise exceptions encountered in coroutines
-                        for fut in done:
-                            fut.result()
-
-                        response = resp_task.result()
-                        if expected_resp and expected_resp not in response.text:
-                            return False, f'Sticker creation failed: "{response.text}"'
-                    except asyncio.TimeoutError:
-                        after = datetime.now()
-                        delta_seconds = int((after - before).total_seconds())
+        return added, errors
 
-                        return (
-                            False,
-                            f"Sticker creation timed out after {delta_seconds} seconds.",
-                        )
+    async def _api_create_pack(self, sticker_data: BinaryIO, pack_name: str,
+                               emoji: str) -> Tuple[bool, str]:
+        try:
+            document = await self._upload_sticker(sticker_data)
+            await self.bot.client.bot.send(
+                CreateStickerSet(
+                    user_id=await self._owner_peer(),
+                    title=pack_name,
+                    short_name=pack_name,
+                    stickers=[
+                        InputStickerSetItem(document=document, emoji=emoji)
+                    ],
+                ))
+        except PeerIdInvalid:
+            return False, (f"__Start @{self.bot.bot_user.username} first so "
+                           "it can create packs for you.__")
+        except RPCError as e:
+            return False, f'Sticker creation failed: "{e}"'
+
+        return True, f"https://t.me/addstickers/{pack_name}"
 
+    async def _chat_step(self,
+                         conv: Conversation,
+                         data: Union[str, BinaryIO],
+                         *,
+                         file: bool = False) -> pyrogram.types.Message:
+        """Sends one step to the sticker bot and returns its response."""
+
+        if file:
+            await conv.send_file(data, force_document=True)
+        else:
+            await conv.send_message(data)
+
+        async def reply_and_ack():
+            # Wait for a response
+            resp = await conv.get_response()
+            # Ack the response to suppress its notification
+            await conv.mark_read()
+
+            return resp
+
+        # Wait for both the rate-limit and the bot's response
+        done: Set[asyncio.Future]
+        resp_task = self.bot.loop.create_task(reply_and_ack())
+        done, _ = await asyncio.wait((resp_task, asyncio.sleep(0.25)))
+        # Raise exceptions encountered in coroutines
+        for fut in done:
+            fut.result()
+
+        return resp_task.result()
+
+    async def _chat_add_stickers(
+        self,
+        stickers: Sequence[Tuple[Union[pyrogram.types.Sticker, BinaryIO],
+                                 str]],
+        pack_name: str,
+        *,
+        target: str = STICKER_BOT_USERNAME,
+    ) -> Tuple[int, List[str]]:
+        """Adds all stickers in a single /addsticker session."""
+
+        added = 0
+        errors = []
+        success = False
+        before = datetime.now()
+
+        async with self.lock, self.bot.conversation(
+                target, max_messages=4 + 2 * len(stickers)) as conv:
+            try:
+                await self._chat_step(conv, "/cancel")
+                for data, expected_resp in (
+                    ("/addsticker", "Choose the sticker pack"),
+                    (pack_name, "send me the sticker"),
+                ):
+                    response = await self._chat_step(conv, data)
+                    if expected_resp not in response.text:
+                        errors.append(
+                            f'Sticker creation failed: "{response.text}"')
+                        return added, errors
+
+                for sticker_data, emoji in stickers:
+                    # The bot keeps waiting for a sticker after a bad one
+                    response = await self._chat_step(conv,
+                                                     sticker_data,
+                                                     file=True)
+                    if "send me an emoji" in response.text:
+                        response = await self._chat_step(conv, emoji)
+                        if "added your sticker" in response.text:
+                            added += 1
+                            continue
+
+                    errors.append(f'Sticker creation failed: "{response.text}"')
+
+                await self._chat_step(conv, "/done")
                 success = True
+            except conv.Timeout:
+                after = datetime.now()
+                delta_seconds = int((after - before).total_seconds())
+                errors.append(
+                    f"Sticker creation timed out after {delta_seconds} seconds."
+                )
             finally:
                 # Cancel the operation if we return early
                 if not success:
                     await conv.send_message("/cancel")
 
-        return True, f"https://t.me/addstickers/{pack_name}"
+        return added, errors
 
-    async def create_pack(
+    async def _chat_create_pack(
         self,
-        sticker_data: Union[pyrogram.types.Sticker, bytes],
+        sticker_data: Union[pyrogram.types.Sticker, BinaryIO],
         pack_name: str,
         emoji: str = "❓",
         *,
@@ -128,39 +562,19 @@ class StickerModule(module.Module):
         success = False
         before = datetime.now()
 
-        async with self.bot.conversation(target, max_messages=9) as conv:
-
-            async def reply_and_ack():
-                # Wait for a response
-                resp = await conv.get_response()
-                # Ack the response to suppress its notification
-                await conv.mark_read()
-
-                return resp
-
+        async with self.lock, self.bot.conversation(target,
+                                                    max_messages=9) as conv:
             try:
                 for cmd_type, data, expected_resp in commands:
-                    if cmd_type == "text":
-                        await conv.send_message(data)
-                    elif cmd_type == "file":
-                        await conv.send_file(data, force_document=True)
-                    else:
+                    if cmd_type not in ("text", "file"):
                         raise TypeError(f"Unknown command type '{cmd_type}'")
 
-                    # Wait for both the rate-limit and the bot's response
                     try:
-                        done: Set[asyncio.Future]
-                        resp_task = self.bot.loop.create_task(reply_and_ack())
-                        done, _ = await asyncio.wait(
-                            (resp_task, asyncio.sleep(0.25)))
-                        # Raise exceptions encountered in coroutines
-                        for fut in done:
-                            fut.result()
-
-                        response = resp_task.result()
+                        response = await self._chat_step(
+                            conv, data, file=cmd_type == "file")
                         if expected_resp and expected_resp not in response.text:
                             return False, f'Sticker creation failed: "{response.text}"'
-                    except asyncio.TimeoutError:
+                    except conv.Timeout:
                         after = datetime.now()
                         delta_seconds = int((after - before).total_seconds())
 
@@ -177,6 +591,25 @@ class StickerModule(module.Module):
 
         return True, f"https://t.me/addstickers/{pack_name}"
 
+    def _loader(self, file_id: str) -> Callable[[], Awaitable[bytes]]:
+
+        async def load() -> bytes:
+            with await util.tg.fetch_media(self.bot.client, file_id) as file:
+                return file.read()
+
+        return load
+
+    async def download_png(self, msg: pyrogram.types.Message) -> io.BytesIO:
+        """Returns the image or sticker in a message as a sticker PNG,
+        downloading and converting it only if it isn't cached yet."""
+
+        media = msg.sticker or msg.photo
+        sticker_buf = io.BytesIO(await self.image_cache.convert(
+            media.file_unique_id, "sticker.png", self._loader(media.file_id),
+            util.image.sticker_png))
+        sticker_buf.name = "sticker.png"
+        return sticker_buf
+
     @command.desc("Copy a sticker into another pack")
     @command.alias("stickercopy", "kang")
     @command.usage("[sticker pack VOL number? if not set] [emoji?]",
@@ -196,49 +629,237 @@ class StickerModule(module.Module):
             else:
                 pack_VOL = arg
 
-        if not pack_VOL:
-            pack_name = self.kang_db.get(
-                "1") if self.kang_db is not None else None
-        else:
-            pack_name = self.kang_db.get(
-                pack_VOL) if self.kang_db is not None else None
-
-        if not pack_name:
-            ret = await self.cmd_createpack(ctx)
-            await self.on_load()
+        reply_msg = ctx.msg.reply_to_message
 
-            return ret
+        await ctx.respond("Copying sticker...")
 
-        try:
-            await self.bot.client.send(
-                GetStickerSet(stickerset=InputStickerSetShortName(
-                    short_name=pack_name)))
-        except StickersetInvalid:
-            ret = await self.cmd_createpack(ctx)
+        sticker_buf = await self.download_png(reply_msg)
+        emoji = emoji or (reply_msg.sticker.emoji
+                          if reply_msg.sticker else None) or "❓"
+        added, errors, packs = await self.kang([(sticker_buf, emoji)],
+                                               pack_VOL)
+        if added:
+            await self.bot.log_stat("stickers_created")
+            return f"[Sticker copied](https://t.me/addstickers/{packs[-1]})."
 
-            return ret
+        return errors[0]
 
+    @command.desc("Copy a whole album or a range of messages into a pack")
+    @command.alias("bkang")
+    @command.usage(
+        "[message count? if not an album] [sticker pack VOL number?] [emoji?]",
+        optional=True)
+    async def cmd_batchkang(self, ctx: command.Context) -> str:
         reply_msg = ctx.msg.reply_to_message
+        if not reply_msg:
+            return "__Reply to an album or the first sticker to copy.__"
+
+        numbers = [arg for arg in ctx.args if arg.isdigit()]
+        emoji = "".join(arg for arg in ctx.args if util.text.has_emoji(arg))
+        if reply_msg.media_group_id is not None:
+            # Albums have no count, so their only number is the pack VOL
+            count = 1
+            pack_VOL = numbers[0] if numbers else None
+        else:
+            count = min(int(numbers[0]), BATCH_LIMIT) if numbers else 1
+            pack_VOL = numbers[1] if len(numbers) > 1 else None
 
-        await ctx.respond("Copying sticker...")
-
-        sticker_file = await reply_msg.download()
-        async with AIOFile(sticker_file, "rb") as sticker:
-            sticker_bytes = await sticker.read()
-        sticker_buf = io.BytesIO(sticker_bytes)
-        await util.image.img_to_png(sticker_buf)
+        await ctx.respond("Collecting stickers...")
+        if reply_msg.media_group_id is not None:
+            messages = await self.bot.client.get_media_group(
+                reply_msg.chat.id, reply_msg.message_id)
+        else:
+            messages = await self.bot.get_messages(
+                reply_msg.chat.id,
+                list(
+                    range(reply_msg.message_id,
+                          reply_msg.message_id + count)))
+        messages = [
+            msg for msg in messages
+            if not msg.empty and (msg.photo or (
+                msg.sticker and not msg.sticker.is_animated))
+        ]
+        if not messages:
+            return "__No images or static stickers found.__"
+
+        await ctx.respond(f"Converting {len(messages)} stickers...")
+        converted = await asyncio.gather(
+            *(self.download_png(msg) for msg in messages),
+            return_exceptions=True)
+
+        stickers = []
+        errors = []
+        for msg, result in zip(messages, converted):
+            if isinstance(result, Exception):
+                errors.append(f"Message {msg.message_id}: {result}")
+                continue
+
+            sticker_emoji = emoji or (msg.sticker.emoji
+                                      if msg.sticker else None) or "❓"
+            stickers.append((result, sticker_emoji))
+
+        added = 0
+        packs = []
+        if stickers:
+            await ctx.respond(f"Adding {len(stickers)} stickers...")
+            added, add_errors, packs = await self.kang(stickers, pack_VOL)
+            errors += add_errors
+
+        if added:
+            await self.bot.log_stat("stickers_created", added)
+
+        lines = [f"Added {added} of {len(messages)} stickers."]
+        lines += (f"• [{pack}](https://t.me/addstickers/{pack})"
+                  for pack in packs)
+        if errors:
+            lines.append(f"{len(errors)} failed:")
+            lines += (f"• {error}" for error in errors)
+
+        return "\n".join(lines)
+
+    async def _download_document(self, doc: Document) -> bytes:
+        file_id = FileId(
+            file_type=FileType.STICKER,
+            dc_id=doc.dc_id,
+            media_id=doc.id,
+            access_hash=doc.access_hash,
+            file_reference=doc.file_reference,
+        ).encode()
+        return await self._loader(file_id)()
+
+    @command.desc("Copy a whole sticker pack into a new pack")
+    @command.usage("[sticker pack link or short name]")
+    async def cmd_clonepack(self, ctx: command.Context) -> str:
+        if not ctx.input:
+            return "__Give me a sticker pack link or short name.__"
+
+        short_name = ctx.input.rstrip("/").rsplit("/", 1)[-1]
+        try:
+            source = await self.bot.client.send(
+                GetStickerSet(stickerset=InputStickerSetShortName(
+                    short_name=short_name)))
+        except StickersetInvalid:
+            return "__That sticker pack doesn't exist.__"
+
+        if source.set.animated:
+            return "__Animated sticker packs can't be cloned.__"
+
+        pack_name = self.owned_name(
+            f"{self.bot.user.username}_{short_name}_clone")
+        if await self.get_pack_info(pack_name) is not None:
+            return ("__Already cloned into__ "
+                    f"[{pack_name}](https://t.me/addstickers/{pack_name}).")
+
+        emojis = {
+            doc_id: pack.emoticon
+            for pack in source.packs
+            for doc_id in pack.documents
+        }
+        total = len(source.documents)
+        progress = Counter()
+        sem = asyncio.Semaphore(CLONE_CONCURRENCY)
+        before = util.time.usec()
+        group = util.ticker.TransferGroup()
+
+        def report() -> None:
+            elapsed = (util.time.usec() - before) / 1000000
+            group.set_line(
+                short_name, f"Cloning `{short_name}`...\n"
+                f"Downloaded {progress['downloaded']}/{total} • "
+                f"converted {progress['converted']}/{total} • "
+                f"added {progress['added']}/{total}\n"
+                f"__{progress['added'] / elapsed:.1f} stickers/s__")
+
+        async def fetch(doc: Document) -> io.BytesIO:
+
+            async def load() -> bytes:
+                async with sem:
+                    data = await self._download_document(doc)
+                    progress["downloaded"] += 1
+                    report()
+                    return data
+
+            # Same key as Sticker.file_unique_id, so kangs share the cache
+            key = FileUniqueId(file_unique_type=FileUniqueType.DOCUMENT,
+                               media_id=doc.id).encode()
+            buf = io.BytesIO(await self.image_cache.convert(
+                key, "sticker.png", load, util.image.sticker_png))
+            buf.name = "sticker.png"
+            progress["converted"] += 1
+            report()
+            return buf
+
+        await ctx.respond(f"Cloning {total} stickers from `{short_name}`...")
+        ticker = self.bot.client.ticker
+        msg_key = (ctx.msg.chat.id, ctx.msg.message_id)
+        report()
+        ticker.track(msg_key, ctx.respond, group)
+
+        # Stickers are added in pack order a batch per sticker bot session,
+        # while later ones are still being downloaded and converted
+        pending = deque((doc, self.bot.loop.create_task(fetch(doc)))
+                        for doc in source.documents)
+        created = False
+        errors = []
+        try:
+            while pending:
+                batch = list(pending)[:CLONE_BATCH]
+                await asyncio.wait([task for _, task in batch])
 
-        sticker_buf.seek(0)
-        sticker_buf.name = "sticker.png"
-        status, result = await self.add_sticker(sticker_buf,
-                                                pack_name,
-                                                emoji=emoji
-                                                or reply_msg.sticker.emoji)
-        if status:
-            await self.bot.log_stat("stickers_created")
-            return f"[Sticker copied]({result})."
+                chunk = []
+                while pending and pending[0][1].done():
+                    doc, task = pending.popleft()
+                    try:
+                        chunk.append((task.result(), emojis.get(doc.id, "❓")))
+                    except Exception as e:  # skipcq: PYL-W0703
+                        errors.append(f"Sticker {doc.id}: {e}")
+
+                if chunk and not created:
+                    (sticker, emoji), chunk = chunk[0], chunk[1:]
+                    status, result = await self.create_pack(sticker,
+                                                            pack_name,
+                                                            emoji=emoji)
+                    if not status:
+                        errors.append(result)
+                        break
+
+                    created = True
+                    progress["added"] += 1
+                    report()
+
+                if chunk:
+                    count, add_errors = await self.add_stickers(
+                        chunk, pack_name)
+                    progress["added"] += count
+                    errors += add_errors
+                    report()
+        finally:
+            ticker.finish(msg_key)
+            for _, task in pending:
+                task.cancel()
+
+        added = progress["added"]
+        if created:
+            info = {
+                "count": added,
+                "animated": False,
+                "checked": util.time.sec()
+            }
+            await self.save_pack(pack_name, info)
+            await self.bot.log_stat("stickers_created", added)
+
+        delta = util.time.usec() - before
+        lines = [
+            f"Cloned {added} of {total} stickers into "
+            f"[{pack_name}](https://t.me/addstickers/{pack_name}) in "
+            f"{util.time.format_duration_us(delta)} "
+            f"({added / (delta / 1000000):.1f} stickers/s)."
+        ]
+        if errors:
+            lines.append(f"{len(errors)} failed:")
+            lines += (f"• {error}" for error in errors)
 
-        return result
+        return "\n".join(lines)
 
     @command.desc("Create another sticker pack")
     @command.usage("[sticker pack VOL number?]", optional=True)
@@ -250,55 +871,29 @@ class StickerModule(module.Module):
         if not reply_msg.sticker:
             return "__That message is not a sticker.__"
 
-        num = ctx.input if ctx.input else "1"
-        check = self.kang_db.get(num) if self.kang_db is not None else None
-        if check:
-            try:
-                await self.bot.client.send(
-                    GetStickerSet(stickerset=InputStickerSetShortName(
-                        short_name=check)))
-            except StickersetInvalid:
-                pass
-            else:
-                return "__Pack with that name already exists, use 'kang' instead.__"
+        num = ctx.args[0] if ctx.args else "1"
+        check = self.kang_db.get(num)
+        if check and await self.get_pack_info(check) is not None:
+            return "__Pack with that name already exists, use 'kang' instead.__"
 
         emoji = ctx.args[1] if len(ctx.args) > 1 else "❓"
-        pack_name = self.bot.user.username + f"_kangPack_VOL{num}"
-        await self.db.update_one({"_id": self.name},
-                                 {"$set": {
-                                     f"pack_name.{num}": pack_name
-                                 }},
-                                 upsert=True)
-
-        try:
-            await self.bot.client.send(
-                GetStickerSet(stickerset=InputStickerSetShortName(
-                    short_name=pack_name)))
-        except StickersetInvalid:
-            pass
-        else:
-            await self.on_load()
+        pack_name = self.pack_name(num)
+        if pack_name != check and await self.get_pack_info(
+                pack_name) is not None:
+            await self.save_pack(pack_name, self.pack_info[pack_name], vol=num)
             return "__Pack with that name already exists, use 'kang' instead.__"
 
         await ctx.respond("Creating new pack...")
 
-        sticker_file = await reply_msg.download()
-        async with AIOFile(sticker_file, "rb") as sticker:
-            sticker_bytes = await sticker.read()
-        sticker_buf = io.BytesIO(sticker_bytes)
-        await util.image.img_to_png(sticker_buf)
-
-        sticker_buf.seek(0)
-        sticker_buf.name = "sticker.png"
+        sticker_buf = await self.download_png(reply_msg)
         status, result = await self.create_pack(sticker_buf,
                                                 pack_name,
                                                 emoji=reply_msg.sticker.emoji
                                                 or emoji)
         if status:
             await self.bot.log_stat("stickers_created")
-
-            # Update the database
-            await self.on_load()
+            info = {"count": 1, "animated": False, "checked": util.time.sec()}
+            await self.save_pack(pack_name, info, vol=num)
             return f"[Pack Created]({result})."
 
         return result
@@ -322,45 +917,27 @@ class StickerModule(module.Module):
 
         await ctx.respond("Glitching image...")
 
-        orig_file = await reply_msg.download()
-        async with AIOFile(orig_file, "rb") as image:
-            orig_bytes = await image.read()
+        media = reply_msg.photo or reply_msg.sticker
+        png_bytes = await self.image_cache.convert(media.file_unique_id,
+                                                   "png",
+                                                   self._loader(media.file_id),
+                                                   util.image.png_bytes)
 
-        # Convert to PNG if necessary
-        if orig_bytes.startswith(PNG_MAGIC):
-            png_bytes = orig_bytes
-        else:
-            png_buf = io.BytesIO(orig_bytes)
-            await util.image.img_to_png(png_buf)
-            png_bytes = png_buf.getvalue()
-
-        # Invoke external 'corrupter' program to glitch the image
-        # Source code: https://github.com/r00tman/corrupter
+        fmt = "webp" if reply_msg.sticker else "png"
         try:
-            stdout, stderr, ret = await util.system.run_command(
-                "corrupter",
-                "-boffset",
-                str(offset),
-                "-",
-                stderr=asyncio.subprocess.PIPE,
-                in_data=png_bytes,
-                text=util.system.StderrOnly,
-                timeout=15,
-            )
-        except asyncio.TimeoutError:
-            return "🕑 `corrupter` failed to finish within 15 seconds."
-        except FileNotFoundError:
-            return "❌ The `corrupter` [program](https://github.com/r00tman/corrupter) must be installed on the host system."
-
-        if ret != 0:
-            return (
-                f"⚠️ `corrupter` failed with return code {ret}. Error: ```{stderr}```"
-            )
-
-        with io.BytesIO(stdout) as file:
+            data = await util.image.run_in_pool(_glitch_func(),
+                                                png_bytes,
+                                                offset,
+                                                fmt=fmt)
+        except Exception as e:  # skipcq: PYL-W0703
+            self.log.error("Failed to glitch image", exc_info=e)
+            return f"⚠️ Unable to glitch image: `{e}`"
+
+        with io.BytesIO(data) as file:
             if reply_msg.sticker:
                 file.name = "glitch.webp"
-                await ctx.msg.reply_sticker(file)
+                send = functools.partial(ctx.msg.reply_sticker, file)
+                await ctx.client.scheduler.send(ctx.msg.chat.id, send)
                 await ctx.msg.delete()
                 return None
 
@@ -369,13 +946,52 @@ class StickerModule(module.Module):
 
         return None
 
+    @staticmethod
+    def _scrape_search(url: str) -> str:
+        return create_scraper().get(url, timeout=30).text
+
+    async def search_packs(self, query: str) -> List[Tuple[str, str]]:
+        """Returns the first SEARCH_LIMIT packs combot finds for a query.
+
+        The page is parsed while it streams in, and results are cached
+        for SEARCH_CACHE_TTL seconds."""
+
+        key = query.lower()
+        now = util.time.sec()
+        cached = self.search_cache.get(key)
+        if cached is not None and now - cached[0] < SEARCH_CACHE_TTL:
+            return cached[1]
+
+        url = f"{SEARCH_URL}?q={quote(query)}"
+        parser = PackSearchParser(SEARCH_LIMIT)
+        async with self.bot.http.get(url, timeout=30) as resp:
+            if resp.status == 200:
+                decoder = codecs.getincrementaldecoder(resp.charset or
+                                                       "utf-8")("replace")
+                async for chunk in resp.content.iter_chunked(16384):
+                    parser.feed(decoder.decode(chunk))
+                    if parser.done:
+                        break
+
+        if resp.status != 200:
+            # Cloudflare challenges plain clients, so solve it off the loop
+            parser.feed(await util.run_sync(self._scrape_search, url))
+
+        self.search_cache = {
+            k: v
+            for k, v in self.search_cache.items()
+            if now - v[0] < SEARCH_CACHE_TTL
+        }
+        self.search_cache[key] = (now, parser.results)
+        return parser.results
+
     @command.usage("Search Sticker Pack")
     async def cmd_stickers(self, ctx: command.Context) -> str:
         reply = ctx.msg.reply_to_message
         if ctx.input:
             search_query = ctx.input
         elif reply and reply.from_user:
-            search_query = reply.from_user.username or reply.from_user.id
+            search_query = str(reply.from_user.username or reply.from_user.id)
         else:
             await ctx.respond(
                 "reply to a user or provide text to search sticker packs",
@@ -383,20 +999,12 @@ class StickerModule(module.Module):
             )
             return
 
-        if out := "\n".join(
-                list(
-                    map(
-                        lambda x:
-                        f"• [{x.find('div', {'class': 'sticker-pack__title'}).text}]({x.a.get('href')})",
-                        filter(
-                            lambda x: x.button is not None,
-                            soup(
-                                create_scraper().get(
-                                    f"https://combot.org/telegram/stickers?q={quote(search_query)}"
-                                ).text,
-                                "lxml",
-                            ).findAll("div", {"class": "sticker-pack__header"}),
-                        ),
-                    ))):
+        try:
+            results = await self.search_packs(search_query)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            return f"⚠️ Unable to search sticker packs: `{e}`"
+
+        if results:
+            out = "\n".join(f"• [{title}]({link})" for title, link in results)
             return f"<b>Sticker Packs For:</b> '<u>{search_query}</u>'\n{out}"
         await ctx.respond("❌  `No Sticker Pack Found !`", delete_after=5)
@@ -19,6 +19,8 @@ from .. import command, module, util
 
 class SystemModule(module.Module):
     name: ClassVar[str] = "System"
+    # Needs to be around at startup to report restarts and updates
+    lazy: ClassVar[bool] = False
 
     db: AsyncIOMotorDatabase
     restart_pending: bool
@@ -289,8 +291,8 @@ class SystemModule(module.Module):
             updated = "updated and " if rs_reason == "update" else ""
             duration = util.time.format_duration_us(util.time.usec() - rs_time)
             self.log.info(f"Bot {updated}restarted in {duration}")
-            status_msg = await self.bot.client.get_messages(
-                rs_chat_id, rs_message_id)
+            status_msg = await self.bot.get_messages(rs_chat_id,
+                                                     rs_message_id)
             await self.bot.respond(status_msg,
                                    f"Bot {updated}restarted in {duration}.",
                                    mode="repost")
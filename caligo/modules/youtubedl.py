@@ -1,9 +1,8 @@
 import os
 import re
 from collections import defaultdict
-from functools import wraps
+from functools import partial, wraps
 from glob import glob
-from math import floor
 from typing import Any, ClassVar, Dict, List, Optional, Pattern, Tuple, Union
 from uuid import uuid4
 
@@ -452,11 +451,14 @@ class YouTube(module.Module):
         video_link = ctx.msg.reply_to_message.text.strip()
         rnd_id = str(uuid4())[:8]
         uid = self.get_choice_by_id("mp4", "v")
-        await self.download_progress(video_link,
-                                     uid[0],
-                                     rnd_id,
-                                     msg=ctx.msg,
-                                     downtype="video")
+        try:
+            await self.download_progress(video_link,
+                                         uid[0],
+                                         rnd_id,
+                                         msg=ctx.msg,
+                                         downtype="video")
+        except util.error.TransferCancelled:
+            return "__Transmission aborted.__"
         await ctx.respond("Done. Uploading ...")
         for file in glob(
                 os.path.join(self.bot.getConfig.downloadPath, rnd_id, "*")):
@@ -466,58 +468,76 @@ class YouTube(module.Module):
                 break
         else:
             await ctx.respond("No Media Found", mode="error", delete_after=8)
-        await ctx.msg.reply_video(
-            video=media_file,
-            progress=util.progress,
-            supports_streaming=True,
-            progress_args=(ctx.msg, "Uploading", "video.mp4"),
-        )
+
+        ticker = self.bot.client.ticker
+        key = (ctx.msg.chat.id, ctx.msg.message_id)
+        name = os.path.basename(media_file)
+        transfer = ticker.transfer(key, ctx.msg.edit, name, "Uploading")
+        try:
+            await self.bot.run_transfer(
+                "upload",
+                lambda job: ctx.msg.reply_video(
+                    video=media_file,
+                    progress=job.callback,
+                    supports_streaming=True,
+                ),
+                name=name,
+                msg=ctx.msg,
+                progress=transfer)
+        except util.error.TransferCancelled:
+            return "__Transmission aborted.__"
+        finally:
+            ticker.finish(key)
         await ctx.msg.delete()
 
     async def download_progress(self, *args, msg: Union[Message, CallbackQuery],
                                 downtype: str):
-        last_update_time = None
-        humanbytes = util.misc.human_readable_bytes
-        time_formater = util.time.format_duration_td
         if isinstance(msg, Message):
             edit_func = msg.edit
+            key = (msg.chat.id, msg.message_id)
         elif isinstance(msg, CallbackQuery):
-            edit_func = msg.edit_message_text
+            edit_func = partial(util.tg.edit_query, msg)
+            key = msg.id
         else:
             raise TypeError(f"Unsupported msg type '{type(msg)}'")
 
-        def prog_func(prog_data: Dict) -> None:
-            nonlocal last_update_time
-            now = util.time.sec()
-            # Only edit message once every 8 seconds to avoid ratelimits
-            if (last_update_time is None
-                    or (now - last_update_time).total_seconds() >= 8):
+        if downtype == "video":
+            downloader = self.video_downloader
+        elif downtype == "audio":
+            downloader = self.audio_downloader
+        else:
+            return None
+
+        def run(job: Any) -> Any:
+
+            def prog_func(prog_data: Dict) -> None:
+                # Runs in the youtube-dl thread, so only touch the counters
+                if job.cancelled:
+                    # The thread can't be cancelled, so stop at this chunk
+                    raise DownloadError("Download cancelled")
+
+                transfer.name = job.name = os.path.basename(
+                    prog_data.get("filename", ""))
                 if prog_data.get("status") == "finished":
-                    progress = "🔄  Download Finished Now Converting."
-                else:
-                    # ------------ Progress Info ------------ #
-                    if not ((eta := prog_data.get("eta")) and
-                            (speed := prog_data.get("speed"))):
-                        return
-                    current = prog_data.get("downloaded_bytes")
-                    total = prog_data.get("total_bytes")
-                    filename = prog_data.get("filename")
-                    # ---------------------------------------- #
-                    percentage = round(current / total * 100)
-                    progress_bar = (
-                        f"[{'█' * floor(15 * percentage / 100)}"
-                        f"{'░' * floor(15 * (1 - percentage / 100))}]")
-                    progress = f"""
-<i>Downloading:</i>  <code>{filename}</code>
-<b>Completed:</b>  <code>{humanbytes(current)} / {humanbytes(total)}</code>
-<b>Progress:</b>  <code>{progress_bar} {percentage} %</code>
-<b>Speed:</b>  <code>{humanbytes(speed, postfix='/s')}</code>
-<b>ETA:</b>  <code>{time_formater(eta)}</code>
-"""
-                self.bot.loop.create_task(edit_func(progress))
-                last_update_time = now
+                    transfer.status = "Converting"
+                transfer.update(
+                    prog_data.get("downloaded_bytes") or 0,
+                    prog_data.get("total_bytes")
+                    or prog_data.get("total_bytes_estimate"),
+                    speed=prog_data.get("speed"),
+                    eta=prog_data.get("eta"),
+                )
 
-        if downtype == "video":
-            return await self.video_downloader(*args, prog_func)
-        if downtype == "audio":
-            return await self.audio_downloader(*args, prog_func)
+            return downloader(*args, prog_func)
+
+        ticker = self.bot.client.ticker
+        transfer = ticker.transfer(key, edit_func, "", "Downloading")
+        try:
+            return await self.bot.run_transfer(
+                "ytdl",
+                run,
+                name=args[0],
+                msg=msg if isinstance(msg, Message) else None,
+                progress=transfer)
+        finally:
+            ticker.finish(key)
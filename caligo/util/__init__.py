@@ -12,7 +12,9 @@ from . import (
     system,
     text,
     tg,
+    ticker,
     time,
+    timeseries,
     version,
 )
 from .buttons import sublists
@@ -30,6 +30,46 @@ class BotConfig:
 
         self.token = _replace(os.environ.get("BOT_TOKEN"))
 
+        # Defer importing modules until first use, see core/manifest.py
+        self.lazy_modules = bool(os.environ.get("LAZY_MODULES") == "True")
+
+        # Event dispatching, EVENT_WORKERS=0 spawns a task per listener
+        self.event_workers = int(_replace(os.environ.get("EVENT_WORKERS")) or 0)
+        self.event_queue_size = int(
+            _replace(os.environ.get("EVENT_QUEUE_SIZE")) or 1000)
+        self.listener_timeout = int(
+            _replace(os.environ.get("LISTENER_TIMEOUT")) or 0)
+
+        # Size cap of the converted image cache in MiB, see util/image.py
+        self.image_cache_size = int(
+            _replace(os.environ.get("IMAGE_CACHE_SIZE")) or 100)
+
+        # Users, chats and members cached in memory, see core/entity_cache.py
+        self.entity_cache_ttl = int(
+            _replace(os.environ.get("ENTITY_CACHE_TTL")) or 600)
+        self.entity_cache_size = int(
+            _replace(os.environ.get("ENTITY_CACHE_SIZE")) or 1000)
+
+        # Recent messages kept per chat, see core/message_cache.py
+        self.message_cache_chat_size = int(
+            _replace(os.environ.get("MESSAGE_CACHE_CHAT_SIZE")) or 100)
+        self.message_cache_size = int(
+            _replace(os.environ.get("MESSAGE_CACHE_SIZE")) or 32)
+
+        # Seconds between progress messages of transfers, see util/ticker.py
+        self.progress_interval = int(
+            _replace(os.environ.get("PROGRESS_INTERVAL")) or 5)
+        self.progress_ttl = int(
+            _replace(os.environ.get("PROGRESS_TTL")) or 600)
+
+        # Transfers running at once, see core/transfer_manager.py
+        self.transfer_limit = int(
+            _replace(os.environ.get("TRANSFER_LIMIT")) or 0)
+        self.transfer_kind_limit = int(
+            _replace(os.environ.get("TRANSFER_KIND_LIMIT")) or 0)
+        self.transfer_bandwidth = int(
+            _replace(os.environ.get("TRANSFER_BANDWIDTH")) or 0)
+
         # Core config
         self.api_id = int(os.environ.get("API_ID", 0))
         self.api_hash = os.environ.get("API_HASH")
@@ -3,6 +3,10 @@ import traceback
 from typing import List, Optional
 
 
+class TransferCancelled(Exception):
+    """Raised by run_transfer() when its job is cancelled with .abort."""
+
+
 def format_exception(exp: BaseException,
                      tb: Optional[List[traceback.FrameSummary]] = None) -> str:
     """Formats an exception traceback as a string, similar to the Python interpreter."""
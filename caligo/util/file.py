@@ -1,16 +1,14 @@
-import asyncio
-from datetime import datetime, timedelta
 from mimetypes import guess_type
 from pathlib import Path
-from typing import Optional, Tuple, Union
+from typing import TYPE_CHECKING, Dict, Optional
 from urllib import parse
 
-from async_property import async_property
-
 from .async_helpers import run_sync
 from .misc import human_readable_bytes as human
-from .time import format_duration_td as time
-from .time import sec
+from .ticker import Transfer
+
+if TYPE_CHECKING:
+    from ..core.transfer_manager import TransferJob
 
 
 class File:
@@ -87,32 +85,7 @@ class File:
     def start_time(self, val):
         self._start_time = val
 
-    @async_property
-    async def progress_string(self) -> Tuple[Union[str, None], bool, None]:
-        file = self.content
-        status, response = await run_sync(file.next_chunk, num_retries=5)
-        if status:
-            after = sec() - self.start_time
-            size = status.total_size
-            current = status.resumable_progress
-            percent = current / size
-            speed = round(current / after, 2)
-            eta = timedelta(seconds=int(round((size - current) / speed)))
-            bullets = "●" * int(round(percent * 10)) + "○"
-            if len(bullets) > 10:
-                bullets = bullets.replace("○", "")
-
-            space = "    " * (10 - len(bullets))
-            progress = (
-                f"`{self.name}`\n"
-                f"Status: **Uploading**\n"
-                f"Progress: [{bullets + space}] {round(percent * 100)}%\n"
-                f"__{human(current)} of {human(size)} @ "
-                f"{human(speed, postfix='/s')}\neta - {time(eta)}__\n\n")
-
-        if response is None:
-            return progress, False, None
-
+    def link_text(self, response: Dict[str, str]) -> str:
         size = response.get("size")
         mirrorLink = response.get("webContentLink")
         text = (f"**GoogleDrive Link**: [{self.name}]({mirrorLink}) "
@@ -120,25 +93,36 @@ class File:
         if self._index_link is not None:
             text += f"\n\n__Shareable link__: [Here]({self._index_link})."
 
-        return None, True, text
+        return text
 
-    async def progress(self, update: Optional[bool] = True) -> None:
+    async def progress(self,
+                       update: Optional[bool] = True,
+                       job: Optional["TransferJob"] = None) -> None:
         invoker = self.invoker
-
-        done = False
-        last_update_time = None
-        while not done:
-            progress, done, link = await self.progress_string
-            now = datetime.now()
-            if (invoker is not None and progress is not None
-                    and (last_update_time is None or
-                         (now - last_update_time).total_seconds() >= 5)):
-                await invoker.edit(progress)
-
-                last_update_time = now
-
-            await asyncio.sleep(0.1)
+        ticker = invoker._client.ticker if invoker is not None else None
+        key = ("upload", str(self.path))
+        transfer = Transfer(self.name, "Uploading")
+        if ticker is not None:
+            ticker.track(key, invoker.edit, transfer)
+        if job is not None:
+            job.progress = transfer
+
+        response = None
+        try:
+            while response is None:
+                status, response = await run_sync(self.content.next_chunk,
+                                                  num_retries=5)
+                if status and job is not None:
+                    # Also holds the upload to the job's share of bandwidth
+                    await job.callback(status.resumable_progress,
+                                       status.total_size)
+                elif status:
+                    transfer.update(status.resumable_progress,
+                                    status.total_size)
+        finally:
+            if ticker is not None:
+                ticker.finish(key)
 
         if invoker is not None and update is True:
-            await invoker.reply(link)
+            await invoker.reply(self.link_text(response))
             await invoker.delete()
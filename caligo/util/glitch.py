@@ -0,0 +1,81 @@
+import io
+from typing import Optional
+
+import numpy as np
+from PIL import Image
+
+
+def _wrap(cols: np.ndarray, width: int) -> np.ndarray:
+    return np.mod(cols, width, out=cols)
+
+
+def _block_offsets(rng: np.random.Generator, height: int, bheight: int,
+                   boffset: float, stride: float) -> np.ndarray:
+    """Returns the horizontal shift of every row from randomly sized blocks.
+
+    Each block gets its own offset and a stride that skews it further the
+    lower a row is, like corrupter's distorted blocks."""
+
+    # Blocks are at least a row high, so there can't be more than rows
+    sizes = rng.geometric(1 / max(bheight, 1), height)
+    starts = np.cumsum(sizes) - sizes
+    count = int(np.searchsorted(starts, height))
+
+    offsets = rng.normal(0, boffset, count)
+    strides = rng.normal(0, stride, count)
+    block = np.repeat(np.arange(count), sizes[:count])[:height]
+    rows = np.arange(height) - starts[block]
+
+    return (offsets[block] + strides[block] * rows).astype(np.intp)
+
+
+def glitch(data: bytes,
+           boffset: float = 30,
+           *,
+           bheight: int = 10,
+           stride: float = 0.1,
+           lag: float = 0.005,
+           lr: float = -7,
+           lg: float = 0,
+           lb: float = 3,
+           stdoffset: float = 10,
+           add: int = 37,
+           seed: Optional[int] = None,
+           fmt: str = "png") -> bytes:
+    """Glitches image bytes the way corrupter does. Meant for run_in_pool().
+
+    Options share corrupter's names and defaults: rows are shifted in
+    distorted blocks (boffset, bheight, stride), then each color channel
+    drifts along its own scanline lag (lag, lr, lg, lb) with a per-pixel
+    red-blue split (stdoffset), and the result is brightened (add). Alpha
+    follows the block shifts only so stickers keep their outline."""
+
+    rng = np.random.default_rng(seed)
+    pixels = np.asarray(Image.open(io.BytesIO(data)).convert("RGBA"))
+    height, width = pixels.shape[:2]
+    rows = np.arange(height)[:, None]
+    cols = np.arange(width)[None, :]
+
+    # Distorted blocks
+    shift = _block_offsets(rng, height, bheight, boffset, stride)
+    pixels = pixels[rows, _wrap(cols + shift[:, None], width)]
+
+    # Per-channel scanline lag, a random walk from one row to the next
+    steps = rng.normal(0, lag * np.sqrt(width), (3, height))
+    lags = np.cumsum(steps, axis=1) + np.array([lr, lg, lb])[:, None]
+    split = rng.standard_normal((height, width), np.float32) * stdoffset
+
+    out = np.empty_like(pixels)
+    out[..., 3] = pixels[..., 3]
+    for channel, extra in ((0, -split), (1, 0), (2, split)):
+        src = (cols + lags[channel][:, None] + extra).astype(np.intp)
+        out[..., channel] = pixels[rows, _wrap(src, width), channel]
+
+    if add:
+        np.clip(out[..., :3].astype(np.int16) + add, 0, 255,
+                out=out[..., :3], casting="unsafe")
+
+    # Noisy output barely compresses, so don't spend time trying
+    with io.BytesIO() as result:
+        Image.fromarray(out, "RGBA").save(result, fmt, compress_level=1)
+        return result.getvalue()
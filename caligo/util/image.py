@@ -1,6 +1,22 @@
+import asyncio
+import functools
 import io
 import os
-from typing import IO, Mapping, Optional, Union
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import (
+    IO,
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Mapping,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
 from PIL import Image
 
@@ -8,6 +24,104 @@ from .async_helpers import run_sync
 
 FileLike = Union[str, os.PathLike, IO[bytes]]
 FormatMap = Mapping[str, FileLike]
+Result = TypeVar("Result")
+
+PNG_MAGIC = b"\x89\x50\x4e\x47\x0d\x0a\x1a\x0a"
+# Longest side of a Telegram sticker
+STICKER_SIZE = 512
+
+CACHE_PATH = Path.home() / ".cache" / "caligo" / "images"
+
+_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_pool() -> ProcessPoolExecutor:
+    """Returns the process pool image work runs in, starting it if needed."""
+
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor()
+
+    return _pool
+
+
+def shutdown_pool() -> None:
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False)
+        _pool = None
+
+
+async def run_in_pool(func: Callable[..., Result], *args: Any,
+                      **kwargs: Any) -> Result:
+    """Runs a picklable function in the image process pool.
+
+    Pillow holds the GIL while decoding and resizing, so a thread would
+    stall the event loop as well."""
+
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(get_pool(),
+                                      functools.partial(func, *args, **kwargs))
+
+
+def _resize_sticker(im: Image.Image) -> Image.Image:
+    sz = im.size
+    target = STICKER_SIZE
+    if sz[0] > sz[1]:
+        w_ratio = target / float(sz[0])
+        h_size = int(float(sz[1]) * float(w_ratio))
+        return im.resize((target, h_size), Image.LANCZOS)
+
+    h_ratio = target / float(sz[1])
+    w_size = int(float(sz[0]) * float(h_ratio))
+    return im.resize((w_size, target), Image.LANCZOS)
+
+
+def sticker_png(data: bytes) -> bytes:
+    """Converts image bytes to a sticker-sized PNG. Meant for run_in_pool()."""
+
+    return _sticker_bytes(data, ("png",))["png"]
+
+
+def png_bytes(data: bytes) -> bytes:
+    """Converts image bytes to a PNG. Meant for run_in_pool()."""
+
+    if data.startswith(PNG_MAGIC):
+        return data
+
+    im = Image.open(io.BytesIO(data)).convert("RGBA")
+    with io.BytesIO() as out:
+        im.save(out, "png")
+        return out.getvalue()
+
+
+def _sticker_bytes(data: bytes, formats: Tuple[str, ...]) -> Dict[str, bytes]:
+    im = _resize_sticker(Image.open(io.BytesIO(data)).convert("RGBA"))
+    results = {}
+    for fmt in formats:
+        with io.BytesIO() as out:
+            im.save(out, fmt)
+            results[fmt] = out.getvalue()
+
+    return results
+
+
+async def _read(src: FileLike) -> bytes:
+    if isinstance(src, (str, os.PathLike)):
+        return await run_sync(Path(src).read_bytes)
+
+    src.seek(0)
+    return src.read()
+
+
+async def _write(dest: FileLike, data: bytes) -> None:
+    if isinstance(dest, (str, os.PathLike)):
+        await run_sync(Path(dest).write_bytes, data)
+        return
+
+    dest.seek(0)
+    dest.write(data)
+    dest.truncate()
 
 
 async def img_to_png(src: FileLike,
@@ -17,35 +131,104 @@ async def img_to_png(src: FileLike,
     if dest is None:
         dest = src
 
-    def _img_to_png() -> None:
-        im = Image.open(src).convert("RGBA")
-        if isinstance(dest, io.BufferedIOBase):
-            dest.seek(0)
-        im.save(dest, "png")
-
-    await run_sync(_img_to_png)
+    png = await run_in_pool(png_bytes, await _read(src))
+    await _write(dest, png)
     return dest
 
 
 async def img_to_sticker(src: FileLike, formats: FormatMap) -> FormatMap:
     """Coverts the given image to a Telegram WebP sticker PNG using Pillow."""
 
-    def _img_to_sticker() -> None:
-        im = Image.open(src).convert("RGBA")
+    results = await run_in_pool(_sticker_bytes, await _read(src),
+                                tuple(formats))
+    for fmt, dest in formats.items():
+        await _write(dest, results[fmt])
 
-        sz = im.size
-        target = 512
-        if sz[0] > sz[1]:
-            w_ratio = target / float(sz[0])
-            h_size = int(float(sz[1]) * float(w_ratio))
-            im = im.resize((target, h_size), Image.LANCZOS)
-        else:
-            h_ratio = target / float(sz[1])
-            w_size = int(float(sz[0]) * float(h_ratio))
-            im = im.resize((w_size, target), Image.LANCZOS)
+    return formats
 
-        for fmt, dest in formats.items():
-            im.save(dest, fmt)
 
-    await run_sync(_img_to_sticker)
-    return formats
+class ImageCache:
+    """On-disk LRU cache of converted images, capped in total size.
+
+    Entries are keyed by Telegram's file_unique_id and the target format,
+    so the same source never gets downloaded or converted twice. Recency
+    is tracked through file modification times, which survive restarts."""
+
+    path: Path
+    max_size: int
+
+    # File name -> size, least recently used first
+    _entries: Optional["OrderedDict[str, int]"]
+    _size: int
+
+    def __init__(self, path: Path = CACHE_PATH, max_size: int = 0) -> None:
+        self.path = path
+        self.max_size = max_size
+
+        self._entries = None
+        self._size = 0
+
+    def _scan(self) -> "OrderedDict[str, int]":
+        if self._entries is None:
+            self.path.mkdir(parents=True, exist_ok=True)
+            files = sorted((entry.stat().st_mtime_ns, entry.name,
+                            entry.stat().st_size)
+                           for entry in os.scandir(self.path)
+                           if entry.is_file())
+            self._entries = OrderedDict(
+                (name, size) for _, name, size in files)
+            self._size = sum(self._entries.values())
+
+        return self._entries
+
+    @staticmethod
+    def _name(key: str, fmt: str) -> str:
+        return f"{key}.{fmt}"
+
+    async def get(self, key: str, fmt: str) -> Optional[bytes]:
+        name = self._name(key, fmt)
+        entries = await run_sync(self._scan)
+        if name not in entries:
+            return None
+
+        entries.move_to_end(name)
+        path = self.path / name
+        try:
+            data = await run_sync(path.read_bytes)
+            await run_sync(os.utime, path)
+        except FileNotFoundError:
+            self._size -= entries.pop(name, 0)
+            return None
+
+        return data
+
+    async def put(self, key: str, fmt: str, data: bytes) -> None:
+        if len(data) > self.max_size:
+            return
+
+        name = self._name(key, fmt)
+        entries = await run_sync(self._scan)
+        await run_sync((self.path / name).write_bytes, data)
+
+        self._size += len(data) - entries.pop(name, 0)
+        entries[name] = len(data)
+        while self._size > self.max_size:
+            old, size = entries.popitem(last=False)
+            self._size -= size
+            try:
+                await run_sync((self.path / old).unlink)
+            except FileNotFoundError:
+                pass
+
+    async def convert(self, key: str, fmt: str,
+                      load: Callable[[], Awaitable[bytes]],
+                      func: Callable[[bytes], bytes]) -> bytes:
+        """Returns the cached conversion, or loads the source and converts
+        it with func in the process pool otherwise."""
+
+        data = await self.get(key, fmt)
+        if data is None:
+            data = await run_in_pool(func, await load())
+            await self.put(key, fmt, data)
+
+        return data
@@ -1,22 +1,35 @@
 import asyncio
+import functools
 import io
+import shutil
+import tempfile
 import uuid
-from datetime import datetime, timedelta
+from datetime import datetime
 from pathlib import Path
-from typing import Any, Optional, Tuple, Union
+from typing import IO, Any, Awaitable, Callable, Optional, Tuple, Union
 
 import aiofile
 import bprint
 import pyrogram
+from pyrogram.errors import RPCError
+from pyrogram.file_id import FileId, FileType
+from pyrogram.raw.functions.upload import GetFile
+from pyrogram.raw.types import InputDocumentFileLocation, InputPhotoFileLocation
+from pyrogram.raw.types.upload import File as UploadedFile
 
 from .. import command
-from .misc import human_readable_bytes as human
-from .time import format_duration_td as time
-from .time import sec
+from ..core.scheduler import edit_content
+from .async_helpers import run_sync
+from .error import TransferCancelled
 
 MESSAGE_CHAR_LIMIT = 4096
 TRUNCATION_SUFFIX = "... (truncated)"
 
+# Media up to this size stays in memory in fetch_media(), bigger spills to disk
+SPILL_THRESHOLD = 8 * 1024 * 1024
+# Largest part upload.GetFile hands out at once
+CHUNK_SIZE = 1024 * 1024
+
 
 def mention_user(user: pyrogram.types.User) -> str:
     """Returns a string that mentions the given user, regardless of whether they have a username."""
@@ -62,8 +75,10 @@ def pretty_print_entity(entity) -> str:
 
 async def download_file(ctx: command.Context,
                         msg: pyrogram.types.Message,
-                        text: Optional[bool] = False) -> Path:
-    """Downloads the file embedded in the given message."""
+                        text: Optional[bool] = False) -> Optional[Path]:
+    """Downloads the file embedded in the given message.
+
+    Returns None if the download was cancelled with .abort."""
     downloadPath = ctx.bot.getConfig.downloadPath
 
     if text is True:
@@ -74,8 +89,6 @@ async def download_file(ctx: command.Context,
         path.unlink()
         return text
 
-    before = sec()
-    last_update_time = None
     if msg.document:
         file_name = msg.document.file_name
     elif msg.audio:
@@ -91,43 +104,143 @@ async def download_file(ctx: command.Context,
         date = datetime.fromtimestamp(msg.voice.date)
         file_name = f"audio_{date.strftime('%Y-%m-%d_%H-%M-%S')}.ogg"
 
-    loop = asyncio.get_event_loop()
-
-    def prog_func(current: int, total: int) -> None:
-        nonlocal last_update_time
-
-        if not ctx:
-            return
-
-        percent = current / total
-        after = sec() - before
-        now = datetime.now()
-
-        try:
-            speed = round(current / after, 2)
-            eta = timedelta(seconds=int(round((total - current) / speed)))
-        except ZeroDivisionError:
-            speed = 0
-            eta = timedelta(seconds=0)
-        bullets = "●" * int(round(percent * 10)) + "○"
-        if len(bullets) > 10:
-            bullets = bullets.replace("○", "")
-
-        space = "    " * (10 - len(bullets))
-        progress = (f"`{file_name}`\n"
-                    f"Status: **Downloading**\n"
-                    f"Progress: [{bullets + space}] {round(percent * 100)}%\n"
-                    f"__{human(current)} of {human(total)} @ "
-                    f"{human(speed, postfix='/s')}\neta - {time(eta)}__\n\n")
-        # Only edit message once every 5 seconds to avoid ratelimits
-        if last_update_time is None or (now -
-                                        last_update_time).total_seconds() >= 5:
-            loop.create_task(ctx.respond(progress))
-
-            last_update_time = now
+    ticker = ctx.bot.client.ticker
+    key = (ctx.msg.chat.id, ctx.msg.message_id)
+    transfer = ticker.transfer(key, ctx.respond, file_name, "Downloading")
+    try:
+        return Path(await ctx.bot.run_transfer(
+            "download",
+            lambda job: ctx.bot.client.download_media(
+                msg,
+                file_name=str(downloadPath) + "/" + file_name,
+                progress=job.callback),
+            name=file_name,
+            msg=ctx.msg,
+            progress=transfer))
+    except TransferCancelled:
+        return None
+    finally:
+        ticker.finish(key)
+
+
+async def _file_sender(client: pyrogram.Client,
+                       dc_id: int) -> Optional[Callable[..., Awaitable[Any]]]:
+    if dc_id == await client.storage.dc_id():
+        return client.send
+
+    # Pyrogram opens one the first time it downloads something from that DC
+    session = client.media_sessions.get(dc_id)
+    return session.send if session is not None else None
+
+
+def _file_location(file_id: FileId) -> Any:
+    if file_id.file_type == FileType.PHOTO:
+        return InputPhotoFileLocation(id=file_id.media_id,
+                                      access_hash=file_id.access_hash,
+                                      file_reference=file_id.file_reference,
+                                      thumb_size=file_id.thumbnail_size)
+    if file_id.file_type in (FileType.THUMBNAIL, FileType.CHAT_PHOTO):
+        return None
+
+    return InputDocumentFileLocation(id=file_id.media_id,
+                                     access_hash=file_id.access_hash,
+                                     file_reference=file_id.file_reference,
+                                     thumb_size=file_id.thumbnail_size)
+
+
+async def _stream_file(send: Callable[..., Awaitable[Any]], location: Any,
+                       file: IO[bytes]) -> bool:
+    offset = 0
+    while True:
+        result = await send(
+            GetFile(location=location, offset=offset, limit=CHUNK_SIZE))
+        if not isinstance(result, UploadedFile):
+            # CDN redirects are left to pyrogram
+            return False
+
+        file.write(result.bytes)
+        if len(result.bytes) < CHUNK_SIZE:
+            return True
+
+        offset += CHUNK_SIZE
+
+
+async def fetch_media(client: pyrogram.Client,
+                      file_id: str,
+                      *,
+                      max_memory: int = SPILL_THRESHOLD) -> IO[bytes]:
+    """Downloads media into a file object that leaves nothing behind.
+
+    Up to max_memory bytes are kept in memory, bigger media spills to an
+    anonymous temporary file. Parts are streamed straight from Telegram
+    when a session to the file's DC is at hand. Otherwise, or if Telegram
+    refuses the request, pyrogram downloads it to a temporary directory
+    first."""
+
+    file = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    try:
+        decoded = FileId.decode(file_id)
+        location = _file_location(decoded)
+        send = await _file_sender(client, decoded.dc_id)
+
+        streamed = False
+        if location is not None and send is not None:
+            try:
+                streamed = await _stream_file(send, location, file)
+            except RPCError:
+                # Expired file references, DC migrations, auth errors on a
+                # fresh media session and the like are all left to pyrogram
+                streamed = False
+
+        if not streamed:
+            file.seek(0)
+            file.truncate()
+            with tempfile.TemporaryDirectory() as tmp:
+                path = await client.download_media(file_id,
+                                                   file_name=tmp + "/")
+                if path is None:
+                    raise FileNotFoundError(f"Unable to download {file_id}")
+
+                with open(path, "rb") as src:
+                    await run_sync(shutil.copyfileobj, src, file)
+    except BaseException:
+        file.close()
+        raise
+
+    file.seek(0)
+    return file
+
+
+def bind_client(obj: Any, client: pyrogram.Client) -> None:
+    """Reattaches the client to an unpickled object and everything in it."""
+
+    if isinstance(obj, pyrogram.types.Object):
+        obj.bind(client)
+        for value in vars(obj).values():
+            bind_client(value, client)
+    elif isinstance(obj, list):
+        for value in obj:
+            bind_client(value, client)
+
+
+async def edit_query(query: pyrogram.types.CallbackQuery, text: str,
+                     **kwargs: Any) -> Any:
+    """Edits the message a callback query came from through the scheduler."""
+
+    call = functools.partial(query.edit_message_text, text, **kwargs)
+    scheduler = getattr(query._client, "scheduler", None)
+    if scheduler is None:
+        return await call()
+
+    key: Tuple[Any, ...]
+    if query.inline_message_id is not None:
+        chat = key = ("inline", query.inline_message_id)
+    else:
+        chat = query.message.chat.id
+        key = (chat, query.message.message_id)
 
-    return Path(await ctx.bot.client.download_media(
-        msg, file_name=str(downloadPath) + "/" + file_name, progress=prog_func))
+    content = edit_content(text, kwargs.get("reply_markup"))
+    return await scheduler.edit(chat, key, content, call)
 
 
 def truncate(text: str) -> str:
@@ -147,10 +260,16 @@ async def send_as_document(content: Union[bytes,
                            caption: str) -> pyrogram.types.Message:
     with io.BytesIO(str.encode(content)) as o:
         o.name = str(uuid.uuid4()).split("-")[0].upper() + ".TXT"
-        return await msg.reply_document(
+        call = functools.partial(
+            msg.reply_document,
             document=o,
             caption="❯ ```" + caption + "```",
         )
+        scheduler = getattr(msg._client, "scheduler", None)
+        if scheduler is None:
+            return await call()
+
+        return await scheduler.send(msg.chat.id, call)
 
 
 async def get_text_input(
@@ -0,0 +1,262 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Union
+
+from .misc import human_readable_bytes as human
+from .time import format_duration_td
+
+log = logging.getLogger("Ticker")
+
+EditFunc = Callable[[str], Awaitable[Any]]
+
+
+class Transfer:
+    """Counters of one upload or download.
+
+    update() only stores numbers, so it's cheap enough to call on every
+    chunk and safe to call from the threads pyrogram and youtube-dl run
+    their callbacks in. Nothing is formatted until the ticker asks."""
+
+    name: str
+    status: str
+    gid: Optional[str]
+
+    current: int
+    total: int
+    # Reported by the transfer itself, otherwise worked out from the counters
+    speed: Optional[float]
+    eta: Optional[float]
+
+    started: float
+    updated: float
+
+    def __init__(self,
+                 name: str,
+                 status: str,
+                 total: int = 0,
+                 gid: Optional[str] = None) -> None:
+        self.name = name
+        self.status = status
+        self.gid = gid
+
+        self.current = 0
+        self.total = total
+        self.speed = None
+        self.eta = None
+
+        self.started = self.updated = time.monotonic()
+
+    def update(self,
+               current: int,
+               total: Optional[int] = None,
+               *,
+               speed: Optional[float] = None,
+               eta: Optional[float] = None) -> None:
+        self.current = current
+        if total:
+            self.total = total
+        self.speed = speed
+        self.eta = eta
+        self.updated = time.monotonic()
+
+    async def callback(self, current: int, total: int) -> None:
+        """update() as a pyrogram progress callback.
+
+        Async so pyrogram awaits it on the loop between chunks, a plain
+        function would be run in its executor thread instead."""
+
+        self.update(current, total)
+
+    def render(self) -> str:
+        speed = self.speed
+        if speed is None:
+            elapsed = time.monotonic() - self.started
+            speed = self.current / elapsed if elapsed > 0 else 0
+
+        eta = self.eta
+        if eta is None:
+            remaining = max(self.total - self.current, 0)
+            eta = remaining / speed if speed else 0
+
+        percent = min(self.current / self.total, 1) if self.total else 0
+        bullets = "●" * int(round(percent * 10)) + "○"
+        if len(bullets) > 10:
+            bullets = bullets.replace("○", "")
+        space = "    " * (10 - len(bullets))
+
+        gid = f"GID: `{self.gid}`\n" if self.gid is not None else ""
+        return (f"`{self.name}`\n{gid}"
+                f"Status: **{self.status}**\n"
+                f"Progress: [{bullets + space}] {round(percent * 100)}%\n"
+                f"__{human(self.current)} of {human(self.total)} @ "
+                f"{human(speed, postfix='/s')}\n"
+                f"eta - {format_duration_td(timedelta(seconds=int(eta)))}__"
+                "\n\n")
+
+
+class TransferGroup:
+    """Several transfers reported together in one message."""
+
+    transfers: Dict[Hashable, Union[Transfer, str]]
+    updated: float
+
+    def __init__(self) -> None:
+        self.transfers = {}
+        self.updated = time.monotonic()
+
+    def add(self,
+            key: Hashable,
+            name: str,
+            status: str,
+            total: int = 0,
+            gid: Optional[str] = None) -> Transfer:
+        transfer = self.transfers.get(key)
+        if not isinstance(transfer, Transfer):
+            transfer = self.transfers[key] = Transfer(name, status, total, gid)
+
+        return transfer
+
+    def set_line(self, key: Hashable, line: str) -> None:
+        """Shows a line of text instead of counters for the given key."""
+
+        if self.transfers.get(key) != line:
+            self.transfers[key] = line
+            self.updated = time.monotonic()
+
+    def remove(self, key: Hashable) -> None:
+        if self.transfers.pop(key, None) is not None:
+            self.updated = time.monotonic()
+
+    def touch(self) -> None:
+        """Keeps the group alive while nothing in it moves."""
+
+        self.updated = time.monotonic()
+
+    def render(self) -> str:
+        return "".join(
+            transfer if isinstance(transfer, str) else transfer.render()
+            for transfer in list(self.transfers.values()))
+
+
+Source = Union[Transfer, TransferGroup]
+
+
+class _Entry:
+    source: Source
+    edit: EditFunc
+    text: Optional[str]
+    rendered: float
+    task: Optional[asyncio.Task]
+
+    def __init__(self, source: Source, edit: EditFunc) -> None:
+        self.source = source
+        self.edit = edit
+        self.text = None
+        self.rendered = 0
+        self.task = None
+
+    @property
+    def last_update(self) -> float:
+        if isinstance(self.source, TransferGroup):
+            transfers = self.source.transfers.values()
+            return max([self.source.updated] + [
+                transfer.updated
+                for transfer in transfers
+                if isinstance(transfer, Transfer)
+            ])
+
+        return self.source.updated
+
+
+class ProgressTicker:
+    """Renders the progress of every transfer from one task.
+
+    Each interval seconds, transfers that moved since their last message
+    are rendered and their messages edited, skipping any whose previous
+    edit is still on its way. Transfers that haven't moved for ttl seconds
+    are dropped, so ones that died without finish() don't pile up."""
+
+    interval: float
+    ttl: float
+
+    entries: "OrderedDict[Hashable, _Entry]"
+    task: Optional[asyncio.Task]
+
+    def __init__(self, interval: float = 5, ttl: float = 600) -> None:
+        self.interval = interval
+        self.ttl = ttl
+
+        self.entries = OrderedDict()
+        self.task = None
+
+    def track(self, key: Hashable, edit: EditFunc, source: Source) -> Source:
+        """Starts reporting source through edit, unless key already is."""
+
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self.entries[key] = _Entry(source, edit)
+            if self.task is None or self.task.done():
+                self.task = asyncio.get_event_loop().create_task(self._run())
+
+        return entry.source
+
+    def transfer(self,
+                 key: Hashable,
+                 edit: EditFunc,
+                 name: str,
+                 status: str,
+                 total: int = 0,
+                 gid: Optional[str] = None) -> Transfer:
+        """Returns the transfer tracked under key, creating it if needed."""
+
+        transfer = self.get(key)
+        if transfer is None:
+            transfer = self.track(key, edit, Transfer(name, status, total, gid))
+
+        return transfer
+
+    def get(self, key: Hashable) -> Optional[Source]:
+        entry = self.entries.get(key)
+        return entry.source if entry is not None else None
+
+    def finish(self, key: Hashable) -> Optional[Source]:
+        """Stops reporting a transfer and returns it if it was tracked."""
+
+        entry = self.entries.pop(key, None)
+        return entry.source if entry is not None else None
+
+    async def _push(self, entry: _Entry, text: str) -> None:
+        try:
+            await entry.edit(text)
+        except Exception as e:  # skipcq: PYL-W0703
+            log.warning(f"Error updating progress: {e}")
+
+    def tick(self) -> None:
+        now = time.monotonic()
+        loop = asyncio.get_event_loop()
+
+        for key, entry in list(self.entries.items()):
+            updated = entry.last_update
+            if now - updated > self.ttl:
+                log.debug(f"Dropping stale transfer {key}")
+                del self.entries[key]
+                continue
+
+            if updated <= entry.rendered:
+                continue
+            if entry.task is not None and not entry.task.done():
+                continue
+
+            entry.rendered = now
+            text = entry.source.render()
+            if text and text != entry.text:
+                entry.text = text
+                entry.task = loop.create_task(self._push(entry, text))
+
+    async def _run(self) -> None:
+        while self.entries:
+            await asyncio.sleep(self.interval)
+            self.tick()
@@ -0,0 +1,179 @@
+from array import array
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+Bucket = Tuple[int, Dict[str, int]]
+
+USEC_PER_HOUR = 60 * 60 * 1000000
+USEC_PER_DAY = USEC_PER_HOUR * 24
+
+
+class Buckets:
+    """Fixed-size ring buffer of time buckets, each holding one counter per field.
+
+    Counters live in a single flat array laid out row by row, so memory use
+    is constant no matter how many increments are recorded."""
+
+    fields: Sequence[str]
+    size: int
+    span: int
+
+    counts: array
+    index: array
+    dirty: Set[int]
+
+    def __init__(self, fields: Sequence[str], size: int, span: int) -> None:
+        self.fields = fields
+        self.size = size
+        self.span = span
+
+        self._field_idx = {field: idx for idx, field in enumerate(fields)}
+        self.counts = array("Q", bytes(8 * size * len(fields)))
+        # Bucket number currently stored in each slot, -1 for empty slots
+        self.index = array("q", [-1] * size)
+        self.dirty = set()
+
+    def bucket(self, time_us: int) -> int:
+        """Returns the bucket number the given time falls into."""
+
+        return time_us // self.span
+
+    def _row(self, slot: int) -> slice:
+        width = len(self.fields)
+        return slice(slot * width, (slot + 1) * width)
+
+    def _values(self, slot: int) -> Dict[str, int]:
+        return dict(zip(self.fields, self.counts[self._row(slot)]))
+
+    def _claim(self, bucket: int) -> Tuple[Optional[int], Optional[Bucket]]:
+        """Makes the slot for the given bucket current and returns it along
+        with whatever bucket was evicted to make room (or None).
+
+        Buckets older than the one already occupying their slot have fallen
+        out of the ring, so no slot is returned for them."""
+
+        slot = bucket % self.size
+        evicted = None
+        current = self.index[slot]
+        if current > bucket:
+            return None, None
+
+        if current != bucket:
+            if current != -1:
+                evicted = (current, self._values(slot))
+                self.dirty.discard(current)
+
+            self.counts[self._row(slot)] = array("Q",
+                                                 bytes(8 * len(self.fields)))
+            self.index[slot] = bucket
+
+        return slot, evicted
+
+    def add(self, bucket: int, field: str, value: int = 1) -> Optional[Bucket]:
+        """Adds to a counter, returning the bucket evicted from the ring (if any)."""
+
+        slot, evicted = self._claim(bucket)
+        if slot is None:
+            return None
+
+        self.counts[slot * len(self.fields) + self._field_idx[field]] += value
+        self.dirty.add(bucket)
+
+        return evicted
+
+    def load(self, bucket: int, values: Dict[str, int]) -> None:
+        """Restores a persisted bucket without marking it dirty."""
+
+        slot, _ = self._claim(bucket)
+        if slot is None:
+            return
+
+        for field, value in values.items():
+            if field in self._field_idx:
+                self.counts[slot * len(self.fields) +
+                            self._field_idx[field]] = value
+
+    def get(self, bucket: int) -> Dict[str, int]:
+        slot = bucket % self.size
+        if self.index[slot] != bucket:
+            return dict.fromkeys(self.fields, 0)
+
+        return self._values(slot)
+
+    def items(self) -> Iterator[Bucket]:
+        """Yields every stored (bucket, values) pair in chronological order."""
+
+        for bucket in sorted(b for b in self.index if b != -1):
+            yield bucket, self._values(bucket % self.size)
+
+    def pop_dirty(self) -> List[Bucket]:
+        """Returns buckets changed since the last call and clears their mark."""
+
+        dirty = [(bucket, self.get(bucket)) for bucket in sorted(self.dirty)]
+        self.dirty.clear()
+
+        return dirty
+
+
+class TimeSeries:
+    """Hourly counters that roll up into daily counters once they age out."""
+
+    hourly: Buckets
+    daily: Buckets
+
+    def __init__(self,
+                 fields: Sequence[str],
+                 *,
+                 hours: int = 48,
+                 days: int = 30) -> None:
+        self.fields = fields
+        self.hourly = Buckets(fields, hours, USEC_PER_HOUR)
+        self.daily = Buckets(fields, days, USEC_PER_DAY)
+
+    def add(self, time_us: int, field: str, value: int = 1) -> None:
+        evicted = self.hourly.add(self.hourly.bucket(time_us), field, value)
+        if evicted is not None:
+            self._rollup(*evicted)
+
+    def load(self, span: str, bucket: int, values: Dict[str, int],
+             now_us: int) -> None:
+        """Restores a persisted bucket, rolling up hours that have aged out."""
+
+        if span == "day":
+            self.daily.load(bucket, values)
+        elif bucket > self.hourly.bucket(now_us) - self.hourly.size:
+            self.hourly.load(bucket, values)
+        else:
+            self._rollup(bucket, values)
+
+    def _rollup(self, hour: int, values: Dict[str, int]) -> None:
+        day = hour * USEC_PER_HOUR // USEC_PER_DAY
+        for field, value in values.items():
+            if value:
+                self.daily.add(day, field, value)
+
+    def last_hours(self, now_us: int, count: int) -> List[Bucket]:
+        """Returns the latest hourly buckets as (start_us, values), oldest first."""
+
+        current = self.hourly.bucket(now_us)
+        count = min(count, self.hourly.size)
+        return [(hour * USEC_PER_HOUR, self.hourly.get(hour))
+                for hour in range(current - count + 1, current + 1)]
+
+    def last_days(self, now_us: int, count: int) -> List[Bucket]:
+        """Returns the latest daily totals as (start_us, values), oldest first.
+
+        Hours that haven't been rolled up yet are folded into their day."""
+
+        current = self.daily.bucket(now_us)
+        count = min(count, self.daily.size)
+        days = {
+            day: self.daily.get(day)
+            for day in range(current - count + 1, current + 1)
+        }
+        for hour, values in self.hourly.items():
+            day = hour * USEC_PER_HOUR // USEC_PER_DAY
+            if day in days:
+                for field, value in values.items():
+                    days[day][field] += value
+
+        return [(day * USEC_PER_DAY, values) for day, values in days.items()]
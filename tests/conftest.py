@@ -0,0 +1,2 @@
+# util can only be imported after core, like the bot itself does
+from caligo import core  # noqa: F401
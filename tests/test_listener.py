@@ -0,0 +1,68 @@
+import re
+
+import pytest
+
+from caligo.listener import Listener, PatternIndex
+
+PATTERNS = (
+    r"^help$",
+    r"menu\((\w+)\)$",
+    r"(?i)^reddit(?:\s+(?:r/)?([a-z]+)\.)?$",
+    r"(?i)^stylish\s([\S\s]+)",
+    r"^ytdl\s+(.+)",
+    r"(\w)\1",
+    r"(?P<name>\d+)",
+    r"(?P<name>[a-f]+)x",
+    r"(?m)^end$",
+)
+
+VALUES = (
+    "help",
+    "help me",
+    "menu(sticker)",
+    "open menu(core)",
+    "REDDIT",
+    "reddit r/memes.",
+    "Stylish hello\nworld",
+    "ytdl https://example.com/watch?v=1",
+    "ytdl",
+    "bookkeeper",
+    "abcx 42",
+    "first\nend",
+    "",
+    None,
+)
+
+
+def listener(pattern: str) -> Listener:
+    return Listener("callback_query", None, None, 100, None,
+                    re.compile(pattern))
+
+
+@pytest.fixture(name="listeners")
+def fixture_listeners():
+    return [listener(pattern) for pattern in PATTERNS]
+
+
+@pytest.mark.parametrize("value", VALUES)
+def test_pattern_index_matches_like_search(listeners, value):
+    found = PatternIndex(listeners).match(value)
+
+    expected = [
+        lst for lst in listeners
+        if isinstance(value, str) and lst.pattern.search(value)
+    ]
+    assert set(found) == set(expected)
+    for lst, matches in found.items():
+        assert [m.group() for m in matches
+               ] == [m.group() for m in lst.pattern.finditer(value)]
+
+
+def test_pattern_index_keeps_backreferences_and_conflicts_separate(listeners):
+    index = PatternIndex(listeners)
+    separate = {lst.pattern.pattern for lst in index.separate}
+
+    assert r"(\w)\1" in separate
+    assert {r"(?P<name>\d+)", r"(?P<name>[a-f]+)x"} <= separate
+    # Conflicting names only push back their own flag group
+    assert r"(?i)^stylish\s([\S\s]+)" not in separate
@@ -0,0 +1,83 @@
+import asyncio
+
+from pyrogram.errors import FloodWait
+
+from caligo.core.scheduler import Scheduler, TokenBucket, edit_content
+
+
+def sender(sent, value):
+
+    async def call():
+        sent.append(value)
+        return value
+
+    return call
+
+
+def test_token_bucket_allows_burst_then_paces():
+
+    async def main():
+        bucket = TokenBucket(2.0, 3)
+        waits = [bucket.take() for _ in range(5)]
+
+        assert waits[:3] == [0, 0, 0]
+        assert 0.45 < waits[3] <= 0.5
+        assert 0.95 < waits[4] <= 1.0
+        assert not bucket.full
+
+    asyncio.run(main())
+
+
+def test_edits_of_one_message_coalesce():
+
+    async def main():
+        scheduler = Scheduler()
+        sent = []
+
+        results = await asyncio.gather(*(
+            scheduler.edit(1, "msg", edit_content(str(idx)),
+                           sender(sent, idx)) for idx in range(5)))
+
+        # Only the newest content goes out, and every caller gets its result
+        assert sent == [4]
+        assert results == [4] * 5
+        assert scheduler.edits_saved == 4
+
+        # Sending what the message already shows is skipped
+        assert await scheduler.edit(1, "msg", edit_content("4"),
+                                    sender(sent, 5)) is None
+        assert sent == [4]
+
+    asyncio.run(main())
+
+
+def test_edit_content_ignores_how_markup_is_passed():
+    assert edit_content("text") == edit_content("text", None)
+    assert edit_content("text", [["a"]]) != edit_content("text")
+
+
+def test_flood_wait_pauses_every_chat():
+
+    async def main():
+        loop = asyncio.get_event_loop()
+        scheduler = Scheduler()
+        calls = []
+
+        async def flooded():
+            calls.append(loop.time())
+            if len(calls) == 1:
+                raise FloodWait(1)
+            return "ok"
+
+        start = loop.time()
+        first = loop.create_task(scheduler.send(1, flooded))
+        await asyncio.sleep(0.1)
+        other = await scheduler.send(2, sender([], "other"))
+
+        assert await first == "ok"
+        assert other == "other"
+        # The retry and the other chat both waited out the flood
+        assert calls[1] - start >= 1
+        assert loop.time() - start >= 1
+
+    asyncio.run(main())
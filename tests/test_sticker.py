@@ -0,0 +1,56 @@
+import pytest
+
+from caligo.modules.sticker import PackSearchParser, _next_vol
+
+
+@pytest.mark.parametrize("vol, expected", [
+    ("1", "2"),
+    ("9", "10"),
+    ("anim", "anim2"),
+    ("anim1", "anim2"),
+    ("pack_19", "pack_20"),
+])
+def test_next_vol(vol, expected):
+    assert _next_vol(vol) == expected
+
+
+def pack(title, link, button=True):
+    add = "<button>Add</button>" if button else ""
+    return (f'<div class="sticker-pack__header">'
+            f'<div class="sticker-pack__title">{title}</div>'
+            f'<div class="sticker-pack__btn"><a href="{link}">'
+            f'{add}</a></div></div>')
+
+
+PAGE = ('<html><body><div class="search">' +
+        pack(" Cats &amp; dogs ", "https://t.me/addstickers/cats") +
+        pack("Ad", "https://example.com", button=False) +
+        pack("Frogs", "https://t.me/addstickers/frogs") +
+        pack("Birds", "https://t.me/addstickers/birds") +
+        "</div></body></html>")
+
+
+def test_pack_search_parser_skips_headers_without_button():
+    parser = PackSearchParser(10)
+    parser.feed(PAGE)
+
+    assert parser.results == [
+        ("Cats & dogs", "https://t.me/addstickers/cats"),
+        ("Frogs", "https://t.me/addstickers/frogs"),
+        ("Birds", "https://t.me/addstickers/birds"),
+    ]
+    assert not parser.done
+
+
+def test_pack_search_parser_stops_at_limit_across_chunks():
+    parser = PackSearchParser(2)
+    for start in range(0, len(PAGE), 7):
+        parser.feed(PAGE[start:start + 7])
+        if parser.done:
+            break
+
+    assert parser.done
+    assert [link for _, link in parser.results] == [
+        "https://t.me/addstickers/cats",
+        "https://t.me/addstickers/frogs",
+    ]
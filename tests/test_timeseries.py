@@ -0,0 +1,85 @@
+from caligo.util.timeseries import (
+    USEC_PER_DAY,
+    USEC_PER_HOUR,
+    Buckets,
+    TimeSeries,
+)
+
+FIELDS = ("sent", "received")
+
+
+def test_buckets_count_per_field():
+    buckets = Buckets(FIELDS, 4, 10)
+
+    assert buckets.add(buckets.bucket(25), "sent") is None
+    assert buckets.add(2, "sent", 2) is None
+    assert buckets.add(2, "received") is None
+
+    assert buckets.get(2) == {"sent": 3, "received": 1}
+    assert buckets.get(3) == {"sent": 0, "received": 0}
+
+
+def test_buckets_evict_when_ring_wraps():
+    buckets = Buckets(FIELDS, 4, 10)
+    buckets.add(1, "sent", 5)
+
+    assert buckets.add(5, "received") == (1, {"sent": 5, "received": 0})
+    assert buckets.get(1) == {"sent": 0, "received": 0}
+    assert buckets.get(5) == {"sent": 0, "received": 1}
+
+
+def test_buckets_ignore_buckets_older_than_the_ring():
+    buckets = Buckets(FIELDS, 4, 10)
+    buckets.add(5, "sent")
+
+    assert buckets.add(1, "sent") is None
+    buckets.load(1, {"sent": 7})
+    assert buckets.get(5) == {"sent": 1, "received": 0}
+    assert [bucket for bucket, _ in buckets.items()] == [5]
+
+
+def test_buckets_pop_dirty():
+    buckets = Buckets(FIELDS, 4, 10)
+    buckets.load(0, {"sent": 4, "unknown": 1})
+    buckets.add(2, "sent")
+    buckets.add(1, "received")
+
+    assert buckets.pop_dirty() == [(1, {"sent": 0, "received": 1}),
+                                   (2, {"sent": 1, "received": 0})]
+    assert buckets.pop_dirty() == []
+    assert list(buckets.items())[0] == (0, {"sent": 4, "received": 0})
+
+
+def test_timeseries_rolls_up_evicted_hours():
+    series = TimeSeries(FIELDS, hours=2, days=3)
+    series.add(0, "sent", 2)
+    series.add(USEC_PER_HOUR, "sent")
+    assert series.daily.get(0) == {"sent": 0, "received": 0}
+
+    # The third hour pushes the first one out into its day
+    series.add(2 * USEC_PER_HOUR, "received")
+    assert series.hourly.get(0) == {"sent": 0, "received": 0}
+    assert series.daily.get(0) == {"sent": 2, "received": 0}
+
+    now = 2 * USEC_PER_HOUR
+    assert series.last_hours(now, 5) == [
+        (USEC_PER_HOUR, {"sent": 1, "received": 0}),
+        (2 * USEC_PER_HOUR, {"sent": 0, "received": 1}),
+    ]
+    assert series.last_days(now, 1) == [(0, {"sent": 3, "received": 1})]
+
+
+def test_timeseries_load_rolls_up_aged_out_hours():
+    series = TimeSeries(FIELDS, hours=2, days=3)
+    now = USEC_PER_DAY + 5 * USEC_PER_HOUR
+
+    series.load("hour", 29, {"sent": 1}, now)
+    series.load("hour", 3, {"sent": 2}, now)
+    series.load("day", 0, {"received": 4}, now)
+
+    assert series.hourly.get(29) == {"sent": 1, "received": 0}
+    assert series.hourly.get(3) == {"sent": 0, "received": 0}
+    assert series.last_days(now, 2) == [
+        (0, {"sent": 2, "received": 4}),
+        (USEC_PER_DAY, {"sent": 1, "received": 0}),
+    ]
@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+
+from caligo.core.transfer_manager import TransferManager
+from caligo.util.error import TransferCancelled
+
+
+class Config:
+    transfer_limit = 1
+    transfer_kind_limit = 0
+    transfer_bandwidth = 0
+
+
+class Manager(TransferManager):
+
+    def __init__(self, **config):
+        self.getConfig = Config()
+        self.getConfig.__dict__.update(config)
+        self.loop = asyncio.get_event_loop()
+
+        super().__init__()
+
+
+def recorder(events, name, event=None):
+
+    async def func(job):
+        events.append(name)
+        if event is not None:
+            await event.wait()
+        return name
+
+    return func
+
+
+def test_queued_jobs_start_by_priority_then_age():
+
+    async def main():
+        manager = Manager()
+        started = []
+        gate = asyncio.Event()
+
+        tasks = [
+            asyncio.ensure_future(
+                manager.run_transfer("upload",
+                                     recorder(started, name, gate),
+                                     name=name,
+                                     priority=priority))
+            for name, priority in (("first", 0), ("low", 0), ("high", 5),
+                                   ("later", 0))
+        ]
+        await asyncio.sleep(0.01)
+        assert [job.state for job in manager.list_transfers()
+               ] == ["running", "queued", "queued", "queued"]
+
+        gate.set()
+        assert await asyncio.gather(*tasks) == ["first", "low", "high", "later"]
+        assert started == ["first", "high", "low", "later"]
+        assert not manager.transfer_jobs
+
+    asyncio.run(main())
+
+
+def test_kind_limit_holds_back_only_that_kind():
+
+    async def main():
+        manager = Manager(transfer_limit=0, transfer_kind_limit=1)
+        started = []
+        gate = asyncio.Event()
+
+        tasks = [
+            asyncio.ensure_future(
+                manager.run_transfer(kind,
+                                     recorder(started, name, gate),
+                                     name=name))
+            for kind, name in (("upload", "u1"), ("upload", "u2"),
+                               ("download", "d1"))
+        ]
+        await asyncio.sleep(0.01)
+        assert started == ["u1", "d1"]
+        assert manager.transfers_running == {"upload": 1, "download": 1}
+
+        gate.set()
+        await asyncio.gather(*tasks)
+        assert started == ["u1", "d1", "u2"]
+
+    asyncio.run(main())
+
+
+def test_cancel_queued_and_running_jobs():
+
+    async def main():
+        manager = Manager()
+        started = []
+        gate = asyncio.Event()
+
+        running = asyncio.ensure_future(
+            manager.run_transfer("upload",
+                                 recorder(started, "running", gate),
+                                 name="running"))
+        queued = asyncio.ensure_future(
+            manager.run_transfer("upload",
+                                 recorder(started, "queued"),
+                                 name="queued"))
+        waiting = asyncio.ensure_future(
+            manager.run_transfer("upload",
+                                 recorder(started, "waiting", gate),
+                                 name="waiting"))
+        await asyncio.sleep(0.01)
+
+        job = await manager.cancel_transfer(2)
+        assert job.name == "queued" and job.cancelled
+        with pytest.raises(TransferCancelled):
+            await queued
+
+        # Cancelling the running job frees its slot right away
+        await manager.cancel_transfer(1)
+        assert manager.get_transfer(3).state == "running"
+        with pytest.raises(TransferCancelled):
+            await running
+
+        gate.set()
+        assert await waiting == "waiting"
+        assert started == ["running", "waiting"]
+        assert await manager.cancel_transfer(1) is None
+
+    asyncio.run(main())
+
+
+def test_share_must_be_positive():
+
+    async def main():
+        manager = Manager()
+        with pytest.raises(ValueError):
+            await manager.run_transfer("upload",
+                                       recorder([], "none"),
+                                       name="none",
+                                       share=0)
+        assert not manager.transfer_jobs
+
+    asyncio.run(main())